@@ -0,0 +1,171 @@
+import atexit
+import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+from threading import Lock
+from common.metrics import registry
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Pass at most burst records per message per interval
+    Records are keyed on logger, level and formatted message, or on the
+    rate_limit key a call site gives (extra={'rate_limit': 'rc_timeout'}).
+    A warning raised from a 100Hz loop is let through once a second instead
+    of a hundred times; the next record that passes carries the number of
+    records suppressed since the last one. When no record follows (the
+    flood stopped), flush() reports the count instead. WARNING and above
+    are only limited when their call site gives a key, so different errors
+    from one loop are never hidden behind a count.
+    """
+
+    def __init__(self, interval=1.0, burst=1):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.lock = Lock()
+        self.windows = {}       # Key -> [window start, passed in window, suppressed, last suppressed record]
+        self.suppressed_total = 0
+        self.suppressed = registry.counter('logging.suppressed')
+
+    def filter(self, record):
+        key = getattr(record, 'rate_limit', None)
+        if key is None:
+            if record.levelno >= logging.WARNING:
+                return True
+            key = (record.name, record.levelno, record.getMessage())
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None:
+                self.windows[key] = [record.created, 1, 0, None]
+                return True
+            if record.created - window[0] >= self.interval:
+                window[0] = record.created
+                window[1] = 0
+            if window[1] >= self.burst:
+                window[2] += 1
+                window[3] = record
+                self.suppressed_total += 1
+                self.suppressed.inc()
+                return False
+            window[1] += 1
+            skipped, window[2], window[3] = window[2], 0, None
+
+        if skipped:
+            self._annotate(record, skipped)
+        return True
+
+    @staticmethod
+    def _annotate(record, skipped):
+        record.msg = f"{record.getMessage()} ({skipped} similar messages suppressed)"
+        record.args = None
+
+    def flush(self, now=None):
+        """
+        Summaries of suppressed records nothing has reported yet
+        Returns, per key whose window has run out (any window with
+        now=None), a copy of its last suppressed record carrying the count.
+        Windows that have run out with nothing to report are forgotten.
+        """
+        flushed = []
+        with self.lock:
+            for key, window in list(self.windows.items()):
+                if now is not None and now - window[0] < self.interval:
+                    continue
+                if window[2]:
+                    record = logging.makeLogRecord(window[3].__dict__)
+                    self._annotate(record, window[2])
+                    flushed.append(record)
+                    window[2], window[3] = 0, None
+                else:
+                    del self.windows[key]
+        return flushed
+
+    def get_stats(self):
+        """Suppressed record counts not reported yet, per key"""
+        with self.lock:
+            return {key: window[2] for key, window in self.windows.items() if window[2]}
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = registry.counter('logging.dropped')
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped.inc()
+
+
+class FlushingQueueListener(QueueListener):
+    """QueueListener that also writes the suppressed counts of floods that have stopped, once per interval"""
+
+    def __init__(self, log_queue, rate_limit, *handlers, respect_handler_level=False):
+        super().__init__(log_queue, *handlers, respect_handler_level=respect_handler_level)
+        self.rate_limit = rate_limit
+        self.next_flush = time.time() + rate_limit.interval
+
+    def dequeue(self, block):
+        while True:
+            now = time.time()
+            if now >= self.next_flush:
+                for record in self.rate_limit.flush(now):
+                    self.handle(record)
+                self.next_flush = now + self.rate_limit.interval
+            try:
+                return self.queue.get(block, timeout=self.next_flush - now)
+            except queue.Empty:
+                if not block:
+                    raise
+
+
+_listener = None
+_rate_limit = None
+
+
+def configure_logging(level=logging.INFO, interval=1.0, burst=1, queue_size=1000, stream=None):
+    """
+    Send all logging through a queue to a background writer thread
+    Handlers that do I/O run on the listener thread, so a log call from a
+    control loop costs a filter check and a queue put. Safe to call more
+    than once (the SIL harness runs both controllers in one process); only
+    the first call configures anything. Returns the RateLimitFilter.
+    stream: where the listener writes (default: sys.stderr)
+    """
+    global _listener, _rate_limit
+    if _listener is not None:
+        return _rate_limit
+
+    output = logging.StreamHandler(stream)
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+    handler = DroppingQueueHandler(queue.Queue(queue_size))
+    _rate_limit = RateLimitFilter(interval, burst)
+    handler.addFilter(_rate_limit)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = FlushingQueueListener(handler.queue, _rate_limit, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _rate_limit
+
+
+def stop_logging():
+    """Write out queued records and any unreported suppressed counts, and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for record in _rate_limit.flush():
+            _listener.handle(record)
+        _listener = None
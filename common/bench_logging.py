@@ -0,0 +1,73 @@
+# bench_logging.py
+# Cost of a warning logged from the 100Hz loop on every iteration: synchronous handler vs. queued and rate-limited
+# Run from the repository root: python3 -m common.bench_logging
+import argparse
+import io
+import logging
+import time
+from common.async_logging import LOG_FORMAT, configure_logging, stop_logging
+from common.scheduler import percentile
+
+
+class SlowStream(io.StringIO):
+    """Console or SD-card log file that takes write_time per write"""
+
+    def __init__(self, write_time):
+        super().__init__()
+        self.write_time = write_time
+        self.writes = 0
+
+    def write(self, text):
+        end = time.perf_counter() + self.write_time
+        while time.perf_counter() < end:
+            pass
+        self.writes += 1
+        return super().write(text)
+
+
+def log_calls(logger, calls, period):
+    """Log a warning every period seconds; returns per-call times"""
+    times = []
+    next_call = time.perf_counter()
+    for _ in range(calls):
+        start = time.perf_counter()
+        logger.warning("Command timeout - engaging safety stop", extra={'rate_limit': 'command_timeout'})
+        times.append(time.perf_counter() - start)
+        next_call += period
+        time.sleep(max(0.0, next_call - time.perf_counter()))
+    return times
+
+
+def report(name, times, writes):
+    print(f"  {name:12s} p50 {percentile(times, 50) * 1e6:8.1f} us  p99 {percentile(times, 99) * 1e6:8.1f} us  "
+          f"max {max(times) * 1e6:8.1f} us  lines written {writes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Logging cost inside a 100Hz loop")
+    parser.add_argument('--calls', type=int, default=300, help="warnings logged (one per 10 ms)")
+    parser.add_argument('--write-time', type=float, default=2.0, help="simulated write time per line (ms)")
+    args = parser.parse_args()
+    print(f"{args.calls} warnings at 100Hz, {args.write_time} ms per line written")
+
+    root = logging.getLogger()
+    logger = logging.getLogger('USVHardwareController')
+
+    # Synchronous: the handler writes in the calling thread
+    stream = SlowStream(args.write_time / 1e3)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.addHandler(handler)
+    report('synchronous', log_calls(logger, args.calls, 0.01), stream.writes)
+    root.removeHandler(handler)
+
+    # Queued and rate-limited: the listener thread does the writing
+    stream = SlowStream(args.write_time / 1e3)
+    configure_logging(stream=stream)
+    times = log_calls(logger, args.calls, 0.01)
+    stop_logging()
+    report('queued', times, stream.writes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import binascii
+import struct
+from collections import namedtuple
+
+# Command frame sent from the Jetson to the Raspberry Pi (little-endian):
+#   sync       2s  b'\xa5\x5a'
+#   version    B   frame version
+#   sequence   H   command sequence number (wraps at 2**16)
+#   timestamp  I   sender monotonic time in milliseconds (wraps at 2**32)
+#   throttle   B   0-255, 128 neutral
+#   steering   B   0-255, 128 neutral
+#   gate       B   0 = stop, 1 = open, 2 = close
+#   crc        H   CRC-16/CCITT-FALSE of version..gate
+# 14 bytes in total, so a frame fits in a single SMBus block write.
+COMMAND_SYNC = b'\xa5\x5a'
+COMMAND_VERSION = 1
+COMMAND_FRAME = struct.Struct('<2sBHIBBBH')
+COMMAND_BODY = struct.Struct('<BHIBBB')
+
+Command = namedtuple('Command', ['sequence', 'timestamp', 'throttle', 'steering', 'gate'])
+
+
+def _crc(data):
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def pack_command(sequence, timestamp, throttle, steering, gate):
+    """Build one command frame"""
+    body = COMMAND_BODY.pack(
+        COMMAND_VERSION, sequence & 0xFFFF, timestamp & 0xFFFFFFFF,
+        int(throttle) & 0xFF, int(steering) & 0xFF, int(gate) & 0xFF
+    )
+    return COMMAND_SYNC + body + struct.pack('<H', _crc(body))
+
+
+def sequence_newer(sequence, last):
+    """True if sequence comes after last, allowing for 16-bit wrap-around"""
+    return 0 < ((sequence - last) & 0xFFFF) < 0x8000
+
+
+class CommandParser:
+    """
+    Incremental command frame parser
+    Bytes can be fed in arbitrary chunks. The parser hunts for the sync
+    word, checks version and CRC and resynchronises one byte past the sync
+    word on any bad frame, so a corrupted or truncated frame costs at most
+    that frame.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+        # Statistics
+        self.frames = 0
+        self.crc_errors = 0
+        self.bytes_discarded = 0
+
+    def feed(self, data):
+        """
+        Add received bytes
+        Returns the list of valid commands completed by this data.
+        """
+        buffer = self.buffer
+        buffer += data
+        commands = []
+        start = 0
+
+        while True:
+            start_sync = buffer.find(COMMAND_SYNC, start)
+            if start_sync < 0:
+                # Keep a trailing first sync byte; it may start the next frame
+                keep = 1 if start < len(buffer) and buffer[-1] == COMMAND_SYNC[0] else 0
+                self.bytes_discarded += len(buffer) - start - keep
+                start = len(buffer) - keep
+                break
+
+            self.bytes_discarded += start_sync - start
+            start = start_sync
+            if len(buffer) - start < COMMAND_FRAME.size:
+                break
+
+            _, version, sequence, timestamp, throttle, steering, gate, crc = \
+                COMMAND_FRAME.unpack_from(buffer, start)
+            body = memoryview(buffer)[start + 2:start + COMMAND_FRAME.size - 2]
+            valid = version == COMMAND_VERSION and _crc(body) == crc
+            body.release()
+
+            if not valid:
+                self.crc_errors += 1
+                self.bytes_discarded += 1
+                start += 1
+                continue
+
+            commands.append(Command(sequence, timestamp, throttle, steering, gate))
+            self.frames += 1
+            start += COMMAND_FRAME.size
+
+        del buffer[:start]
+        return commands
+
+
+class StreamBus:
+    """
+    SMBus stand-in that writes block transfers to a byte stream
+    Lets I2CCommunicator drive a serial port, a pty or a socket (for
+    loopback testing) instead of the I2C bus: the register byte and the
+    data are written as one contiguous frame, exactly as an I2C slave would
+    receive them.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._write = getattr(stream, 'sendall', None) or stream.write
+
+    def write_i2c_block_data(self, address, register, data):
+        self._write(bytes([register, *data]))
+
+    def read_i2c_block_data(self, address, register, length):
+        raise OSError("Stream link does not support reads")
@@ -0,0 +1,219 @@
+import glob
+import logging
+import os
+import struct
+import time
+from collections import deque
+from threading import Condition, Thread
+import numpy as np
+
+# One fixed-size record per control step. Both computers use the same
+# layout and fill in what they have (the Jetson has no thruster powers,
+# the Pi no autonomy).
+FLIGHT_RECORD = np.dtype([
+    ('timestamp', '<f8'),           # Monotonic seconds
+    ('rc_channels', '<u2', (14,)),  # Raw RC values, 1000-2000
+    ('command', 'u1', (3,)),        # Throttle, steering, gate (0-255, 0-255, 0-2)
+    ('sequence', '<u2'),            # Command frame sequence number
+    ('flags', 'u1'),                # FLAG_* bits
+    ('gate_state', 'u1'),           # Index into GATE_STATES
+    ('thruster_powers', '<f4', (4,)),
+    ('link_sent', '<u4'),           # Link frames sent (Jetson) or accepted (Pi)
+    ('link_errors', '<u4'),         # Failed sends (Jetson) or CRC errors (Pi)
+    ('link_rtt', '<f4'),            # Seconds, average
+    ('loop_overruns', '<u4'),
+    ('loop_jitter', '<f4'),         # Seconds, this step
+    ('loop_exec', '<f4'),           # Seconds, previous step
+])
+
+FLAG_EMERGENCY_STOP = 0x01
+FLAG_DIRECT_RC = 0x02
+FLAG_AUTONOMOUS = 0x04
+FLAG_NEW_COMMAND = 0x08             # A command was applied in this step
+
+GATE_STATES = ('unknown', 'opening', 'closing', 'open', 'closed', 'stopped')
+GATE_STATE_CODES = {name: code for code, name in enumerate(GATE_STATES)}
+
+# File layout: 64-byte header, then a preallocated array of records.
+# count is rewritten as records are flushed, so a file cut short by a
+# power loss still loads up to the last flush.
+FLIGHT_HEADER = struct.Struct('<4sBBHQd8s')   # magic, version, pad, record size, count, start time, source
+FLIGHT_HEADER_SIZE = 64
+FLIGHT_MAGIC = b'USVR'
+FLIGHT_VERSION = 1
+
+
+class FlightRecorder:
+    """
+    Binary flight-data recorder
+    append() only puts a tuple on a deque, so it is cheap enough for the
+    100Hz loops. A background thread converts the queued tuples in batches
+    and copies them into a preallocated memory-mapped file; when the file
+    is full it moves on to the next one, keeping at most max_files.
+    """
+
+    def __init__(self, directory, source='', enabled=None, records_per_file=60000, max_files=12,
+                 flush_interval=0.5, sync_interval=5.0, max_queued=10000):
+        """
+        enabled: on unless the USV_RECORD environment variable is '0'
+        records_per_file: 60000 is ten minutes at 100Hz, about 6MB
+        sync_interval: seconds between msync calls (the SD card is slow)
+        """
+        self.logger = logging.getLogger('FlightRecorder')
+        self.directory = directory
+        self.source = source
+        self.enabled = os.environ.get('USV_RECORD', '1') != '0' if enabled is None else enabled
+        self.records_per_file = records_per_file
+        self.max_files = max_files
+        self.flush_interval = flush_interval
+        self.sync_interval = sync_interval
+
+        self.queue = deque(maxlen=max_queued)  # Oldest records are lost if the writer falls behind
+        self.condition = Condition()
+        self.running = False
+        self.thread = None
+
+        # Current file
+        self.file_index = 0
+        self.path = None
+        self.records = None
+        self.header = None
+        self.count = 0
+        self.last_sync = 0.0
+
+        # Statistics
+        self.appended = 0
+        self.written = 0
+        self.files_written = 0
+
+    def start(self):
+        """Create the output directory and start the writer thread"""
+        if not self.enabled:
+            return False
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            existing = sorted(glob.glob(os.path.join(self.directory, 'flight_*.bin')))
+            if existing:
+                self.file_index = int(os.path.basename(existing[-1])[7:13]) + 1
+            self.running = True
+            self.thread = Thread(target=self._writer_loop, daemon=True)
+            self.thread.start()
+            self.logger.info(f"Recording flight data to {self.directory}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to start flight recorder: {e}")
+            return False
+
+    def append(self, *fields):
+        """Queue one record; fields in FLIGHT_RECORD order"""
+        if self.running:
+            self.queue.append(fields)
+            self.appended += 1
+
+    def _writer_loop(self):
+        while self.running:
+            with self.condition:
+                self.condition.wait(self.flush_interval)
+            try:
+                self._flush()
+            except Exception as e:
+                self.logger.error(f"Flight recorder write failed: {e}")
+
+    def _flush(self):
+        """Write everything queued so far"""
+        pending = len(self.queue)
+        if not pending:
+            return
+        batch = np.array([self.queue.popleft() for _ in range(pending)], dtype=FLIGHT_RECORD)
+
+        position = 0
+        while position < len(batch):
+            if self.records is None or self.count == self.records_per_file:
+                self._open_next()
+            take = min(len(batch) - position, self.records_per_file - self.count)
+            self.records[self.count:self.count + take] = batch[position:position + take]
+            self.count += take
+            position += take
+        self.written += len(batch)
+        self._write_header()
+
+        now = time.monotonic()
+        if now - self.last_sync > self.sync_interval:
+            self.records.flush()
+            self.last_sync = now
+
+    def _open_next(self):
+        """Finish the current file and preallocate the next, removing the oldest beyond max_files"""
+        self._close_file()
+        self.path = os.path.join(self.directory, f"flight_{self.file_index:06d}.bin")
+        self.file_index += 1
+        self.records = np.memmap(self.path, dtype=FLIGHT_RECORD, mode='w+',
+                                 offset=FLIGHT_HEADER_SIZE, shape=(self.records_per_file,))
+        self.header = np.memmap(self.path, dtype=np.uint8, mode='r+', shape=(FLIGHT_HEADER_SIZE,))
+        self.count = 0
+        self.start_time = time.time()
+        self._write_header()
+
+        files = sorted(glob.glob(os.path.join(self.directory, 'flight_*.bin')))
+        for old in files[:-self.max_files]:
+            os.remove(old)
+
+    def _write_header(self):
+        self.header[:FLIGHT_HEADER.size] = np.frombuffer(FLIGHT_HEADER.pack(
+            FLIGHT_MAGIC, FLIGHT_VERSION, 0, FLIGHT_RECORD.itemsize,
+            self.count, self.start_time, self.source.encode()[:8]
+        ), dtype=np.uint8)
+
+    def _close_file(self):
+        if self.records is None:
+            return
+        self._write_header()
+        self.records.flush()
+        self.header.flush()
+        self.files_written += 1
+        self.records = None
+        self.header = None
+
+    def get_stats(self):
+        """Get record counts; appended minus written is queued or lost"""
+        return {
+            'appended': self.appended,
+            'written': self.written,
+            'queued': len(self.queue),
+            'files': self.files_written + (self.records is not None),
+            'path': self.path,
+        }
+
+    def stop(self):
+        """Write out everything queued and close the file"""
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join(timeout=2.0)
+        try:
+            self._flush()
+            self._close_file()
+        except Exception as e:
+            self.logger.error(f"Flight recorder close failed: {e}")
+
+
+def load_flight(path):
+    """
+    Load recorded flight data as a FLIGHT_RECORD structured array
+    path: one flight_*.bin file (returned as a read-only memmap, nothing is
+    copied) or a directory, whose files are concatenated in order.
+    """
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, 'flight_*.bin')))
+        if not files:
+            return np.zeros(0, dtype=FLIGHT_RECORD)
+        return np.concatenate([load_flight(file) for file in files])
+
+    with open(path, 'rb') as f:
+        magic, version, _, record_size, count, _, _ = FLIGHT_HEADER.unpack(f.read(FLIGHT_HEADER.size))
+    if magic != FLIGHT_MAGIC or version != FLIGHT_VERSION or record_size != FLIGHT_RECORD.itemsize:
+        raise ValueError(f"{path} is not a version {FLIGHT_VERSION} flight record")
+    if count == 0:
+        return np.zeros(0, dtype=FLIGHT_RECORD)
+    return np.memmap(path, dtype=FLIGHT_RECORD, mode='r', offset=FLIGHT_HEADER_SIZE, shape=(count,))
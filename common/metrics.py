@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+import socket
+import time
+from bisect import bisect_left
+from threading import Lock, Thread
+
+# Upper bounds (seconds) of the default latency histogram buckets
+LATENCY_BUCKETS = (
+    10e-6, 25e-6, 50e-6, 100e-6, 250e-6, 500e-6,
+    1e-3, 2.5e-3, 5e-3, 10e-3, 25e-3, 50e-3, 100e-3, 250e-3, 1.0,
+)
+
+
+class Counter:
+    """Monotonic count of events"""
+
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name):
+        self.name = name
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge:
+    """Last value of a measurement"""
+
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name):
+        self.name = name
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def snapshot(self):
+        return self.value
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram
+    observe() is a bisect and two additions, so it is cheap enough for the
+    100Hz control paths. Updates are not locked: a snapshot taken while a
+    sample is being recorded may be off by that one sample.
+    """
+
+    __slots__ = ('name', 'bounds', 'counts', 'count', 'total', 'maximum')
+
+    def __init__(self, name, bounds=LATENCY_BUCKETS):
+        self.name = name
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last bucket is overflow
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    def percentile(self, percent):
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.count:
+            return 0.0
+        rank = percent / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.maximum
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.maximum,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'buckets': dict(zip([*map(str, self.bounds), 'inf'], self.counts)),
+        }
+
+
+class Timer:
+    """Context manager recording elapsed time into a histogram"""
+
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """Named counters, gauges and histograms for one process"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = Lock()
+
+    def _get(self, name, factory, *args):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(name, factory(name, *args))
+        return metric
+
+    def counter(self, name):
+        return self._get(name, Counter)
+
+    def gauge(self, name):
+        return self._get(name, Gauge)
+
+    def histogram(self, name, bounds=LATENCY_BUCKETS):
+        return self._get(name, Histogram, bounds)
+
+    def remove(self, name):
+        """Forget a metric, e.g. one belonging to a client that went away"""
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def timer(self, name):
+        """Time a block: `with registry.timer('name'):`"""
+        return Timer(self.histogram(name))
+
+    def snapshot(self):
+        """Get the current value of every metric"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+
+# Process-wide default registry
+registry = MetricsRegistry()
+
+
+class MetricsExporter:
+    """
+    Periodically export a registry snapshot
+    Snapshots are written as JSON to a file (replaced atomically) and/or sent
+    as a UDP datagram to a local address, e.g. ('127.0.0.1', 9100).
+    """
+
+    def __init__(self, registry=registry, path=None, address=None, interval=1.0):
+        self.registry = registry
+        self.path = path
+        self.address = address
+        self.interval = interval
+        self.logger = logging.getLogger('MetricsExporter')
+        self.running = False
+        self.socket = None
+
+    def start(self):
+        """Start the export thread"""
+        if self.address:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.running = True
+        Thread(target=self._export_loop, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+
+    def _export_loop(self):
+        while self.running:
+            time.sleep(self.interval)
+            try:
+                self.export()
+            except Exception as e:
+                self.logger.error(f"Metrics export failed: {e}")
+
+    def export(self):
+        """Write one snapshot to the configured outputs"""
+        data = json.dumps({'time': time.time(), 'metrics': self.registry.snapshot()}).encode()
+        if self.path:
+            temporary = self.path + '.tmp'
+            with open(temporary, 'wb') as f:
+                f.write(data)
+            os.replace(temporary, self.path)
+        if self.socket:
+            self.socket.sendto(data, self.address)
@@ -0,0 +1,122 @@
+import heapq
+import logging
+import math
+import time
+from collections import deque
+
+
+class PeriodicTask:
+    """A callback run at a fixed rate against absolute deadlines"""
+
+    def __init__(self, name, rate_hz, callback, jitter_samples=1000):
+        self.name = name
+        self.period = 1.0 / rate_hz
+        self.callback = callback
+        self.next_deadline = 0.0
+
+        # Statistics
+        self.runs = 0
+        self.overruns = 0
+        self.skipped_periods = 0
+        self.max_exec_time = 0.0
+        self.jitter = deque(maxlen=jitter_samples)  # Start time minus deadline
+        self.exec_times = deque(maxlen=jitter_samples)
+
+    def get_stats(self):
+        """Get run counts, overruns and jitter/execution-time percentiles (seconds)"""
+        return {
+            'rate_hz': 1.0 / self.period,
+            'runs': self.runs,
+            'overruns': self.overruns,
+            'skipped_periods': self.skipped_periods,
+            'jitter_p50': percentile(self.jitter, 50),
+            'jitter_p99': percentile(self.jitter, 99),
+            'jitter_max': max(self.jitter, default=0.0),
+            'exec_p50': percentile(self.exec_times, 50),
+            'exec_p99': percentile(self.exec_times, 99),
+            'exec_max': self.max_exec_time,
+        }
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile of a sample window"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+class PeriodicScheduler:
+    """
+    Run several periodic tasks from one thread at fixed rates
+    Deadlines advance by exactly one period from the previous deadline, not
+    from when the task finished, so the average rate does not drift with
+    work time. A task that finishes after its next deadline counts as an
+    overrun; whole periods it missed are skipped rather than run back to
+    back to catch up.
+    """
+
+    def __init__(self, clock=time.monotonic, sleep=time.sleep):
+        self.logger = logging.getLogger('PeriodicScheduler')
+        self.clock = clock
+        self.sleep = sleep
+        self.tasks = {}
+        self.running = False
+        self._queue = []
+
+    def add_task(self, name, rate_hz, callback):
+        """Register callback() to run at rate_hz"""
+        task = PeriodicTask(name, rate_hz, callback)
+        self.tasks[name] = task
+        return task
+
+    def run(self):
+        """Run tasks until stop() is called"""
+        self.running = True
+        start = self.clock()
+        self._queue = []
+        for order, task in enumerate(self.tasks.values()):
+            task.next_deadline = start
+            heapq.heappush(self._queue, (task.next_deadline, order, task))
+
+        while self.running and self._queue:
+            self.run_next()
+
+    def run_next(self):
+        """Wait for the earliest deadline and run that task once"""
+        deadline, order, task = heapq.heappop(self._queue)
+
+        now = self.clock()
+        if deadline > now:
+            self.sleep(deadline - now)
+            now = self.clock()
+
+        try:
+            task.callback()
+        except Exception as e:
+            self.logger.error(f"Task '{task.name}' failed: {e}")
+
+        finished = self.clock()
+        task.runs += 1
+        task.jitter.append(now - deadline)
+        task.exec_times.append(finished - now)
+        task.max_exec_time = max(task.max_exec_time, finished - now)
+
+        # Advance against the deadline, skipping periods missed by an overrun
+        next_deadline = deadline + task.period
+        if finished > next_deadline:
+            task.overruns += 1
+            missed = math.floor((finished - next_deadline) / task.period)
+            task.skipped_periods += missed
+            next_deadline += missed * task.period
+        task.next_deadline = next_deadline
+        heapq.heappush(self._queue, (next_deadline, order, task))
+
+    def stop(self):
+        """Stop the scheduler after the current task"""
+        self.running = False
+
+    def get_stats(self):
+        """Get statistics for every task"""
+        return {name: task.get_stats() for name, task in self.tasks.items()}
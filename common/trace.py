@@ -0,0 +1,91 @@
+import itertools
+import os
+import struct
+import time
+import numpy as np
+
+# Stages a command passes through, in order
+RC_RECEIVED = 0        # Jetson read the RC input
+JETSON_PROCESSED = 1   # CommandProcessor produced the command
+LINK_SENT = 2          # Command frame written to the link
+PI_RECEIVED = 3        # Pi accepted the frame
+MIXED = 4              # MotorController mixed it into thruster powers
+PWM_WRITTEN = 5        # Duty cycles written to the PCA9685
+STAGE_NAMES = ('rc_received', 'jetson_processed', 'link_sent', 'pi_received', 'mixed', 'pwm_written')
+
+# Trace id spaces
+FLOW_LINK = 0          # Jetson commands, traced by command frame sequence number
+FLOW_RC = 1            # Direct RC on the Pi, traced by RC frame sequence number
+
+# Dump file: header, then records oldest first
+TRACE_HEADER = struct.Struct('<4sBB8sI')   # magic, version, record size, source, count
+TRACE_MAGIC = b'USVT'
+TRACE_VERSION = 1
+TRACE_RECORD = struct.Struct('<IBBxxQ')    # trace id, stage, flow, monotonic ns
+TRACE_DTYPE = np.dtype([('trace', '<u4'), ('stage', 'u1'), ('flow', 'u1'), ('pad', 'V2'), ('timestamp', '<u8')])
+
+
+class TraceBuffer:
+    """
+    Fixed-size binary ring of (trace id, stage, flow, timestamp) records
+    record() packs 16 bytes into a preallocated buffer and never allocates
+    or locks, so it can stay on in the hot paths; when disabled it returns
+    at once. The oldest records are overwritten when the ring is full.
+    """
+
+    def __init__(self, capacity=65536, enabled=None, source=''):
+        """
+        enabled: defaults to the USV_TRACE environment variable being set
+        source: short name stored in dumps (e.g. 'jetson', 'pi')
+        """
+        self.capacity = capacity
+        self.enabled = bool(os.environ.get('USV_TRACE')) if enabled is None else enabled
+        self.source = source
+        self.buffer = bytearray(capacity * TRACE_RECORD.size)
+        self._index = itertools.count()  # next() is atomic under the GIL
+        self.recorded = 0
+
+    def record(self, trace, stage, flow=FLOW_LINK, timestamp=None):
+        """Record that a trace reached a stage (timestamp: time.monotonic_ns() value)"""
+        if not self.enabled:
+            return
+        index = next(self._index)
+        TRACE_RECORD.pack_into(
+            self.buffer, (index % self.capacity) * TRACE_RECORD.size,
+            trace & 0xFFFFFFFF, stage, flow, time.monotonic_ns() if timestamp is None else timestamp
+        )
+        self.recorded = index + 1
+
+    def records(self):
+        """Copy of the buffered records, oldest first, as a structured array"""
+        count = min(self.recorded, self.capacity)
+        data = np.frombuffer(bytes(self.buffer), dtype=TRACE_DTYPE)
+        if self.recorded <= self.capacity:
+            return data[:count].copy()
+        start = self.recorded % self.capacity
+        return np.concatenate([data[start:], data[:start]])
+
+    def dump(self, path):
+        """Write the buffered records to a binary trace file; returns the record count"""
+        records = self.records()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, TRACE_RECORD.size,
+                                      self.source.encode()[:8], len(records)))
+            f.write(records.tobytes())
+        os.replace(tmp_path, path)
+        return len(records)
+
+
+def load_trace(path):
+    """Read a trace file; returns (source, structured record array)"""
+    with open(path, 'rb') as f:
+        magic, version, record_size, source, count = TRACE_HEADER.unpack(f.read(TRACE_HEADER.size))
+        if magic != TRACE_MAGIC or version != TRACE_VERSION or record_size != TRACE_RECORD.size:
+            raise ValueError(f"{path} is not a version {TRACE_VERSION} trace file")
+        records = np.frombuffer(f.read(count * record_size), dtype=TRACE_DTYPE)
+    return source.rstrip(b'\0').decode(), records
+
+
+# Process-wide trace buffer
+tracer = TraceBuffer()
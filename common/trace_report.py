@@ -0,0 +1,108 @@
+# trace_report.py
+# Per-stage command latency percentiles from binary trace dumps
+#
+#   USV_TRACE=1 python3 main.py ...        (on each computer; dumps on shutdown)
+#   python3 -m common.trace_report /tmp/usv_jetson_trace.bin /tmp/usv_pi_trace.bin
+import argparse
+import numpy as np
+from common.trace import FLOW_LINK, FLOW_RC, LINK_SENT, PI_RECEIVED, STAGE_NAMES, load_trace
+
+FLOW_NAMES = {FLOW_LINK: 'Jetson commands', FLOW_RC: 'Pi direct RC'}
+
+
+def align_clocks(traces):
+    """
+    Shift the Pi's records onto the Jetson's clock
+    Each computer has its own monotonic clock, so the offset is estimated
+    as the smallest link delay seen, i.e. link latencies are reported
+    relative to the fastest frame. Returns the offset applied (ns), or None
+    when everything came from one process.
+    """
+    sent = [records for records in traces if np.any(records['stage'] == LINK_SENT)]
+    received = [records for records in traces if np.any(records['stage'] == PI_RECEIVED)]
+    if len(traces) < 2 or not sent or not received or sent[0] is received[0]:
+        return None
+
+    def first_times(records, stage):
+        mask = (records['stage'] == stage) & (records['flow'] == FLOW_LINK)
+        ids, index = np.unique(records['trace'][mask], return_index=True)
+        return ids, records['timestamp'][mask][index].astype(np.int64)
+
+    sent_ids, sent_times = first_times(sent[0], LINK_SENT)
+    received_ids, received_times = first_times(received[0], PI_RECEIVED)
+    common, sent_index, received_index = np.intersect1d(sent_ids, received_ids, return_indices=True)
+    if not len(common):
+        return None
+    offset = int(np.min(received_times[received_index] - sent_times[sent_index]))
+    pi = received[0]
+    pi['timestamp'] = (pi['timestamp'].astype(np.int64) - offset).astype(np.uint64)
+    return offset
+
+
+def stage_table(records, flow):
+    """(traces, stages) array of first timestamps in ns, NaN where a stage was not seen"""
+    records = records[records['flow'] == flow]
+    ids, rows = np.unique(records['trace'], return_inverse=True)
+    table = np.full((len(ids), len(STAGE_NAMES)), np.nan)
+    # Earliest timestamp per (trace, stage); fmin skips the NaN fill. (Fancy
+    # assignment leaves the winner among repeated indices undefined.)
+    np.fmin.at(table, (rows, records['stage']), records['timestamp'].astype(np.float64))
+    return table
+
+
+def summarize(deltas):
+    ms = deltas / 1e6
+    return (f"{len(ms):7d}  {np.percentile(ms, 50):8.3f}  {np.percentile(ms, 90):8.3f}  "
+            f"{np.percentile(ms, 99):8.3f}  {ms.max():8.3f}")
+
+
+def report(table, name):
+    present = ~np.isnan(table)
+    traced = present.sum(axis=1) >= 2   # Reached at least two stages
+    if not traced.any():
+        return
+    print(f"{name}: {int(traced.sum())} traces")
+    print(f"  {'stage':40s} {'count':>7s}  {'p50 ms':>8s}  {'p90 ms':>8s}  {'p99 ms':>8s}  {'max ms':>8s}")
+
+    # Each stage against the previous stage the trace actually passed through
+    for later in range(1, len(STAGE_NAMES)):
+        for earlier in range(later - 1, -1, -1):
+            skipped = present[:, earlier + 1:later].any(axis=1)
+            mask = present[:, earlier] & present[:, later] & ~skipped
+            if mask.any():
+                deltas = table[mask, later] - table[mask, earlier]
+                label = f"{STAGE_NAMES[earlier]} -> {STAGE_NAMES[later]}"
+                print(f"  {label:40s} {summarize(deltas)}")
+
+    # End to end: first recorded stage to the PWM write
+    last = len(STAGE_NAMES) - 1
+    first = np.argmax(present, axis=1)
+    mask = present[:, last] & (first < last)
+    if mask.any():
+        deltas = table[mask, last] - table[mask, first[mask]]
+        print(f"  {'end to end':40s} {summarize(deltas)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Command latency per stage from trace dumps")
+    parser.add_argument('paths', nargs='+', help="trace files from TraceBuffer.dump()")
+    args = parser.parse_args()
+
+    traces = []
+    for path in args.paths:
+        source, records = load_trace(path)
+        print(f"{path}: {len(records)} records from '{source}'")
+        traces.append(records.copy())
+
+    offset = align_clocks(traces)
+    if offset is not None:
+        print(f"Clocks aligned on the fastest link frame (offset {offset / 1e6:.3f} ms); "
+              f"link latency is relative to it")
+
+    records = np.concatenate(traces)
+    for flow, name in FLOW_NAMES.items():
+        report(stage_table(records, flow), name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+# conftest.py
+# Test setup: the Jetson and Pi trees on the import path, as their entry points and sil/ set it up
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'jetson'))
+sys.path.insert(0, os.path.join(ROOT, 'raspberry_pi'))
+
+# Bench-top scripts for the real hardware, not tests
+collect_ignore = ['jetson/sender_test.py', 'raspberry_pi/receiver_test.py', 'raspberry_pi/test_dc_motor.py']
@@ -0,0 +1,106 @@
+import math
+from collections import namedtuple
+import numpy as np
+
+Suggestion = namedtuple('Suggestion', ['direction', 'speed', 'steering', 'throttle'])
+
+
+class PolarObstacleMap:
+    """
+    Polar occupancy histogram from a ZED depth map
+    The depth image is strided down, every sampled column is assigned to a
+    horizontal angle bin and the nearest range seen in each bin is kept.
+    Everything is precomputed per resolution so an update is a handful of
+    NumPy reductions with no Python loops.
+    """
+
+    def __init__(self, width=1280, height=720, horizontal_fov=87.0, angle_bins=31,
+                 stride=4, row_band=(0.3, 0.7), min_range=0.3, max_range=20.0):
+        """
+        horizontal_fov: camera horizontal field of view in degrees
+        row_band: fraction of image rows (top, bottom) scanned for obstacles;
+                  excludes the sky and the water right in front of the bow
+        """
+        self.min_range = min_range
+        self.max_range = max_range
+        self.stride = stride
+        self.row_slice = slice(int(height * row_band[0]), int(height * row_band[1]), stride)
+
+        # Angle of every sampled column (positive = right of the bow)
+        columns = np.arange(0, width, stride)
+        focal = (width / 2) / math.tan(math.radians(horizontal_fov) / 2)
+        column_angles = np.arctan((columns + 0.5 - width / 2) / focal)
+
+        # Columns are sorted by angle, so each bin is a contiguous run of
+        # columns and the per-bin minimum is a single reduceat
+        half_fov = math.radians(horizontal_fov) / 2
+        edges = np.linspace(-half_fov, half_fov, angle_bins + 1)
+        column_bins = np.clip(np.searchsorted(edges, column_angles, side='right') - 1, 0, angle_bins - 1)
+        self.bin_starts = np.searchsorted(column_bins, np.arange(angle_bins))
+        if np.any(np.diff(self.bin_starts) == 0):
+            raise ValueError("More angle bins than sampled columns; reduce angle_bins or stride")
+
+        self.bin_angles = (edges[:-1] + edges[1:]) / 2
+        self.inv_cos = (1.0 / np.cos(column_angles)).astype(np.float32)
+        self.ranges = np.full(angle_bins, max_range, dtype=np.float32)
+
+        # Steering parameters
+        self.boat_bins = 3          # Bins a gap must span for the boat to fit
+        self.heading_weight = 4.0   # Metres of clearance traded per radian off the bow
+        self.stop_range = 1.5       # No gap with more clearance than this: stop
+        self.slow_range = 6.0       # Full cruise speed beyond this clearance
+        self.cruise_speed = 0.6
+        self.turn_speed = 0.4
+        self.straight_band = 0.1    # |steering| treated as straight ahead
+
+    def update(self, depth):
+        """
+        Compute nearest range per angle bin from a depth map (metres)
+        NaN (no measurement) is ignored, +inf (too far) counts as free space
+        and -inf (too close) as an obstacle at min_range.
+        Returns the per-bin nearest range array (reused between calls).
+        """
+        sampled = depth[self.row_slice, ::self.stride]
+
+        # Nearest valid depth per column; NaN -> max so it never wins the min
+        column_depth = np.fmin.reduce(sampled, axis=0)
+        column_depth = np.nan_to_num(column_depth, nan=np.inf, posinf=np.inf, neginf=0.0)
+
+        # Planar depth to range along each column's ray, then min per bin
+        column_range = column_depth * self.inv_cos
+        np.minimum.reduceat(column_range, self.bin_starts, out=self.ranges)
+        np.clip(self.ranges, self.min_range, self.max_range, out=self.ranges)
+        return self.ranges
+
+    def suggest(self, ranges=None):
+        """
+        Pick a heading through the clearest gap near the bow
+        Returns Suggestion(direction, speed, steering, throttle) where
+        direction/speed suit CommandProcessor.move() and steering/throttle
+        are continuous values in -1..1 / 0..1.
+        """
+        ranges = self.ranges if ranges is None else ranges
+
+        # Clearance of a boat-wide window centred on each bin
+        pad = self.boat_bins // 2
+        padded = np.pad(ranges, pad, mode='edge')
+        clearance = np.lib.stride_tricks.sliding_window_view(padded, self.boat_bins).min(axis=1)
+
+        score = clearance - self.heading_weight * np.abs(self.bin_angles)
+        best = int(np.argmax(score))
+        steering = float(self.bin_angles[best] / self.bin_angles[-1])
+
+        ahead = float(clearance[len(clearance) // 2])
+        if clearance[best] < self.stop_range:
+            return Suggestion('stop', 0.0, 0.0, 0.0)
+
+        throttle = self.cruise_speed * float(np.clip(
+            (ahead - self.stop_range) / (self.slow_range - self.stop_range), 0.0, 1.0
+        ))
+        if abs(steering) < self.straight_band:
+            return Suggestion('forward', throttle, steering, throttle)
+
+        # CommandProcessor.move() has no blended turn, so head for the gap
+        # with a pure turn, slowing down for whatever is ahead
+        direction = 'right' if steering > 0 else 'left'
+        return Suggestion(direction, max(throttle, self.turn_speed), steering, throttle)
@@ -0,0 +1,68 @@
+# bench_adaptive_stream.py
+# Adaptive vs. fixed-profile streaming over a throttled link stand-in whose rate changes in steps
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sil.link_emulator import ThrottledSocket
+from teleoperation.frame_protocol import MODE_ADAPTIVE
+from teleoperation.video_stream import VideoStream
+
+# (seconds, link rate in KiB/s): fast link, radio fade, long-range telemetry, recovery
+PHASES = ((10, 4000), (15, 400), (15, 80), (20, 4000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive streaming over a scripted slow link")
+    parser.add_argument('--time-scale', type=float, default=1.0, help="multiply every phase length")
+    args = parser.parse_args()
+
+    stream = VideoStream(port=5581, camera='synthetic')
+    stream.initialize_camera()
+    stream.start_streaming()
+    links = {'adaptive': ThrottledSocket(PHASES[0][1] * 1024), 'fixed': ThrottledSocket(PHASES[0][1] * 1024)}
+    clients = {
+        'adaptive': stream.add_client(links['adaptive'], ('adaptive', 0), 'full', MODE_ADAPTIVE),
+        'fixed': stream.add_client(links['fixed'], ('fixed', 0), 'full'),
+    }
+    print("synthetic 1280x720 camera at 30 fps; 'fixed' always gets full q80, 'adaptive' starts at half")
+    print("   t   link KiB/s | adaptive: profile  fps   KiB/s  latency  drops | fixed:  fps   KiB/s  latency  drops")
+
+    start = time.monotonic()
+    previous = {name: (0, 0, 0) for name in clients}
+    phase_latency = []
+    for seconds, rate in PHASES:
+        for link in links.values():
+            link.set_rate(rate * 1024)
+        samples = {name: [] for name in clients}
+        for _ in range(int(seconds * args.time_scale)):
+            time.sleep(1.0)
+            row = []
+            for name, client in clients.items():
+                stats = client.get_stats()
+                sent, dropped, delivered = stats['frames_sent'], stats['frames_dropped'], links[name].bytes_delivered
+                last_sent, last_dropped, last_delivered = previous[name]
+                previous[name] = sent, dropped, delivered
+                samples[name].append(stats['last_latency'])
+                row.append((stats, sent - last_sent, (delivered - last_delivered) / 1024, dropped - last_dropped))
+
+            (adaptive, fps, rate_sent, drops), (fixed, fixed_fps, fixed_rate, fixed_drops) = row
+            setting = f"{adaptive['profile']}/{adaptive['adaptive']['frame_divisor']}"
+            print(f"{time.monotonic() - start:5.0f} {rate:8d}     | {setting:>17s} {fps:4d} {rate_sent:7.0f} "
+                  f"{adaptive['last_latency'] * 1e3:6.0f} ms {drops:5d} | {fixed_fps:11d} {fixed_rate:7.0f} "
+                  f"{fixed['last_latency'] * 1e3:6.0f} ms {fixed_drops:5d}")
+        phase_latency.append((rate, samples))
+
+    print("\nmean latency per phase (capture to sent):")
+    for rate, samples in phase_latency:
+        means = {name: sum(values) / len(values) * 1e3 for name, values in samples.items()}
+        print(f"  {rate:5d} KiB/s  adaptive {means['adaptive']:7.0f} ms  fixed {means['fixed']:7.0f} ms")
+    print(f"adaptive rung changes: {clients['adaptive'].get_stats()['adaptive']['changes']}")
+    stream.stop_streaming()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# bench_delta_video.py
+# Bandwidth and CPU of the tile-delta stream vs. plain JPEG on synthetic or recorded footage
+import argparse
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from teleoperation.frame_protocol import FrameHeader
+from teleoperation.jpeg_encoders import OpenCVEncoder
+from teleoperation.profile_encoder import DEFAULT_PROFILES
+from teleoperation.synthetic_capture import SyntheticCapture
+from teleoperation.tile_delta import DeltaEncoder, TileReassembler
+
+
+def scrolling_scene(count):
+    """SyntheticCapture's own output: the whole water texture moves 8 px per frame (worst case)"""
+    capture = SyntheticCapture()
+    for index in range(count):
+        offset = index * 8 % capture.width
+        yield np.ascontiguousarray(capture.texture[:, offset:offset + capture.width])
+
+
+def harbour_scene(count):
+    """Fixed camera: sensor noise everywhere, shimmer on the water and a boat crossing the frame"""
+    capture = SyntheticCapture()
+    rng = np.random.default_rng(1)
+    background = capture.texture[:, :capture.width].astype(np.int16)
+    horizon = capture.height // 2
+    for index in range(count):
+        frame = background + rng.integers(-2, 3, background.shape, dtype=np.int16)
+        frame[horizon:, :, :3] += rng.integers(-4, 5, (capture.height - horizon, capture.width, 3), dtype=np.int16)
+        left = 100 + index * 4 % (capture.width - 300)
+        frame[horizon + 40:horizon + 100, left:left + 160, :3] = (40, 40, 160)  # Boat
+        frame[horizon + 10:horizon + 40, left + 50:left + 90, :3] = (230, 230, 230)  # Cabin
+        frame[..., 3] = 255
+        yield np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def recorded_scene(path, count):
+    """Frames of a recorded video file, as BGRA"""
+    video = cv2.VideoCapture(path)
+    for _ in range(count):
+        ok, frame = video.read()
+        if not ok:
+            break
+        yield cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+
+
+def psnr(a, b):
+    error = np.mean((a.astype(np.float32) - b.astype(np.float32)) ** 2)
+    return 10 * np.log10(255 ** 2 / error) if error else float('inf')
+
+
+def run(name, frames, profile, fps):
+    """Encode the footage both ways; print bytes, encode time and picture quality per frame"""
+    jpeg = OpenCVEncoder()
+    clock = [0.0]
+    delta = DeltaEncoder(jpeg, clock=lambda: clock[0])
+    reassembler = TileReassembler()
+
+    plain_bytes = delta_bytes = 0
+    plain_time = delta_time = 0.0
+    plain_psnr = delta_psnr = 0.0
+    count = 0
+    for frame in frames:
+        if profile.scale != 1.0:
+            frame = cv2.resize(frame, None, fx=profile.scale, fy=profile.scale, interpolation=cv2.INTER_AREA)
+        count += 1
+        clock[0] = count / fps
+
+        start = time.perf_counter()
+        buffer = jpeg.encode(frame, profile.quality)
+        plain_time += time.perf_counter() - start
+        plain_bytes += buffer.nbytes
+        plain_psnr += psnr(cv2.imdecode(buffer, cv2.IMREAD_COLOR), frame[..., :3])
+
+        start = time.perf_counter()
+        codec, payload, _ = delta.encode(frame, profile.quality)
+        delta_time += time.perf_counter() - start
+        delta_bytes += payload.nbytes
+        header = FrameHeader(1, codec, 0, count, 0, frame.shape[1], frame.shape[0], payload.nbytes)
+        delta_psnr += psnr(reassembler.update(header, payload), frame[..., :3])
+
+    stats = delta.get_stats()
+    print(f"  {name:8s} {profile.name:9s} {frame.shape[1]}x{frame.shape[0]}  "
+          f"jpeg {plain_bytes / count / 1024:6.1f} KiB {plain_bytes * fps / count / 1024:6.0f} KiB/s "
+          f"{plain_time / count * 1e3:5.2f} ms {plain_psnr / count:4.1f} dB | "
+          f"delta {delta_bytes / count / 1024:6.1f} KiB {delta_bytes * fps / count / 1024:6.0f} KiB/s "
+          f"{delta_time / count * 1e3:5.2f} ms {delta_psnr / count:4.1f} dB | "
+          f"{100 * (1 - delta_bytes / plain_bytes):5.1f}% less, "
+          f"{stats['keyframes']} keyframes, {stats['avg_tiles_per_delta']:.1f} tiles/delta")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tile-delta stream vs. plain JPEG")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--video', help="recorded footage to use instead of the synthetic scenes")
+    args = parser.parse_args()
+    print(f"{args.frames} frames at {args.fps:.0f} fps; average bytes, encode time and PSNR per frame")
+
+    for profile in (DEFAULT_PROFILES['full'], DEFAULT_PROFILES['half']):
+        if args.video:
+            run('recorded', recorded_scene(args.video, args.frames), profile, args.fps)
+            continue
+        run('harbour', harbour_scene(args.frames), profile, args.fps)
+        run('scroll', scrolling_scene(args.frames), profile, args.fps)
+
+
+if __name__ == "__main__":
+    main()
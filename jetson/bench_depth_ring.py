@@ -0,0 +1,75 @@
+# bench_depth_ring.py
+# Allocation benchmark: fresh depth array per call vs. the preallocated FrameRing
+import time
+import tracemalloc
+import numpy as np
+from teleoperation.frame_ring import FrameRing
+
+WIDTH, HEIGHT = 1280, 720
+FRAMES = 300
+READS_PER_FRAME = 3  # 100 Hz control loop reading a 30 fps camera
+
+
+def legacy_reads(source):
+    """What get_depth_data used to do: a new buffer for every call"""
+    for frame in range(FRAMES):
+        for _ in range(READS_PER_FRAME):
+            depth = np.empty((HEIGHT, WIDTH), dtype=np.float32)
+            np.copyto(depth, source)
+            yield depth
+
+
+def ring_reads(source):
+    """Writer fills ring slots in place, reader takes read-only views"""
+    ring = FrameRing(
+        [(np.empty((HEIGHT, WIDTH), dtype=np.float32),) for _ in range(4)],
+        ('depth',)
+    )
+    sequence = -1
+    for frame in range(FRAMES):
+        index, (depth,) = ring.acquire()
+        np.copyto(depth, source)
+        ring.commit(index, frame, time.monotonic())
+        for _ in range(READS_PER_FRAME):
+            latest = ring.wait_for_frame(sequence, timeout=0) or ring.latest()
+            sequence = latest.sequence
+            yield latest.depth
+
+
+def measure(name, reads, source):
+    warmup = READS_PER_FRAME * 4  # Ring slots are allocated during warm-up
+    calls = FRAMES * READS_PER_FRAME - warmup
+    tracemalloc.start()
+    baseline = previous = tracemalloc.get_traced_memory()[0]
+    churn = 0
+    samples = []
+
+    for i, depth in enumerate(reads(source)):
+        if i == warmup:
+            start = time.perf_counter()
+        float(depth[::8, ::8].min())  # Touch the data like a consumer would
+        current, peak = tracemalloc.get_traced_memory()
+        if i >= warmup:
+            churn += peak - previous  # Bytes transiently allocated by this call
+        previous = current
+        tracemalloc.reset_peak()
+        if i % (FRAMES * READS_PER_FRAME // 5) == 0:
+            samples.append((current - baseline) / 1e6)
+
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+
+    print(f"{name:7s} {churn / calls / 1e6:8.3f} MB allocated/call  "
+          f"{elapsed / calls * 1e3:6.3f} ms/call  "
+          f"resident MB over run: {', '.join(f'{s:.2f}' for s in samples)}")
+
+
+def main():
+    source = np.random.default_rng(0).uniform(0.3, 20.0, (HEIGHT, WIDTH)).astype(np.float32)
+    print(f"{FRAMES} frames of {WIDTH}x{HEIGHT} float32 depth, {READS_PER_FRAME} reads/frame")
+    measure('legacy', legacy_reads, source)
+    measure('ring', ring_reads, source)
+
+
+if __name__ == "__main__":
+    main()
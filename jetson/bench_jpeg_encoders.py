@@ -0,0 +1,99 @@
+# bench_jpeg_encoders.py
+# JPEG encode cost per backend on synthetic 1280x720 BGRA frames: latency and pipelined throughput
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.scheduler import percentile
+from teleoperation.jpeg_encoders import ENCODERS, OpenCVEncoder
+from teleoperation.synthetic_capture import SyntheticCapture
+
+
+class CopyThenEncode(OpenCVEncoder):
+    """The old VideoStream path: copy the capture buffer, then cv2.imencode"""
+
+    name = 'opencv+copy'
+
+    def encode(self, image, quality):
+        return super().encode(image.copy(), quality)
+
+
+def make_frames(count):
+    """Read-only BGRA frames from the synthetic camera's texture, like views of the capture ring"""
+    capture = SyntheticCapture()
+    frames = []
+    for index in range(count):
+        frame = np.ascontiguousarray(capture.texture[:, index * 8:index * 8 + capture.width])
+        frame.flags.writeable = False
+        frames.append(frame)
+    return frames
+
+
+def latency(encoder, frames, quality, count):
+    """One frame at a time; returns (per-frame times, bytes per frame)"""
+    times = []
+    size = 0
+    for index in range(count):
+        start = time.perf_counter()
+        size = encoder.encode(frames[index % len(frames)], quality).nbytes
+        times.append(time.perf_counter() - start)
+    return times, size
+
+
+def throughput(encoder, frames, quality, workers, duration):
+    """Frames N and N+1 in flight at once, like ProfileEncoder's worker pool; returns frames/s"""
+    encoded = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        pending = []
+        while time.perf_counter() - start < duration:
+            pending.append(pool.submit(encoder.encode, frames[encoded % len(frames)], quality))
+            if len(pending) >= workers:
+                pending.pop(0).result()
+                encoded += 1
+        for future in pending:
+            future.result()
+            encoded += 1
+        return encoded / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JPEG encoder backends on synthetic frames")
+    parser.add_argument('--frames', type=int, default=200, help="frames for the latency run")
+    parser.add_argument('--duration', type=float, default=3.0, help="seconds for the throughput run")
+    parser.add_argument('--quality', type=int, default=80)
+    parser.add_argument('--workers', type=int, default=2, help="frames in flight for the throughput run")
+    args = parser.parse_args()
+
+    frames = make_frames(16)
+    reference = cv2.imdecode(OpenCVEncoder().encode(frames[0], args.quality), cv2.IMREAD_COLOR)
+    print(f"1280x720 BGRA, quality {args.quality}, {os.cpu_count()} CPUs, "
+          f"throughput with {args.workers} frames in flight")
+
+    backends = [('opencv+copy', CopyThenEncode)] + list(ENCODERS.items())
+    for name, factory in backends:
+        try:
+            encoder = factory()
+        except Exception as e:
+            print(f"  {name:12s} not available: {e}")
+            continue
+        encoder.encode(frames[0], args.quality)  # Warm up
+        times, size = latency(encoder, frames, args.quality, args.frames)
+        rate = throughput(encoder, frames, args.quality, args.workers, args.duration)
+        decoded = cv2.imdecode(encoder.encode(frames[0], args.quality), cv2.IMREAD_COLOR)
+        difference = int(np.abs(decoded.astype(np.int16) - reference).max())
+        print(f"  {name:12s} {np.mean(times) * 1e3:6.2f} ms/frame  p50 {percentile(times, 50) * 1e3:6.2f}  "
+              f"p99 {percentile(times, 99) * 1e3:6.2f}  {rate:6.1f} frames/s  {size / 1024:6.1f} KiB  "
+              f"max pixel diff vs opencv {difference}")
+        if hasattr(encoder, 'close'):
+            encoder.close()
+
+
+if __name__ == "__main__":
+    main()
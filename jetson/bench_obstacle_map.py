@@ -0,0 +1,50 @@
+# bench_obstacle_map.py
+# Synthetic-depth benchmark for PolarObstacleMap (accuracy: tests/test_obstacle_map.py)
+import math
+import time
+import numpy as np
+from autonomy.obstacle_map import PolarObstacleMap
+
+WIDTH, HEIGHT = 1280, 720
+FOV = 87.0
+ITERATIONS = 200
+
+
+def synthetic_depth(obstacles, nan_fraction=0.1, seed=0):
+    """
+    Build a depth map (planar Z, metres) with flat-faced obstacles
+    obstacles: list of (left_deg, right_deg, range_m) spanning the row band
+    Everything else is open water (+inf) with random NaN dropouts.
+    """
+    rng = np.random.default_rng(seed)
+    focal = (WIDTH / 2) / math.tan(math.radians(FOV) / 2)
+    angles = np.degrees(np.arctan((np.arange(WIDTH) + 0.5 - WIDTH / 2) / focal))
+
+    depth = np.full((HEIGHT, WIDTH), np.inf, dtype=np.float32)
+    for left, right, distance in obstacles:
+        columns = (angles >= left) & (angles <= right)
+        z = distance * np.cos(np.radians(angles[columns]))
+        depth[HEIGHT // 4:3 * HEIGHT // 4, columns] = z
+    depth[rng.random(depth.shape) < nan_fraction] = np.nan
+    return depth
+
+
+def benchmark():
+    grid = PolarObstacleMap(WIDTH, HEIGHT, horizontal_fov=FOV)
+    depth = synthetic_depth([(-30, -10, 3.0), (5, 15, 8.0)])
+    for _ in range(10):
+        grid.update(depth)
+
+    times = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        grid.update(depth)
+        grid.suggest()
+        times.append(time.perf_counter() - start)
+    times = np.array(times) * 1e3
+    print(f"update+suggest on {WIDTH}x{HEIGHT}: median {np.median(times):.2f} ms, "
+          f"p99 {np.percentile(times, 99):.2f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
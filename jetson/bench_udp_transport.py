@@ -0,0 +1,75 @@
+# bench_udp_transport.py
+# Delivered frame rate and latency of the UDP video transport at several datagram loss rates
+import argparse
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sil.link_emulator import LossyDatagramSocket
+from teleoperation.udp_transport import DATAGRAM_SIZE, UdpClientWriter, UdpFrameReceiver, UdpFrameSender
+from teleoperation.video_stream import VideoStream
+
+LOSS_RATES = (0.0, 0.001, 0.01, 0.02, 0.05, 0.1)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else float('nan')
+
+
+def run(stream, profile, loss, burst, duration):
+    """Stream one profile through a lossy sender to a local receiver; print what arrived"""
+    receiver = UdpFrameReceiver(interface='127.0.0.1')
+    lossy = LossyDatagramSocket(socket.socket(socket.AF_INET, socket.SOCK_DGRAM), loss, burst, seed=1)
+    sender = UdpFrameSender(('127.0.0.1', receiver.port), sock=lossy)
+    client = stream.add_client(sender, ('bench', receiver.port), profile, writer=UdpClientWriter)
+
+    latencies = []
+    received_bytes = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        frame = receiver.read_frame(timeout=0.5)
+        if frame is None:
+            continue
+        header, payload = frame
+        latencies.append((time.time_ns() - header.timestamp) / 1e6)
+        received_bytes += header.length
+    client.close()
+    lossy.sock.close()
+    receiver.close()
+
+    sent = client.get_stats()['frames_sent']
+    fragments = sender.datagrams_sent / max(sent, 1)
+    expected = (1 - loss) ** fragments if burst == 1 else float('nan')
+    delivered = receiver.frames_received
+    print(f"  {profile:9s} {loss * 100:5.1f}%  {fragments:5.1f} dgrams/frame  sent {sent / duration:5.1f} fps  "
+          f"delivered {delivered / duration:5.1f} fps ({delivered / max(sent, 1) * 100:5.1f}%, "
+          f"expected {expected * 100:5.1f}%)  incomplete {receiver.frames_incomplete:4d}  "
+          f"latency p50 {percentile(latencies, 0.5):5.1f} ms p99 {percentile(latencies, 0.99):5.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UDP video transport under datagram loss")
+    parser.add_argument('--duration', type=float, default=5.0, help="seconds per loss rate")
+    parser.add_argument('--burst', type=int, default=1, help="datagrams lost in a row per loss event")
+    parser.add_argument('--profiles', default='full,half')
+    args = parser.parse_args()
+
+    stream = VideoStream(port=5591, camera='synthetic')
+    stream.initialize_camera()
+    stream.start_streaming()
+    print(f"synthetic 1280x720 camera at 30 fps over loopback; {DATAGRAM_SIZE}-byte datagrams, "
+          f"loss bursts of {args.burst}; expected = (1 - loss) ** datagrams per frame")
+    try:
+        for profile in args.profiles.split(','):
+            for loss in LOSS_RATES:
+                run(stream, profile, loss, args.burst, args.duration)
+    finally:
+        stream.stop_streaming()
+
+
+if __name__ == "__main__":
+    main()
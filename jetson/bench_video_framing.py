@@ -0,0 +1,85 @@
+# bench_video_framing.py
+# Loopback benchmark: legacy pickle framing vs. the binary frame protocol
+import pickle
+import socket
+import struct
+import threading
+import time
+import cv2
+import numpy as np
+from teleoperation.frame_protocol import FrameReader, pack_header, send_frame
+
+FRAMES = 500
+
+
+def make_jpeg():
+    """Encode a synthetic 1280x720 frame the same way VideoStream does"""
+    rng = np.random.default_rng(0)
+    frame = np.zeros((720, 1280, 4), dtype=np.uint8)
+    frame[:360] = (200, 150, 90, 255)   # sky
+    frame[360:] = (120, 80, 40, 255)    # water
+    frame[360:] += rng.integers(0, 40, (360, 1280, 4), dtype=np.uint8)
+    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    return buffer
+
+
+def legacy_sender(sock, buffer):
+    for _ in range(FRAMES):
+        data = pickle.dumps(buffer)
+        message_size = struct.pack("L", len(data))
+        sock.sendall(message_size + data)
+
+
+def legacy_receiver(sock):
+    size_len = struct.calcsize("L")
+    data = b""
+    for _ in range(FRAMES):
+        while len(data) < size_len:
+            data += sock.recv(65536)
+        size = struct.unpack("L", data[:size_len])[0]
+        data = data[size_len:]
+        while len(data) < size:
+            data += sock.recv(65536)
+        pickle.loads(data[:size])
+        data = data[size:]
+
+
+def binary_sender(sock, buffer):
+    for sequence in range(FRAMES):
+        header = pack_header(sequence, time.monotonic_ns(), 1280, 720, buffer.nbytes)
+        send_frame(sock, header, buffer)
+
+
+def binary_receiver(sock):
+    reader = FrameReader(sock)
+    for _ in range(FRAMES):
+        reader.read_frame()
+
+
+def run(name, sender, receiver, buffer):
+    tx, rx = socket.socketpair()
+    thread = threading.Thread(target=receiver, args=(rx,))
+    thread.start()
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    sender(tx, buffer)
+    thread.join()
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    tx.close()
+    rx.close()
+    print(f"{name:8s} {FRAMES / wall:8.1f} frames/s  "
+          f"{cpu / FRAMES * 1e6:8.1f} us CPU/frame")
+
+
+def main():
+    buffer = make_jpeg()
+    print(f"Payload: {buffer.nbytes} bytes/frame, {FRAMES} frames over socketpair")
+    run('pickle', legacy_sender, legacy_receiver, buffer)
+    run('binary', binary_sender, binary_receiver, buffer)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# bench_video_process.py
+# Control-loop jitter while streaming video: pipeline in the control process vs. in its own process
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.scheduler import PeriodicScheduler
+from teleoperation.command_processor import CommandProcessor
+from teleoperation.frame_protocol import FrameReader, connect
+from teleoperation.video_process import VideoProcess
+from teleoperation.video_stream import VideoStream
+
+
+class NullLink:
+    """Stands in for the I2CCommunicator"""
+
+    def send_command(self, throttle, steering, gate_control, trace=None):
+        return True
+
+
+def viewer(port, profile, duration, frames):
+    """Remote viewer, run in its own process so it loads neither side"""
+    sock = connect('127.0.0.1', port, profile)
+    reader = FrameReader(sock)
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        reader.read_frame()
+        frames.value += 1
+    sock.close()
+
+
+def control_loop(video, duration):
+    """100Hz teleoperation step plus a depth check, like USVController; returns the task stats"""
+    processor = CommandProcessor(NullLink())
+    channels = [1500] * 14
+    state = {'depth_sequence': -1, 'depth_frames': 0}
+
+    def step():
+        processor.process_rc_input(channels)
+        frame = video.get_depth_frame(state['depth_sequence'], timeout=0)
+        if frame is not None:
+            state['depth_sequence'] = frame.sequence
+            state['depth_frames'] += 1
+            float(frame.depth[::16, ::16].mean())  # Touch the depth like the obstacle map would
+
+    scheduler = PeriodicScheduler()
+    task = scheduler.add_task('control', 100, step)
+    stop_at = time.monotonic() + duration
+    scheduler.add_task('stop', 10, lambda: time.monotonic() > stop_at and scheduler.stop())
+    scheduler.run()
+    stats = task.get_stats()
+    stats['depth_frames'] = state['depth_frames']
+    return stats
+
+
+def run(name, video, port, duration):
+    if not video.initialize_camera():
+        print(f"  {name}: video failed to start")
+        return
+    video.start_streaming()
+    context = multiprocessing.get_context('spawn')
+    frames = context.Value('i', 0)
+    viewers = [context.Process(target=viewer, args=(port, profile, duration, frames))
+               for profile in ('full', 'half')]
+    for process in viewers:
+        process.start()
+    time.sleep(1.0)  # Viewers connected and encoding under way
+
+    stats = control_loop(video, duration)
+    for process in viewers:
+        process.join()
+    video.stop_streaming()
+    print(f"  {name:12s} jitter p50 {stats['jitter_p50'] * 1e3:6.3f} ms  p99 {stats['jitter_p99'] * 1e3:6.3f} ms  "
+          f"max {stats['jitter_max'] * 1e3:6.2f} ms  step p99 {stats['exec_p99'] * 1e3:6.3f} ms  "
+          f"overruns {stats['overruns']:3d}  depth frames {stats['depth_frames']}  "
+          f"frames to viewers {frames.value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Control-loop jitter with the video pipeline in or out of process")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds per configuration")
+    args = parser.parse_args()
+    print(f"100Hz control loop for {args.duration:.0f} s, synthetic 1280x720 camera at 30 fps, "
+          f"'full' and 'half' viewers, {os.cpu_count()} CPUs")
+
+    run('in-process', VideoStream(port=5561, camera='synthetic'), 5561, args.duration)
+    run('own process', VideoProcess(port=5562, camera='synthetic'), 5562, args.duration)
+
+
+if __name__ == "__main__":
+    main()
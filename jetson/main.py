@@ -1,26 +1,64 @@
 import logging
+import os
 import signal
 import sys
-from teleoperation.command_processor import CommandProcessor
-from teleoperation.video_stream import VideoStream
 import time
 
+# Modules shared by both computers live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.async_logging import configure_logging
+from common.flight_recorder import FLAG_AUTONOMOUS, FlightRecorder
+from common.metrics import MetricsExporter, registry
+from common.scheduler import PeriodicScheduler
+from common.trace import tracer
+from teleoperation.command_processor import CommandProcessor
+from teleoperation.video_process import VideoProcess
+from autonomy.obstacle_map import PolarObstacleMap
+
 class USVController:
-    def __init__(self):
-        # Configure logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
+    def __init__(self, command_processor=None, video_stream=None, rc_source=None, clock=None):
+        """
+        All arguments are optional stand-ins for the real components, used by
+        the software-in-the-loop harness (sil/):
+        rc_source: object whose read_channels() returns the RC channel list
+        (1000-2000 values) or None; neutral sticks when omitted
+        clock: module-like object with monotonic() and sleep() (default: time)
+        """
+        # Configure logging: written by a background thread, repeats of a message rate-limited
+        configure_logging(level=logging.INFO)
         self.logger = logging.getLogger('USVController')
         
         # Initialize components
-        self.command_processor = CommandProcessor()
-        self.video_stream = VideoStream()
+        self.command_processor = command_processor or CommandProcessor()
+        # Capture, encode and streaming in their own process; UDP viewers subscribe on 5556
+        self.video_stream = video_stream or VideoProcess(udp_port=5556)
+        self.rc_source = rc_source
+        self.clock = clock or time
+        self.rc_channels = [1500] * 14  # Latest RC input, neutral until one arrives
+        self.rc_received_ns = None
+        tracer.source = tracer.source or 'jetson'
         
         # Control flags
         self.running = False
         self.autonomous_mode = False
+        self.last_depth_sequence = -1
+        self.obstacle_map = None  # Created on the first depth frame
+        
+        # Fixed-rate tasks
+        self.scheduler = PeriodicScheduler(clock=self.clock.monotonic, sleep=self.clock.sleep)
+        self.scheduler.add_task('control', 100, self._control_step)
+        self.scheduler.add_task('telemetry', 5, self._report_telemetry)
+        self.control_task = self.scheduler.tasks['control']
+        
+        # Metrics snapshot for field diagnostics
+        self.metrics_exporter = MetricsExporter(path='/tmp/usv_jetson_metrics.json')
+        self.loop_overruns = registry.gauge('loop.control.overruns')
+        self.loop_jitter_p99 = registry.gauge('loop.control.jitter_p99')
+        self.loop_exec_p99 = registry.gauge('loop.control.exec_p99')
+        
+        # Binary record of every control step (USV_RECORD=0 turns it off)
+        self.flight_recorder = FlightRecorder('/tmp/usv_jetson_flight', source='jetson')
         
         # Setup signal handlers
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -37,6 +75,8 @@ class USVController:
             
         self.video_stream.start_streaming()
         self.running = True
+        self.metrics_exporter.start()
+        self.flight_recorder.start()
         
         try:
             self._main_loop()
@@ -46,44 +86,86 @@ class USVController:
             
     def _main_loop(self):
         """Main control loop"""
-        while self.running:
-            try:
-                # Check mode switch status (implement this based on your mode switch input)
-                self.autonomous_mode = self._check_mode_switch()
-                
-                if self.autonomous_mode:
-                    self._run_autonomous_mode()
-                else:
-                    self._run_teleoperation_mode()
+        self.scheduler.run()
+        
+    def _control_step(self):
+        """Control update, run at 100Hz"""
+        try:
+            if self.rc_source is not None:
+                channels = self.rc_source.read_channels()
+                if channels is not None:
+                    self.rc_channels = channels
+                    self.rc_received_ns = time.monotonic_ns() if tracer.enabled else None
                     
-                time.sleep(0.01)  # 100Hz update rate
+            # Check mode switch status
+            self.autonomous_mode = self._check_mode_switch()
+            
+            if self.autonomous_mode:
+                self._run_autonomous_mode()
+            else:
+                self._run_teleoperation_mode()
                 
-            except Exception as e:
-                self.logger.error(f"Error in control loop: {e}")
+            if self.flight_recorder.running:
+                self._record_flight()
+                
+        except Exception as e:
+            self.logger.error(f"Error in control loop: {e}")
+            
+    def _record_flight(self):
+        """Append the RC input, command sent, link stats and loop timing to the flight recorder"""
+        task = self.control_task
+        link = self.command_processor.i2c_comm
+        self.flight_recorder.append(
+            self.clock.monotonic(), tuple(self.rc_channels), self.command_processor.last_command,
+            link.sequence, FLAG_AUTONOMOUS if self.autonomous_mode else 0, 0, (0.0, 0.0, 0.0, 0.0),
+            link.commands_sent, link.commands_failed, link.avg_rtt,
+            task.overruns, task.jitter[-1] if task.jitter else 0.0,
+            task.exec_times[-1] if task.exec_times else 0.0,
+        )
+        
+    def _report_telemetry(self):
+        """Publish loop timing to the metrics registry, run at 5Hz"""
+        stats = self.scheduler.tasks['control'].get_stats()
+        self.loop_overruns.set(stats['overruns'])
+        self.loop_jitter_p99.set(stats['jitter_p99'])
+        self.loop_exec_p99.set(stats['exec_p99'])
+        
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        self.logger.debug(
+            f"Control loop: {stats['overruns']} overruns, "
+            f"jitter p50 {stats['jitter_p50'] * 1e3:.2f} ms, p99 {stats['jitter_p99'] * 1e3:.2f} ms"
+        )
                 
     def _run_teleoperation_mode(self):
         """Handle teleoperation mode"""
-        # Process RC commands (implement RC reading logic)
-        throttle = 128  # Replace with actual RC reading
-        steering = 128  # Replace with actual RC reading
-        gate = 0       # Replace with actual RC reading
-        
-        self.command_processor.process_rc_input([0, 0, throttle, 0, 0, 0, gate])
+        # Process RC commands (raw channel values, neutral without an RC source)
+        self.command_processor.process_rc_input(self.rc_channels, self.rc_received_ns)
         
     def _run_autonomous_mode(self):
         """Handle autonomous mode"""
-        # Get depth data for navigation
-        depth_data = self.video_stream.get_depth_data()
-        if depth_data is not None:
-            # Implement autonomous navigation logic here
-            # This is where you would add your ML-based navigation
-            pass
+        # Get depth data for navigation, only when a new frame has arrived
+        frame = self.video_stream.get_depth_frame(self.last_depth_sequence, timeout=0)
+        if frame is not None:
+            self.last_depth_sequence = frame.sequence
+            depth_data = frame.depth
+            
+            if self.obstacle_map is None:
+                height, width = depth_data.shape[:2]
+                self.obstacle_map = PolarObstacleMap(width, height)
+                
+            # Steer through the clearest gap in the polar obstacle histogram
+            self.obstacle_map.update(depth_data)
+            suggestion = self.obstacle_map.suggest()
+            if suggestion.direction == 'stop':
+                self.command_processor.stop()
+            else:
+                self.command_processor.move(suggestion.direction, suggestion.speed)
             
     def _check_mode_switch(self):
         """Check the mode switch status"""
-        # Implement mode switch checking logic
-        # This could be from an RC channel or other input
-        return False  # Default to manual mode
+        # Switch B (channel 6) up selects autonomous mode; manual by default
+        return self.rc_channels[5] > 1500
         
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals"""
@@ -94,7 +176,14 @@ class USVController:
         """Clean shutdown of all systems"""
         self.logger.info("Shutting down USV Control System...")
         self.running = False
+        self.scheduler.stop()
+        self.metrics_exporter.stop()
+        self.flight_recorder.stop()
         self.video_stream.stop_streaming()
+        self.command_processor.stop()
+        self.command_processor.i2c_comm.close()
+        if tracer.enabled:
+            self.logger.info(f"Wrote {tracer.dump('/tmp/usv_jetson_trace.bin')} trace records")
         # Add any other cleanup needed
         sys.exit(0)
 
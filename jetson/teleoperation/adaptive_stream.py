@@ -0,0 +1,235 @@
+import time
+from collections import namedtuple
+from threading import Lock
+from common.metrics import registry
+from .profile_encoder import DEFAULT_PROFILES
+
+# One step of the quality ladder: a ProfileEncoder profile, sent every divisor-th frame
+Rung = namedtuple('Rung', ['profile', 'divisor'])
+
+DEFAULT_LADDER = (
+    Rung('full', 1),        # 1280x720 q80, 30 fps
+    Rung('full_q60', 1),
+    Rung('half', 1),        # 640x360 q70
+    Rung('half_q50', 1),
+    Rung('half_q50', 2),    # 15 fps
+    Rung('thumbnail', 1),   # 320x180 q40
+    Rung('thumbnail', 2),
+    Rung('thumbnail', 3),   # 10 fps
+)
+
+START_PROFILE = 'half'  # Where a new client starts, unless it asked for less
+
+
+def ladder_index(profile, ladder=DEFAULT_LADDER):
+    """Index of the first (best) rung using a profile; 0 if no rung does"""
+    for index, rung in enumerate(ladder):
+        if rung.profile == profile:
+            return index
+    return 0
+
+
+class AdaptiveController:
+    """
+    Per-client congestion controller for the video stream
+    Picks a rung of the quality ladder (resolution, JPEG quality and frame
+    skip) from what the client's connection actually does. Every window it
+    looks at the frames handed to the client, the frames dropped because
+    the previous one was still being sent, how long frames took from capture
+    to leaving the socket, and the send throughput. The link rate is the
+    throughput of windows where the link was the bottleneck (congested, or
+    busy sending most of the time); an idle link says nothing about its
+    capacity.
+    - Congested (more than drop_tolerance of the frames dropped, or mean
+      latency above target_latency): step down at once, and further while a
+      rung's measured data rate is above the link rate. The window right
+      after a change still carries the old rung's frames, so it only counts
+      if latency is over twice the target.
+    - Clear (no drops, no frame waiting, latency under half the target) for
+      at least hold seconds: try one rung up, unless that rung is known to
+      need more than the link rate and the link rate is recent.
+    A step up that has to be undone within hold doubles hold (up to
+    max_hold), so a link sitting between two rungs does not flap; hold
+    halves again after a long quiet spell.
+    """
+
+    def __init__(self, ladder=DEFAULT_LADDER, cap=0, start=None, target_latency=0.15, window=1.0,
+                 drop_tolerance=0.05, hold=2.0, max_hold=30.0, link_timeout=10.0, profiles=None, name=None,
+                 clock=time.monotonic):
+        """
+        cap: best rung the client may use (see ladder_index)
+        start: starting rung (default the START_PROFILE rung, or cap if lower)
+        link_timeout: seconds after which the link rate no longer blocks a step up
+        profiles: the ProfileEncoder profiles the ladder refers to
+        name: publish metrics as video.adaptive.<name>.*
+        """
+        self.ladder = tuple(ladder)
+        self.profiles = profiles or DEFAULT_PROFILES
+        self.cap = cap
+        self.rung = max(cap, ladder_index(START_PROFILE, self.ladder) if start is None else start)
+        self.target_latency = target_latency
+        self.window = window
+        self.drop_tolerance = drop_tolerance
+        self.base_hold = hold
+        self.hold = hold
+        self.max_hold = max_hold
+        self.link_timeout = link_timeout
+        self.clock = clock
+        self.lock = Lock()
+
+        now = clock()
+        self.last_change = now
+        self.last_up = float('-inf')
+        self.link_rate = 0.0
+        self.link_measured = float('-inf')
+        self.send_rate = 0.0
+        self.latency = 0.0
+        self.rung_rates = {}  # Rung index -> bytes/s offered while on it
+        self.changes = 0
+        self._reset_window(now)
+
+        self.name = name
+        self.metrics = {}
+        if name:
+            for field in ('rung', 'quality', 'scale', 'frame_divisor', 'link_rate', 'send_rate', 'latency'):
+                self.metrics[field] = registry.gauge(f'video.adaptive.{name}.{field}')
+            self._publish()
+
+    @property
+    def profile(self):
+        return self.ladder[self.rung].profile
+
+    @property
+    def frame_divisor(self):
+        return self.ladder[self.rung].divisor
+
+    def wants(self, sequence):
+        """Check whether a captured frame is one this client's frame skip keeps"""
+        return sequence % self.ladder[self.rung].divisor == 0
+
+    def _reset_window(self, now):
+        self.window_start = now
+        self.offered_bytes = 0
+        self.frames_offered = 0
+        self.sent_bytes = 0
+        self.busy = 0.0
+        self.frames_sent = 0
+        self.latency_total = 0.0
+        self.drops = 0
+        self.behind = 0
+
+    # Measurements, from ClientWriter
+
+    def frame_offered(self, size):
+        """A frame of size bytes was handed to the client"""
+        with self.lock:
+            self.offered_bytes += size
+            self.frames_offered += 1
+            self._maybe_update()
+
+    def frame_dropped(self):
+        """A frame was dropped because the client was still sending the previous one"""
+        with self.lock:
+            self.drops += 1
+
+    def frame_sent(self, size, send_time, latency, queued):
+        """
+        A frame finished sending
+        send_time: seconds spent in the send call; latency: capture to sent;
+        queued: frames already waiting behind it
+        """
+        with self.lock:
+            self.sent_bytes += size
+            self.busy += send_time
+            self.frames_sent += 1
+            self.latency_total += latency
+            if queued:
+                self.behind += 1
+            self._maybe_update()
+
+    # Policy
+
+    def _maybe_update(self):
+        now = self.clock()
+        elapsed = now - self.window_start
+        if elapsed < self.window:
+            return
+        if not self.frames_sent and not self.drops:
+            self._reset_window(now)  # Nothing to judge, e.g. the camera paused
+            return
+
+        self.send_rate = self.sent_bytes / elapsed
+        offered = self.offered_bytes / elapsed
+        previous = self.rung_rates.get(self.rung)
+        self.rung_rates[self.rung] = offered if previous is None else previous + 0.3 * (offered - previous)
+        if self.frames_sent:
+            self.latency = self.latency_total / self.frames_sent
+
+        last = len(self.ladder) - 1
+        congested = (self.drops > self.drop_tolerance * max(self.frames_offered, 1)
+                     or self.latency > self.target_latency)
+        settling = now - self.last_change < 1.5 * self.window
+        if congested:
+            self.link_rate = self.send_rate
+            self.link_measured = now
+        elif self.busy > 0.5 * elapsed:
+            self.link_rate = max(self.send_rate, self.sent_bytes / self.busy)
+            self.link_measured = now
+
+        if congested:
+            if self.rung < last and (not settling or self.latency > 2 * self.target_latency):
+                rung = self.rung + 1
+                while rung < last and self.rung_rates.get(rung, 0.0) > 0.9 * self.link_rate:
+                    rung += 1
+                if now - self.last_up < self.hold:
+                    self.hold = min(2 * self.hold, self.max_hold)  # The last probe failed
+                    self.last_up = float('-inf')
+                self._set_rung(rung, now)
+        elif (not self.behind and not self.drops and self.latency < 0.5 * self.target_latency
+              and self.rung > self.cap and now - self.last_change >= self.hold):
+            expected = self.rung_rates.get(self.rung - 1)
+            stale = now - self.link_measured > self.link_timeout  # The link may have recovered since
+            if expected is None or stale or expected < 0.8 * self.link_rate:
+                self._set_rung(self.rung - 1, now)
+                self.last_up = now
+        elif now - self.last_change >= 4 * self.hold:
+            self.hold = max(self.base_hold, self.hold / 2)
+
+        self._reset_window(now)
+        self._publish()
+
+    def _set_rung(self, rung, now):
+        self.rung = rung
+        self.last_change = now
+        self.changes += 1
+
+    def _publish(self):
+        if not self.metrics:
+            return
+        profile = self.profiles[self.profile]
+        self.metrics['rung'].set(self.rung)
+        self.metrics['quality'].set(profile.quality)
+        self.metrics['scale'].set(profile.scale)
+        self.metrics['frame_divisor'].set(self.frame_divisor)
+        self.metrics['link_rate'].set(self.link_rate)
+        self.metrics['send_rate'].set(self.send_rate)
+        self.metrics['latency'].set(self.latency)
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'rung': self.rung,
+                'profile': self.profile,
+                'frame_divisor': self.frame_divisor,
+                'link_rate': self.link_rate,
+                'send_rate': self.send_rate,
+                'latency': self.latency,
+                'hold': self.hold,
+                'changes': self.changes,
+            }
+
+    def close(self):
+        """Drop this client's metrics"""
+        for metric in self.metrics.values():
+            registry.remove(metric.name)
+        self.metrics = {}
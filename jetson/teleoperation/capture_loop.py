@@ -0,0 +1,92 @@
+import logging
+import time
+from threading import Thread
+import pyzed.sl as sl
+from .frame_ring import FrameRing
+
+
+def _camera_resolution(zed):
+    """Get the open camera's resolution (ZED SDK 3.x and 4.x layouts)"""
+    info = zed.get_camera_information()
+    config = getattr(info, 'camera_configuration', None)
+    if config is not None:
+        return config.resolution
+    return info.camera_resolution
+
+
+class CaptureLoop:
+    """
+    Single ZED grab loop shared by the video streamer and autonomy
+    One thread grabs once per camera frame and retrieves the left image and
+    the depth map straight into a slot of a preallocated FrameRing, so image
+    and depth always belong to the same grab. Readers never call grab()
+    themselves and get read-only views of the ring memory.
+    """
+
+    def __init__(self, zed, buffers=4):
+        self.zed = zed
+        self.logger = logging.getLogger('CaptureLoop')
+        self.running = False
+        self.thread = None
+
+        # One image/depth sl.Mat pair per ring slot, allocated once. The ring
+        # wraps the Mats' own memory so retrieve_* writes in place.
+        self.resolution = _camera_resolution(zed)
+        width, height = self.resolution.width, self.resolution.height
+        self._mats = [
+            (sl.Mat(width, height, sl.MAT_TYPE.U8_C4), sl.Mat(width, height, sl.MAT_TYPE.F32_C1))
+            for _ in range(buffers)
+        ]
+        self.ring = FrameRing(
+            [(image.get_data(), depth.get_data()) for image, depth in self._mats],
+            ('image', 'depth')
+        )
+
+    def start(self):
+        """Start the grab thread"""
+        self.running = True
+        self.thread = Thread(target=self._grab_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the grab thread and wake any waiting readers"""
+        self.running = False
+        self.ring.close()
+        # Let an in-flight grab finish before the camera is closed
+        if self.thread:
+            self.thread.join(timeout=1.0)
+
+    def _grab_loop(self):
+        """Grab frames and publish image and depth together"""
+        runtime_parameters = sl.RuntimeParameters()
+
+        while self.running:
+            try:
+                if self.zed.grab(runtime_parameters) != sl.ERROR_CODE.SUCCESS:
+                    continue
+
+                index, _ = self.ring.acquire()
+                image, depth = self._mats[index]
+                self.zed.retrieve_image(image, sl.VIEW.LEFT, sl.MEM.CPU, self.resolution)
+                self.zed.retrieve_measure(depth, sl.MEASURE.DEPTH, sl.MEM.CPU, self.resolution)
+
+                self.ring.commit(
+                    index,
+                    self.zed.get_timestamp(sl.TIME_REFERENCE.IMAGE).get_nanoseconds(),
+                    time.monotonic()
+                )
+
+            except Exception as e:
+                self.logger.error(f"Capture error: {e}")
+                time.sleep(0.1)
+
+    def latest(self):
+        """Get the most recent frame without waiting (None before the first grab)"""
+        return self.ring.latest()
+
+    def wait_for_frame(self, after_sequence=-1, timeout=None):
+        """
+        Wait for a frame newer than after_sequence
+        Returns the newest frame, or None on timeout/shutdown.
+        """
+        return self.ring.wait_for_frame(after_sequence, timeout)
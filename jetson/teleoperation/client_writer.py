@@ -0,0 +1,167 @@
+import logging
+import socket
+import time
+from collections import deque
+from threading import Condition, Thread
+from .frame_protocol import MODE_DELTA, send_frame
+
+
+class ClientWriter:
+    """
+    Send frames to one video client from its own thread
+    Frames are handed over through a small bounded queue; when the client
+    falls behind the oldest queued frame is dropped so only the newest frames
+    are sent and the capture thread never blocks on the network.
+    In delta mode a frame cannot be dropped without breaking the viewer's
+    picture, so a full queue drops the new frame instead, skips everything
+    up to the next keyframe and calls on_resync(profile) to ask for one.
+    With an AdaptiveController the controller picks the profile and frame
+    skip from what the sends measure.
+    """
+
+    def __init__(self, sock, addr, profile=None, queue_size=1, send_timeout=2.0, mode=None, on_resync=None,
+                 controller=None, send_buffer=None):
+        """
+        send_buffer: SO_SNDBUF in bytes; a small kernel buffer makes a slow
+        link show up as slow sends instead of hiding frames in the kernel
+        """
+        self.sock = sock
+        self.addr = addr
+        self._profile = profile
+        self.mode = mode
+        self.on_resync = on_resync
+        self.awaiting_keyframe = mode == MODE_DELTA
+        self.controller = controller
+        self.logger = logging.getLogger('ClientWriter')
+        self._configure_socket(send_timeout, send_buffer)
+
+        self._frames = deque(maxlen=queue_size)
+        self._condition = Condition()
+        self.running = True
+
+        # Statistics
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.resyncs = 0
+        self.bytes_sent = 0
+        self.last_latency = 0.0
+        self.avg_latency = 0.0
+        self.max_latency = 0.0
+
+        Thread(target=self._send_loop, daemon=True).start()
+
+    def _configure_socket(self, send_timeout, send_buffer):
+        if self.sock.family in (socket.AF_INET, socket.AF_INET6):
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if send_buffer:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, send_buffer)
+        self.sock.settimeout(send_timeout)  # A stalled client is dropped
+
+    def _transmit(self, header, payload):
+        """Write one frame to the client"""
+        send_frame(self.sock, header, payload)
+
+    @property
+    def profile(self):
+        """Profile whose frames this client gets (chosen by the controller, if any)"""
+        return self.controller.profile if self.controller else self._profile
+
+    def wants(self, sequence):
+        """Check whether the client takes the captured frame with this sequence"""
+        return self.controller.wants(sequence) if self.controller else True
+
+    def submit(self, header, payload, capture_time, keyframe=True):
+        """
+        Queue a frame for sending without blocking
+        capture_time: time.monotonic() when the frame was captured
+        keyframe: False for delta frames that need the previous frames
+        """
+        if self.controller:
+            self.controller.frame_offered(len(header) + len(payload))
+        resync = False
+        with self._condition:
+            if keyframe:
+                self.awaiting_keyframe = False
+            elif self.awaiting_keyframe:
+                self.frames_dropped += 1
+                return
+
+            if len(self._frames) == self._frames.maxlen:
+                self.frames_dropped += 1
+                if self.controller:
+                    self.controller.frame_dropped()
+                if not keyframe:
+                    resync = True  # Keep the queued delta, drop this one and wait for a keyframe
+            if not resync:
+                self._frames.append((header, payload, capture_time))
+                self._condition.notify()
+
+        if resync:
+            self.resync()
+
+    def resync(self):
+        """Skip delta frames until the next keyframe and ask for one"""
+        with self._condition:
+            self.awaiting_keyframe = True
+            self.resyncs += 1
+        if self.on_resync:
+            self.on_resync(self.profile)
+
+    def _send_loop(self):
+        """Send queued frames until the client disconnects"""
+        while self.running:
+            with self._condition:
+                while self.running and not self._frames:
+                    self._condition.wait()
+                if not self.running:
+                    break
+                header, payload, capture_time = self._frames.popleft()
+
+            try:
+                start = time.monotonic()
+                self._transmit(header, payload)
+            except Exception as e:
+                self.logger.info(f"Client {self.addr} disconnected: {e}")
+                self.close()
+                break
+
+            now = time.monotonic()
+            latency = now - capture_time
+            size = len(header) + len(payload)
+            self.frames_sent += 1
+            self.bytes_sent += size
+            if self.controller:
+                self.controller.frame_sent(size, now - start, latency, len(self._frames))
+            alpha = 1.0 if self.frames_sent == 1 else 0.1  # Moving average
+            self.last_latency = latency
+            self.avg_latency += alpha * (latency - self.avg_latency)
+            self.max_latency = max(self.max_latency, latency)
+
+    def get_stats(self):
+        """Get per-client delivery statistics"""
+        return {
+            'address': self.addr,
+            'profile': self.profile,
+            'mode': self.mode,
+            'frames_sent': self.frames_sent,
+            'frames_dropped': self.frames_dropped,
+            'resyncs': self.resyncs,
+            'bytes_sent': self.bytes_sent,
+            'last_latency': self.last_latency,
+            'avg_latency': self.avg_latency,
+            'max_latency': self.max_latency,
+            'adaptive': self.controller.get_stats() if self.controller else None,
+        }
+
+    def close(self):
+        """Stop the sender thread and close the socket"""
+        with self._condition:
+            self.running = False
+            self._frames.clear()
+            self._condition.notify()
+        if self.controller:
+            self.controller.close()
+        try:
+            self.sock.close()
+        except:
+            pass
@@ -1,11 +1,16 @@
 import numpy as np
 import logging
-from ..utils.communication import I2CCommunicator
+import time
+from common.metrics import registry
+from common.trace import tracer
+from utils.communication import I2CCommunicator
 
 class CommandProcessor:
-    def __init__(self):
-        self.i2c_comm = I2CCommunicator()
+    def __init__(self, i2c_comm=None):
+        """i2c_comm: link to the Pi; an I2CCommunicator on the I2C bus when omitted"""
+        self.i2c_comm = i2c_comm or I2CCommunicator()
         self.logger = logging.getLogger('CommandProcessor')
+        self.process_time = registry.histogram('command_processor.process_rc_input')
         
         # Control parameters
         self.max_speed = 255
@@ -15,12 +20,15 @@ class CommandProcessor:
         # State variables
         self.last_throttle = 0
         self.last_steering = 0
+        self.last_command = (128, 128, 0)  # Last (throttle, steering, gate) sent, for the flight recorder
         
-    def process_rc_input(self, channels):
+    def process_rc_input(self, channels, received_ns=None):
         """
         Process RC receiver channels and convert to motor commands
         channels: List of channel values (typically 1000-2000)
+        received_ns: time.monotonic_ns() when the channels were read, for tracing
         """
+        start = time.perf_counter()
         try:
             # Extract and normalize joystick values (-1 to 1)
             throttle = self._normalize_rc(channels[2])  # Channel 3
@@ -44,7 +52,8 @@ class CommandProcessor:
             self.last_steering = steering
             
             # Send commands to Raspberry Pi
-            self.i2c_comm.send_command(throttle_cmd, steering_cmd, gate_command)
+            trace = (received_ns, time.monotonic_ns()) if tracer.enabled else None
+            self._send(throttle_cmd, steering_cmd, gate_command, trace)
             
             return True
             
@@ -52,6 +61,14 @@ class CommandProcessor:
             self.logger.error(f"Error processing RC input: {e}")
             return False
             
+        finally:
+            self.process_time.observe(time.perf_counter() - start)
+            
+    def _send(self, throttle, steering, gate, trace=None):
+        """Queue a command on the link and remember it"""
+        self.last_command = (throttle, steering, gate)
+        self.i2c_comm.send_command(throttle, steering, gate, trace)
+        
     def _normalize_rc(self, value):
         """Convert RC value (1000-2000) to normalized (-1 to 1)"""
         return (value - 1500) / 500
@@ -97,12 +114,12 @@ class CommandProcessor:
             throttle, steering = commands[direction]
             throttle_cmd = self._to_motor_command(throttle)
             steering_cmd = self._to_motor_command(steering)
-            self.i2c_comm.send_command(throttle_cmd, steering_cmd, 0)
+            self._send(throttle_cmd, steering_cmd, 0)
             return True
         return False
         
     def stop(self):
         """Emergency stop command"""
-        self.i2c_comm.send_command(128, 128, 0)  # Neutral position
+        self._send(128, 128, 0)  # Neutral position
         self.last_throttle = 0
         self.last_steering = 0 
\ No newline at end of file
@@ -0,0 +1,163 @@
+import socket
+import struct
+from collections import namedtuple
+
+# Wire format (all fields little-endian):
+#   magic        4s  b'USVF'
+#   version      B   protocol version
+#   codec        B   payload codec (see CODEC_*)
+#   flags        H   codec specific flags
+#   sequence     I   frame sequence number (wraps at 2**32)
+#   timestamp    Q   capture timestamp in nanoseconds
+#   width        H   image width in pixels
+#   height       H   image height in pixels
+#   length       I   payload length in bytes
+# followed by `length` bytes of encoded payload.
+#
+# After connecting, a client may send one ASCII line naming the stream
+# profile it wants (e.g. b"half\n"), optionally followed by a stream mode
+# (b"half delta\n"). Clients that send nothing get the default profile as
+# plain JPEG frames. In adaptive mode the profile is the best one the
+# server may pick for the client.
+FRAME_MAGIC = b'USVF'
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct('<4sBBHIQHHI')
+
+CODEC_JPEG = 1
+CODEC_JPEG_TILES = 2  # Changed tiles only, see tile_delta; sent in delta mode between JPEG keyframes
+
+MODE_DELTA = 'delta'
+MODE_ADAPTIVE = 'adaptive'  # Plain JPEG; quality, resolution and frame rate follow the link
+STREAM_MODES = (MODE_DELTA, MODE_ADAPTIVE)
+
+FrameHeader = namedtuple(
+    'FrameHeader',
+    ['version', 'codec', 'flags', 'sequence', 'timestamp', 'width', 'height', 'length']
+)
+
+
+class FrameProtocolError(Exception):
+    """Raised when a received frame header is malformed"""
+
+
+def pack_header(sequence, timestamp, width, height, length, codec=CODEC_JPEG, flags=0):
+    """Build the fixed-size header for one frame"""
+    return FRAME_HEADER.pack(
+        FRAME_MAGIC, FRAME_VERSION, codec, flags,
+        sequence & 0xFFFFFFFF, timestamp, width, height, length
+    )
+
+
+def unpack_header(data):
+    """Parse a frame header from a bytes-like object"""
+    magic, version, codec, flags, sequence, timestamp, width, height, length = \
+        FRAME_HEADER.unpack_from(data)
+    if magic != FRAME_MAGIC:
+        raise FrameProtocolError(f"Bad frame magic: {magic!r}")
+    if version != FRAME_VERSION:
+        raise FrameProtocolError(f"Unsupported frame version: {version}")
+    return FrameHeader(version, codec, flags, sequence, timestamp, width, height, length)
+
+
+def send_frame(sock, header, payload):
+    """
+    Send header and payload with scatter-gather I/O
+    The payload (e.g. the array returned by cv2.imencode) is sent straight
+    from its own buffer without being copied into a single message.
+    """
+    buffers = [memoryview(header), memoryview(payload).cast('B')]
+    if not hasattr(sock, 'sendmsg'):
+        for buffer in buffers:
+            sock.sendall(buffer)
+        return
+
+    while buffers:
+        sent = sock.sendmsg(buffers)
+        # Drop whatever was fully written and trim a partially written buffer
+        while sent:
+            if sent >= len(buffers[0]):
+                sent -= len(buffers[0])
+                buffers.pop(0)
+            else:
+                buffers[0] = buffers[0][sent:]
+                sent = 0
+
+
+class FrameReader:
+    """
+    Receive frames from a video stream socket
+    Reuses a single growable buffer so steady-state reads do not allocate.
+    """
+
+    def __init__(self, sock, initial_size=256 * 1024):
+        self.sock = sock
+        self._header = bytearray(FRAME_HEADER.size)
+        self._buffer = bytearray(initial_size)
+
+    def _recv_exactly(self, view):
+        while len(view):
+            received = self.sock.recv_into(view)
+            if received == 0:
+                raise ConnectionError("Video stream closed")
+            view = view[received:]
+
+    def read_frame(self):
+        """
+        Read the next frame
+        Returns (FrameHeader, memoryview of payload). The payload view is only
+        valid until the next call.
+        """
+        self._recv_exactly(memoryview(self._header))
+        header = unpack_header(self._header)
+
+        if header.length > len(self._buffer):
+            self._buffer = bytearray(header.length)
+        payload = memoryview(self._buffer)[:header.length]
+        self._recv_exactly(payload)
+        return header, payload
+
+
+def connect(host, port, profile=None, timeout=5.0, mode=None):
+    """
+    Open a TCP connection to a video stream server
+    mode: None for plain JPEG frames, MODE_DELTA for the inter-frame stream,
+    MODE_ADAPTIVE for a stream that adapts to the link
+    """
+    sock = socket.create_connection((host, port), timeout=timeout)
+    request = ' '.join(word for word in (profile, mode) if word)
+    if request:
+        sock.sendall(request.encode('ascii') + b'\n')
+    sock.settimeout(None)
+    return sock
+
+
+def read_profile_request(sock, timeout=0.5):
+    """
+    Read the optional profile line sent by a newly connected client
+    Returns the request line (profile name and optional mode), or None if
+    the client sent nothing; see parse_stream_request().
+    """
+    sock.settimeout(timeout)
+    request = b''
+    try:
+        while b'\n' not in request and len(request) < 64:
+            data = sock.recv(64 - len(request))
+            if not data:
+                break
+            request += data
+    except socket.timeout:
+        pass
+    finally:
+        sock.settimeout(None)
+    return request.split(b'\n', 1)[0].decode('ascii', 'replace').strip() or None
+
+
+def parse_stream_request(request):
+    """Split a client request line into (profile or None, mode or None)"""
+    profile = mode = None
+    for word in (request or '').split():
+        if word in STREAM_MODES:
+            mode = word
+        elif profile is None:
+            profile = word
+    return profile, mode
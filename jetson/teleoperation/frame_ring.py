@@ -0,0 +1,91 @@
+from collections import namedtuple
+from threading import Condition
+
+
+class FrameRing:
+    """
+    Fixed-size ring of preallocated frame buffers with sequence numbers
+    A single writer fills slots in turn and commits them; readers get the
+    newest committed frame as read-only NumPy views of the slot memory, so
+    nothing is allocated or copied per frame. A view stays valid until the
+    writer laps the ring; readers that hold on to frames longer can check
+    is_current() before trusting the data.
+    """
+
+    def __init__(self, slots, fields):
+        """
+        slots: list of per-slot buffer tuples (one array per field)
+        fields: names of the buffers in each slot, e.g. ('image', 'depth')
+        """
+        self.fields = tuple(fields)
+        self.frame_type = namedtuple('RingFrame', ('sequence', 'timestamp', 'capture_time') + self.fields)
+
+        self._buffers = [tuple(buffers) for buffers in slots]
+        self._views = [tuple(self._read_only(buffer) for buffer in buffers) for buffers in self._buffers]
+        self._sequences = [-1] * len(self._buffers)
+
+        self._latest = None
+        self.closed = False
+        self._next_sequence = 0
+        self._write_index = 0
+        self._condition = Condition()
+
+    @staticmethod
+    def _read_only(buffer):
+        view = buffer.view()
+        view.flags.writeable = False
+        return view
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def acquire(self):
+        """
+        Get the next slot to overwrite
+        Returns (index, writable buffers). The slot is invalidated until commit().
+        """
+        index = self._write_index
+        self._sequences[index] = -1
+        return index, self._buffers[index]
+
+    def commit(self, index, timestamp, capture_time):
+        """Publish a filled slot as the newest frame"""
+        with self._condition:
+            sequence = self._next_sequence
+            self._next_sequence += 1
+            self._sequences[index] = sequence
+            self._latest = self.frame_type(sequence, timestamp, capture_time, *self._views[index])
+            self._write_index = (index + 1) % len(self._buffers)
+            self._condition.notify_all()
+        return sequence
+
+    def latest(self):
+        """Get the newest frame without waiting (None before the first commit)"""
+        return self._latest
+
+    def wait_for_frame(self, after_sequence=-1, timeout=None):
+        """
+        Wait for a frame newer than after_sequence
+        Returns the newest frame, or None on timeout or close.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.closed or
+                (self._latest is not None and self._latest.sequence > after_sequence),
+                timeout
+            )
+            frame = self._latest
+        if frame is None or frame.sequence <= after_sequence:
+            return None
+        return frame
+
+    def is_current(self, frame):
+        """Check that a frame's slot has not been overwritten since it was read"""
+        index = frame.sequence % len(self._buffers)
+        return self._sequences[index] == frame.sequence
+
+    def close(self):
+        """Wake all waiting readers and stop them from waiting again"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
@@ -0,0 +1,177 @@
+import logging
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+
+# Tried in this order when the backend is 'auto'; strips only pays off with several cores
+AUTO_ORDER = ('turbojpeg', 'strips', 'opencv')
+
+MCU_HEIGHT = 16  # 4:2:0 chroma subsampling, the default for both libraries
+
+
+class OpenCVEncoder:
+    """
+    cv2.imencode, single-threaded
+    Takes BGRA directly: OpenCV drops the alpha channel row by row while
+    encoding, so no converted copy of the frame is made.
+    """
+
+    name = 'opencv'
+
+    def encode(self, image, quality):
+        """JPEG-encode a BGR or BGRA frame; returns a uint8 array"""
+        ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise RuntimeError("cv2.imencode failed")
+        return buffer
+
+
+class TurboJPEGEncoder:
+    """
+    libjpeg-turbo through PyTurboJPEG, when it is installed
+    The library reads BGRA pixels natively and the ctypes call releases the
+    GIL, so encodes in the worker pool run in parallel with the rest of the
+    process.
+    """
+
+    name = 'turbojpeg'
+
+    def __init__(self):
+        import turbojpeg  # Optional: pip install PyTurboJPEG (needs libturbojpeg)
+        self.turbojpeg = turbojpeg
+        self.jpeg = turbojpeg.TurboJPEG()
+        self.pixel_formats = {3: turbojpeg.TJPF_BGR, 4: turbojpeg.TJPF_BGRA}
+
+    def encode(self, image, quality):
+        """JPEG-encode a BGR or BGRA frame; returns a uint8 array"""
+        data = self.jpeg.encode(
+            image, quality=quality, pixel_format=self.pixel_formats[image.shape[2]],
+            jpeg_subsample=self.turbojpeg.TJSAMP_420
+        )
+        return np.frombuffer(data, dtype=np.uint8)
+
+
+def _split_jpeg(data):
+    """Get (start of the SOS segment, start of the entropy-coded data) of a baseline JPEG"""
+    offset = 2  # SOI
+    while offset + 4 <= len(data):
+        marker = data[offset + 1]
+        length = struct.unpack_from('>H', data, offset + 2)[0]
+        if marker == 0xDA:  # SOS
+            return offset, offset + 2 + length
+        offset += 2 + length
+    raise ValueError("no SOS marker in JPEG")
+
+
+def _set_jpeg_height(header, height):
+    """Patch the frame height in the SOF segment of a JPEG header (bytearray)"""
+    offset = 2
+    while offset + 4 <= len(header):
+        marker = header[offset + 1]
+        length = struct.unpack_from('>H', header, offset + 2)[0]
+        if marker in (0xC0, 0xC1):  # Baseline / extended sequential SOF
+            struct.pack_into('>H', header, offset + 5, height)
+            return
+        offset += 2 + length
+    raise ValueError("no SOF marker in JPEG")
+
+
+class StripEncoder:
+    """
+    Strip-parallel JPEG encode on several cores
+    The frame is cut into horizontal strips of whole MCU rows, each strip is
+    encoded on its own thread, and the strips are stitched into one baseline
+    JPEG: the first strip's headers (with the full height), a restart
+    interval of one strip, and each strip's entropy-coded data separated by
+    RSTn markers. A restart resets the DC predictors exactly as the start of
+    a separate image does, so the result decodes to the same pixels as a
+    single-threaded encode of the whole frame at the same quality.
+    """
+
+    name = 'strips'
+
+    def __init__(self, strips=None, base=None):
+        """
+        strips: strips per frame (default: one per CPU, at most 4)
+        base: encoder used for each strip (default OpenCVEncoder); it must
+        write standard Huffman tables and no restart markers of its own
+        """
+        self.strips = strips or max(2, min(4, os.cpu_count() or 1))
+        self.base = base or OpenCVEncoder()
+        self.executor = ThreadPoolExecutor(max_workers=self.strips, thread_name_prefix='jpeg-strip')
+
+    def encode(self, image, quality):
+        """JPEG-encode a BGR or BGRA frame; returns a uint8 array"""
+        height, width = image.shape[:2]
+        mcu_rows = -(-height // MCU_HEIGHT)
+        rows_per_strip = -(-mcu_rows // self.strips)
+        strip_height = rows_per_strip * MCU_HEIGHT
+        restart_interval = rows_per_strip * -(-width // MCU_HEIGHT)
+        if strip_height >= height or restart_interval > 0xFFFF:
+            return self.base.encode(image, quality)
+
+        futures = [self.executor.submit(self.base.encode, image[top:top + strip_height], quality)
+                   for top in range(0, height, strip_height)]
+        parts = [future.result().tobytes() for future in futures]
+
+        sos, data = _split_jpeg(parts[0])
+        output = bytearray(parts[0][:sos])
+        _set_jpeg_height(output, height)
+        output += struct.pack('>BBHH', 0xFF, 0xDD, 4, restart_interval)  # DRI
+        output += parts[0][sos:data]
+        last = len(parts) - 1
+        for index, part in enumerate(parts):
+            output += part[_split_jpeg(part)[1]:-2]  # Entropy-coded data, without EOI
+            if index < last:
+                output += bytes((0xFF, 0xD0 + index % 8))  # RSTn
+        output += b'\xff\xd9'  # EOI
+        return np.frombuffer(output, dtype=np.uint8)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+ENCODERS = {
+    'opencv': OpenCVEncoder,
+    'turbojpeg': TurboJPEGEncoder,
+    'strips': StripEncoder,
+}
+
+
+def _self_test(encoder):
+    """Encode and decode a small BGRA frame to make sure the backend really works"""
+    image = np.zeros((48, 64, 4), dtype=np.uint8)
+    image[:, :, 1] = 200
+    decoded = cv2.imdecode(encoder.encode(image, 80), cv2.IMREAD_COLOR)
+    if decoded is None or decoded.shape != (48, 64, 3):
+        raise RuntimeError("test frame did not decode")
+
+
+def create_encoder(name=None):
+    """
+    Create a JPEG encoder backend, falling back to the next one on failure
+    name: 'auto', 'turbojpeg', 'strips' or 'opencv'; defaults to the
+    USV_JPEG_ENCODER environment variable, then 'auto'. 'auto' tries
+    turbojpeg, then strips (multi-core only), then opencv; a named backend
+    that cannot be used falls back to opencv.
+    """
+    logger = logging.getLogger('JpegEncoder')
+    name = name or os.environ.get('USV_JPEG_ENCODER', 'auto')
+    candidates = AUTO_ORDER if name == 'auto' else (name, 'opencv')
+
+    for candidate in dict.fromkeys(candidates):
+        try:
+            if candidate not in ENCODERS:
+                raise ValueError("unknown backend")
+            if candidate == 'strips' and name == 'auto' and (os.cpu_count() or 1) < 2:
+                raise RuntimeError("only one CPU")
+            encoder = ENCODERS[candidate]()
+            _self_test(encoder)
+            logger.info(f"JPEG encoder: {encoder.name}")
+            return encoder
+        except Exception as e:
+            log = logger.info if name == 'auto' else logger.warning
+            log(f"JPEG encoder '{candidate}' unavailable: {e}")
+    raise RuntimeError("no JPEG encoder available")
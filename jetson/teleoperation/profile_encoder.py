@@ -0,0 +1,149 @@
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import cv2
+from common.metrics import registry
+from .frame_protocol import CODEC_JPEG, MODE_DELTA
+from .jpeg_encoders import create_encoder
+from .tile_delta import DeltaEncoder
+
+EncodeProfile = namedtuple('EncodeProfile', ['name', 'scale', 'quality'])
+
+DEFAULT_PROFILE = 'full'
+DEFAULT_PROFILES = {
+    'full': EncodeProfile('full', 1.0, 80),             # Local operator
+    'half': EncodeProfile('half', 0.5, 70),             # Normal radio link
+    'thumbnail': EncodeProfile('thumbnail', 0.25, 40),  # Long-range telemetry link
+    # In-between rungs for adaptive clients (see adaptive_stream)
+    'full_q60': EncodeProfile('full_q60', 1.0, 60),
+    'half_q50': EncodeProfile('half_q50', 0.5, 50),
+}
+
+
+class ProfileEncoder:
+    """
+    Encode captured frames once per profile in a worker pool
+    Each subscribed profile is encoded at most once per frame no matter how
+    many clients share it. If a profile's previous encodes are still running
+    when a new frame arrives, that frame is skipped for the profile so the
+    grab loop never waits on the encoder.
+    Frames are read in place (BGRA straight from the capture ring) and the
+    JPEG backend is pluggable, see jpeg_encoders. A profile can also be
+    streamed in delta mode (MODE_DELTA), a separate stream named e.g.
+    'half.delta' whose frames go through the profile's DeltaEncoder one at a
+    time.
+    """
+
+    def __init__(self, profiles=None, workers=2, encoder=None):
+        """
+        encoder: JPEG backend name for create_encoder() or an encoder object;
+        default USV_JPEG_ENCODER, then the fastest available
+        """
+        self.logger = logging.getLogger('ProfileEncoder')
+        self.profiles = dict(profiles or DEFAULT_PROFILES)
+        self.jpeg = create_encoder(encoder) if encoder is None or isinstance(encoder, str) else encoder
+        self.max_pending = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='encode')
+
+        self.lock = Lock()
+        self.pending = {}
+        self.stats = {}
+        self.encode_time = {}
+        self.frame_bytes = {}
+        self.delta_encoders = {}
+        for name in self.profiles:
+            self._add_stream(name)
+
+    @staticmethod
+    def stream_name(name, mode=None):
+        """Name of the stream for a profile in a mode ('half', 'half.delta')"""
+        return f"{name}.{mode}" if mode else name
+
+    def _add_stream(self, stream):
+        """Set up counters and metrics for a stream (lock held, or during __init__)"""
+        self.pending[stream] = 0
+        self.stats[stream] = {
+            'frames_encoded': 0,
+            'frames_skipped': 0,
+            'last_encode_time': 0.0,
+            'avg_encode_time': 0.0,
+            'avg_bytes_per_frame': 0.0,
+        }
+        self.encode_time[stream] = registry.histogram(f'video.encode.{stream}')
+        self.frame_bytes[stream] = registry.gauge(f'video.frame_bytes.{stream}')
+
+    def submit(self, name, frame, callback, mode=None):
+        """
+        Queue an encode of frame for the named profile
+        callback(buffer, width, height, codec, keyframe) is called from the
+        worker thread. Returns False if the frame was skipped because the
+        stream is busy.
+        """
+        stream = self.stream_name(name, mode)
+        with self.lock:
+            if stream not in self.stats:
+                self._add_stream(stream)
+            if mode == MODE_DELTA and name not in self.delta_encoders:
+                self.delta_encoders[name] = DeltaEncoder(self.jpeg)
+            # Delta frames depend on the previous one, so a delta stream is encoded serially
+            limit = 1 if mode == MODE_DELTA else self.max_pending
+            if self.pending[stream] >= limit:
+                self.stats[stream]['frames_skipped'] += 1
+                return False
+            self.pending[stream] += 1
+
+        self.executor.submit(self._encode, self.profiles[name], stream, mode, frame, callback)
+        return True
+
+    def request_keyframe(self, name):
+        """Ask the profile's delta stream for a keyframe, e.g. for a new or resyncing viewer"""
+        with self.lock:
+            delta_encoder = self.delta_encoders.get(name)
+        if delta_encoder:
+            delta_encoder.request_keyframe()
+
+    def _encode(self, profile, stream, mode, frame, callback):
+        """Resize and encode one frame for one stream"""
+        try:
+            start = time.perf_counter()
+            if profile.scale != 1.0:
+                frame = cv2.resize(frame, None, fx=profile.scale, fy=profile.scale,
+                                   interpolation=cv2.INTER_AREA)
+            if mode == MODE_DELTA:
+                codec, buffer, keyframe = self.delta_encoders[profile.name].encode(frame, profile.quality)
+            else:
+                codec, buffer, keyframe = CODEC_JPEG, self.jpeg.encode(frame, profile.quality), True
+            elapsed = time.perf_counter() - start
+            self.encode_time[stream].observe(elapsed)
+            self.frame_bytes[stream].set(buffer.nbytes)
+
+            with self.lock:
+                stats = self.stats[stream]
+                stats['frames_encoded'] += 1
+                alpha = 1.0 if stats['frames_encoded'] == 1 else 0.1  # Moving average
+                stats['last_encode_time'] = elapsed
+                stats['avg_encode_time'] += alpha * (elapsed - stats['avg_encode_time'])
+                stats['avg_bytes_per_frame'] += alpha * (buffer.nbytes - stats['avg_bytes_per_frame'])
+
+            callback(buffer, frame.shape[1], frame.shape[0], codec, keyframe)
+        except Exception as e:
+            self.logger.error(f"Encoding error ({stream}): {e}")
+        finally:
+            with self.lock:
+                self.pending[stream] -= 1
+
+    def get_stats(self):
+        """Get per-stream encode time and bytes/frame metrics"""
+        with self.lock:
+            stats = {name: dict(stats) for name, stats in self.stats.items()}
+            for name, delta_encoder in self.delta_encoders.items():
+                stats[self.stream_name(name, MODE_DELTA)].update(delta_encoder.get_stats())
+            return stats
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        self.executor.shutdown(wait=False)
+        if hasattr(self.jpeg, 'close'):
+            self.jpeg.close()
@@ -0,0 +1,165 @@
+import os
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+import numpy as np
+
+# Block layout: header, slot table, then every slot's image and depth
+SHARED_HEADER = np.dtype([
+    ('width', '<i8'), ('height', '<i8'), ('slots', '<i8'),
+    ('latest', '<i8'),          # Sequence of the newest committed frame, -1 before the first
+    ('status', '<i8'),          # STATUS_* set by the writer
+    ('writer_pid', '<i8'),
+    ('last_commit', '<f8'),     # time.monotonic() of the newest commit (system-wide clock)
+])
+SLOT_DTYPE = np.dtype([('sequence', '<i8'), ('timestamp', '<u8'), ('capture_time', '<f8')])
+ALIGN = 64
+
+STATUS_STARTING = 0
+STATUS_READY = 1
+STATUS_FAILED = 2
+
+SharedFrame = namedtuple('SharedFrame', ('sequence', 'timestamp', 'capture_time', 'image', 'depth'))
+
+
+def _aligned(size):
+    return (size + ALIGN - 1) // ALIGN * ALIGN
+
+
+class SharedFrameRing:
+    """
+    FrameRing over multiprocessing.shared_memory, for handing frames between processes
+    One process (the video process) fills slots in turn and commits them;
+    any number of readers in other processes get the newest frame as
+    read-only NumPy views straight onto the shared block, so nothing is
+    copied on the consumer side. As with FrameRing, a view stays valid until
+    the writer laps the ring; is_current() tells readers when it has.
+    Slots are used in order, so a frame's slot is its sequence modulo the
+    slot count and publishing a frame is one store of its sequence number.
+    """
+
+    def __init__(self, memory, owner):
+        self.memory = memory
+        self.owner = owner
+        self.name = memory.name
+        buffer = memory.buf
+
+        self.header = np.ndarray((), SHARED_HEADER, buffer, 0)
+        self.width, self.height, self.slot_count = (int(self.header[field]) for field in ('width', 'height', 'slots'))
+        offset = _aligned(SHARED_HEADER.itemsize)
+        self.table = np.ndarray((self.slot_count,), SLOT_DTYPE, buffer, offset)
+        offset += _aligned(SLOT_DTYPE.itemsize * self.slot_count)
+
+        image_shape, depth_shape = (self.height, self.width, 4), (self.height, self.width)
+        self._buffers = []
+        for _ in range(self.slot_count):
+            image = np.ndarray(image_shape, np.uint8, buffer, offset)
+            offset += _aligned(image.nbytes)
+            depth = np.ndarray(depth_shape, np.float32, buffer, offset)
+            offset += _aligned(depth.nbytes)
+            self._buffers.append((image, depth))
+        self._views = [tuple(self._read_only(buffer) for buffer in buffers) for buffers in self._buffers]
+
+    @classmethod
+    def create(cls, width, height, slots=4):
+        """Allocate a new ring; the creator unlinks it on close()"""
+        size = _aligned(SHARED_HEADER.itemsize) + _aligned(SLOT_DTYPE.itemsize * slots)
+        size += slots * (_aligned(width * height * 4) + _aligned(width * height * 4))
+        memory = shared_memory.SharedMemory(create=True, size=size)
+        header = np.ndarray((), SHARED_HEADER, memory.buf, 0)
+        header[()] = (width, height, slots, -1, STATUS_STARTING, 0, 0.0)
+        ring = cls(memory, owner=True)
+        ring.table['sequence'] = -1
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Open a ring created by another process
+        Processes started by multiprocessing share their parent's resource
+        tracker, so attaching does not free the block when the reader exits.
+        """
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @staticmethod
+    def _read_only(buffer):
+        view = buffer.view()
+        view.flags.writeable = False
+        return view
+
+    # Writer side
+
+    def acquire(self):
+        """
+        Get the next slot to overwrite
+        Returns (index, (image, depth) writable buffers). The slot is
+        invalidated until commit().
+        """
+        index = (int(self.header['latest']) + 1) % self.slot_count
+        self.table['sequence'][index] = -1
+        return index, self._buffers[index]
+
+    def commit(self, index, timestamp, capture_time):
+        """Publish a filled slot as the newest frame"""
+        sequence = int(self.header['latest']) + 1
+        self.table[index] = (sequence, timestamp, capture_time)
+        self.header['last_commit'] = time.monotonic()
+        self.header['latest'] = sequence
+        return sequence
+
+    def set_status(self, status):
+        self.header['writer_pid'] = os.getpid()
+        self.header['status'] = status
+
+    # Reader side
+
+    @property
+    def status(self):
+        return int(self.header['status'])
+
+    @property
+    def last_commit(self):
+        return float(self.header['last_commit'])
+
+    def latest(self):
+        """Get the newest frame without waiting (None before the first commit)"""
+        sequence = int(self.header['latest'])
+        if sequence < 0:
+            return None
+        index = sequence % self.slot_count
+        slot_sequence, timestamp, capture_time = self.table[index].item()
+        if slot_sequence != sequence:
+            return None  # Lapped by the writer while reading
+        image, depth = self._views[index]
+        return SharedFrame(sequence, timestamp, capture_time, image, depth)
+
+    def wait_for_frame(self, after_sequence=-1, timeout=None, poll_interval=0.001):
+        """
+        Wait for a frame newer than after_sequence
+        There is no cross-process condition variable, so this polls the
+        sequence number; timeout=0 is a single check.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if int(self.header['latest']) > after_sequence:
+                frame = self.latest()
+                if frame is not None and frame.sequence > after_sequence:
+                    return frame
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll_interval)
+
+    def is_current(self, frame):
+        """Check that a frame's slot has not been overwritten since it was read"""
+        return int(self.table['sequence'][frame.sequence % self.slot_count]) == frame.sequence
+
+    def close(self):
+        """Detach; the creating process also frees the memory"""
+        self.header = self.table = None
+        self._buffers = self._views = None
+        try:
+            self.memory.close()
+        except BufferError:
+            pass  # A reader still holds frame views; the mapping goes when they do
+        if self.owner:
+            self.memory.unlink()
@@ -0,0 +1,75 @@
+import logging
+import time
+from threading import Thread
+import numpy as np
+from .frame_ring import FrameRing
+
+
+class SyntheticCapture:
+    """
+    Test-pattern camera with the CaptureLoop interface
+    Produces BGRA frames (sky over rippling water) and a matching float32
+    depth map at a fixed rate into a FrameRing, so the video pipeline can
+    run and be benchmarked without a ZED attached (USV_CAMERA=synthetic).
+    """
+
+    def __init__(self, width=1280, height=720, fps=30, buffers=4):
+        self.logger = logging.getLogger('SyntheticCapture')
+        self.width = width
+        self.height = height
+        self.period = 1.0 / fps
+        self.running = False
+        self.thread = None
+
+        self.ring = FrameRing(
+            [(np.empty((height, width, 4), dtype=np.uint8), np.empty((height, width), dtype=np.float32))
+             for _ in range(buffers)],
+            ('image', 'depth')
+        )
+
+        # Twice the frame width of texture, scrolled one step per frame
+        rng = np.random.default_rng(0)
+        horizon = height // 2
+        self.texture = np.empty((height, 2 * width, 4), dtype=np.uint8)
+        self.texture[:horizon] = (200, 150, 90, 255)  # Sky
+        self.texture[horizon:] = (120, 80, 40, 255)   # Water
+        self.texture[horizon:, :, :3] += rng.integers(0, 40, (height - horizon, 2 * width, 3), dtype=np.uint8)
+        rows = np.arange(height, dtype=np.float32)[:, None]
+        self.depth = np.broadcast_to(
+            np.where(rows > horizon, 2.0 + 18.0 * (height - rows) / (height - horizon), np.nan),
+            (height, width)
+        ).astype(np.float32)
+
+    def start(self):
+        """Start the frame thread"""
+        self.running = True
+        self.thread = Thread(target=self._frame_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the frame thread and wake any waiting readers"""
+        self.running = False
+        self.ring.close()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+
+    def _frame_loop(self):
+        next_frame = time.monotonic()
+        offset = 0
+        while self.running:
+            index, (image, depth) = self.ring.acquire()
+            np.copyto(image, self.texture[:, offset:offset + self.width])
+            np.copyto(depth, self.depth)
+            self.ring.commit(index, time.time_ns(), time.monotonic())
+            offset = (offset + 8) % self.width
+
+            next_frame = max(next_frame + self.period, time.monotonic())
+            time.sleep(max(0.0, next_frame - time.monotonic()))
+
+    def latest(self):
+        """Get the most recent frame without waiting (None before the first one)"""
+        return self.ring.latest()
+
+    def wait_for_frame(self, after_sequence=-1, timeout=None):
+        """Wait for a frame newer than after_sequence; None on timeout/shutdown"""
+        return self.ring.wait_for_frame(after_sequence, timeout)
@@ -0,0 +1,192 @@
+import struct
+import time
+from threading import Lock
+import cv2
+import numpy as np
+from .frame_protocol import CODEC_JPEG, CODEC_JPEG_TILES
+
+# CODEC_JPEG_TILES payload (little-endian):
+#   tile_size    H   tile edge in pixels (a multiple of 16, so tiles are whole JPEG MCUs)
+#   columns      H   tiles per row of the full frame
+#   count        H   number of tiles in this frame
+#   indexes      count x H   row * columns + column of each tile
+# followed by one JPEG mosaic holding the tiles in order, `columns` per
+# row. Tiles on the right and bottom edges of the frame are clipped to the
+# frame; the unused part of their mosaic cell is padding.
+TILES_HEADER = struct.Struct('<HHH')
+
+BLOCK = 8  # Change detection works on the means of BLOCK x BLOCK pixel blocks
+
+
+class DeltaEncoder:
+    """
+    Tile-based inter-frame encoder for one stream
+    The frame is divided into tiles and only tiles whose content moved away
+    from what the viewers last received are re-encoded, packed into one
+    JPEG mosaic. A tile counts as changed when any BLOCK x BLOCK block in it
+    differs from the reference by more than threshold on average in some
+    channel, so a small moving object is caught while sensor noise and
+    shimmer on water or sky are not. The reference only advances for tiles
+    that are sent, so slow drift still goes out once it adds up.
+    Plain JPEG keyframes go out every keyframe_interval seconds, when most
+    tiles changed anyway, and when a viewer needs to resynchronize.
+    """
+
+    def __init__(self, jpeg, tile_size=64, threshold=6.0, keyframe_interval=2.0,
+                 keyframe_fraction=0.6, min_keyframe_gap=0.5, clock=time.monotonic):
+        """
+        jpeg: JPEG encoder backend (see jpeg_encoders)
+        threshold: mean absolute difference of a block, in pixel levels
+        keyframe_fraction: send a keyframe instead when this share of tiles changed
+        min_keyframe_gap: seconds between keyframes requested by viewers
+        clock: time source for the keyframe timers
+        """
+        if tile_size % 16 or tile_size % BLOCK:
+            raise ValueError("tile_size must be a multiple of 16")
+        self.jpeg = jpeg
+        self.tile_size = tile_size
+        self.threshold = threshold
+        self.keyframe_interval = keyframe_interval
+        self.keyframe_fraction = keyframe_fraction
+        self.min_keyframe_gap = min_keyframe_gap
+        self.clock = clock
+
+        self.lock = Lock()
+        self.reference = None
+        self.mosaic = None
+        self.last_keyframe = float('-inf')
+        self.keyframe_requested = False
+        self.keyframes = 0
+        self.deltas = 0
+        self.tiles_sent = 0
+
+    def request_keyframe(self):
+        """Make one of the next frames a keyframe (rate-limited by min_keyframe_gap)"""
+        self.keyframe_requested = True
+
+    def _grid(self, shape):
+        height, width = shape[:2]
+        return -(-height // self.tile_size), -(-width // self.tile_size)
+
+    def _changed_tiles(self, frame):
+        """Get the indexes of tiles that differ from the reference"""
+        rows, columns = self._grid(frame.shape)
+        tiles_per_block = self.tile_size // BLOCK
+        difference = cv2.absdiff(frame, self.reference)
+        height, width = frame.shape[:2]
+        blocks = cv2.resize(difference, (-(-width // BLOCK), -(-height // BLOCK)), interpolation=cv2.INTER_AREA)
+        blocks = blocks.reshape(blocks.shape[0], blocks.shape[1], -1).max(axis=2)
+
+        padded = np.zeros((rows * tiles_per_block, columns * tiles_per_block), dtype=blocks.dtype)
+        padded[:blocks.shape[0], :blocks.shape[1]] = blocks
+        scores = padded.reshape(rows, tiles_per_block, columns, tiles_per_block).max(axis=(1, 3))
+        return np.flatnonzero(scores > self.threshold)
+
+    def encode(self, frame, quality):
+        """
+        Encode the next frame of the stream
+        Returns (codec, payload, keyframe): a CODEC_JPEG keyframe or a
+        CODEC_JPEG_TILES delta. Calls must not overlap.
+        """
+        with self.lock:
+            now = self.clock()
+            keyframe = (
+                self.reference is None or self.reference.shape != frame.shape
+                or now - self.last_keyframe >= self.keyframe_interval
+                or (self.keyframe_requested and now - self.last_keyframe >= self.min_keyframe_gap)
+            )
+            if not keyframe:
+                changed = self._changed_tiles(frame)
+                rows, columns = self._grid(frame.shape)
+                keyframe = len(changed) >= self.keyframe_fraction * rows * columns
+
+            if keyframe:
+                payload = self.jpeg.encode(frame, quality)
+                self.reference = frame.copy()
+                self.last_keyframe = now
+                self.keyframe_requested = False
+                self.keyframes += 1
+                return CODEC_JPEG, payload, True
+
+            payload = self._encode_tiles(frame, changed, columns, quality)
+            self.deltas += 1
+            self.tiles_sent += len(changed)
+            return CODEC_JPEG_TILES, payload, False
+
+    def _encode_tiles(self, frame, changed, columns, quality):
+        """Pack the changed tiles into a mosaic, encode it and move the reference on"""
+        size = self.tile_size
+        header = TILES_HEADER.pack(size, columns, len(changed)) + changed.astype('<u2').tobytes()
+        if not len(changed):
+            return np.frombuffer(header, dtype=np.uint8)
+
+        mosaic_shape = (-(-len(changed) // columns) * size, min(len(changed), columns) * size) + frame.shape[2:]
+        if self.mosaic is None or self.mosaic.shape != mosaic_shape:
+            self.mosaic = np.zeros(mosaic_shape, dtype=frame.dtype)
+        for slot, index in enumerate(changed):
+            top, left = index // columns * size, index % columns * size
+            tile = frame[top:top + size, left:left + size]
+            cell_top, cell_left = slot // columns * size, slot % columns * size
+            self.mosaic[cell_top:cell_top + tile.shape[0], cell_left:cell_left + tile.shape[1]] = tile
+            self.reference[top:top + size, left:left + size] = tile
+
+        jpeg = self.jpeg.encode(self.mosaic, quality)
+        return np.concatenate((np.frombuffer(header, dtype=np.uint8), jpeg))
+
+    def get_stats(self):
+        return {
+            'keyframes': self.keyframes,
+            'deltas': self.deltas,
+            'avg_tiles_per_delta': self.tiles_sent / self.deltas if self.deltas else 0.0,
+        }
+
+
+class TileReassembler:
+    """
+    Viewer side of a delta stream
+    Keeps the current picture: keyframes (CODEC_JPEG) replace it and
+    CODEC_JPEG_TILES frames paste their tiles into it. Until the first
+    keyframe arrives there is no picture to update.
+    """
+
+    def __init__(self):
+        self.image = None
+
+    def reset(self):
+        """Forget the picture, e.g. after a lost frame; the next keyframe starts it again"""
+        self.image = None
+
+    def update(self, header, payload):
+        """
+        Apply one received frame
+        Returns the current BGR picture (owned by the reassembler), or None
+        while waiting for a keyframe.
+        """
+        data = np.frombuffer(payload, dtype=np.uint8)
+        if header.codec == CODEC_JPEG:
+            image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+            if image is not None:
+                self.image = image
+            return self.image
+
+        if header.codec != CODEC_JPEG_TILES or self.image is None:
+            return self.image
+        if self.image.shape[:2] != (header.height, header.width):
+            self.image = None  # Stream resized; wait for its keyframe
+            return None
+
+        size, columns, count = TILES_HEADER.unpack_from(data)
+        if not count:
+            return self.image
+        offset = TILES_HEADER.size + 2 * count
+        indexes = np.frombuffer(data, dtype='<u2', count=count, offset=TILES_HEADER.size)
+        mosaic = cv2.imdecode(data[offset:], cv2.IMREAD_COLOR)
+        if mosaic is None:
+            return self.image
+
+        for slot, index in enumerate(indexes.tolist()):
+            top, left = index // columns * size, index % columns * size
+            target = self.image[top:top + size, left:left + size]
+            cell_top, cell_left = slot // columns * size, slot % columns * size
+            target[...] = mosaic[cell_top:cell_top + target.shape[0], cell_left:cell_left + target.shape[1]]
+        return self.image
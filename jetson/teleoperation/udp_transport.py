@@ -0,0 +1,324 @@
+import errno
+import ipaddress
+import logging
+import random
+import socket
+import struct
+import time
+from collections import OrderedDict, deque
+from .client_writer import ClientWriter
+from .frame_protocol import FRAME_HEADER, unpack_header
+
+# UDP transport: every frame (the same FRAME_HEADER + payload bytes as on
+# TCP) is cut into datagrams, each starting with (little-endian):
+#   magic        2s  b'UF'
+#   version      B
+#   flags        B   unused, 0
+#   epoch        I   random per sender; a new one means the sender restarted
+#   frame_id     I   per-sender frame counter (wraps at 2**32); gaps mean lost frames
+#   index        H   fragment number
+#   count        H   fragments in the frame
+#   offset       I   byte offset of this fragment in the frame
+#   total        I   frame size in bytes
+# followed by the fragment bytes. A receiver only delivers frames that are
+# complete and newer than the last one it delivered from the same epoch.
+#
+# Unicast viewers subscribe by sending the same request line as on TCP
+# (e.g. b"half\n", b"half delta\n") to the server's UDP port, and repeat it
+# every SUBSCRIBE_INTERVAL to stay subscribed. b"keyframe\n" asks a delta
+# stream for a keyframe after a loss. Multicast streams are configured on
+# the server and need no subscription.
+FRAGMENT_MAGIC = b'UF'
+FRAGMENT_VERSION = 2
+FRAGMENT_HEADER = struct.Struct('<2sBBIIHHII')
+
+DATAGRAM_SIZE = 1400  # Fragment header included; fits a 1500-byte MTU with IP/UDP headers to spare
+MAX_FRAME_SIZE = 16 * 1024 * 1024  # Far above any encoded frame; a bad header cannot allocate more
+SUBSCRIBE_INTERVAL = 1.0
+SUBSCRIPTION_TIMEOUT = 3.0
+KEYFRAME_REQUEST = 'keyframe'
+
+
+def is_multicast(host):
+    try:
+        return ipaddress.ip_address(host).is_multicast
+    except ValueError:
+        return False
+
+
+def parse_multicast_streams(text):
+    """
+    Parse 'group:port:profile[:mode],...' (e.g. USV_VIDEO_MULTICAST) into
+    (group, port, profile, mode) tuples
+    """
+    streams = []
+    for item in (text or '').split(','):
+        fields = item.strip().split(':')
+        if len(fields) < 3:
+            continue
+        group, port, profile = fields[:3]
+        streams.append((group, int(port), profile, fields[3] if len(fields) > 3 else None))
+    return streams
+
+
+class UdpFrameSender:
+    """
+    Fragment frames into datagrams for one destination
+    The destination may be a unicast viewer or a multicast group; a
+    multicast frame is sent once however many viewers have joined. Fragments
+    are sent with scatter-gather straight from the header and payload
+    buffers. sock may be shared between senders (it is then not closed
+    here), e.g. the server's subscription socket, so unicast frames come
+    from the port viewers subscribed to.
+    """
+
+    def __init__(self, destination, sock=None, datagram_size=DATAGRAM_SIZE, ttl=1):
+        self.destination = destination
+        self.owns_socket = sock is None
+        self.sock = sock or socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if self.owns_socket and is_multicast(destination[0]):
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+        self.chunk = datagram_size - FRAGMENT_HEADER.size
+        self.epoch = random.getrandbits(32)  # Frame ids restart at 0 with every sender
+        self.frame_id = 0
+        self.datagrams_sent = 0
+        self.send_errors = 0
+
+    def send_frame(self, header, payload):
+        """Send one frame; datagrams the network refuses are counted and skipped"""
+        header = memoryview(header)
+        payload = memoryview(payload).cast('B')
+        head, total = len(header), len(header) + len(payload)
+        count = -(-total // self.chunk)
+        if count > 0xFFFF:
+            raise ValueError(f"frame of {total} bytes needs too many fragments")
+
+        for index in range(count):
+            start, end = index * self.chunk, min(total, (index + 1) * self.chunk)
+            parts = [FRAGMENT_HEADER.pack(FRAGMENT_MAGIC, FRAGMENT_VERSION, 0, self.epoch, self.frame_id,
+                                          index, count, start, total)]
+            if start < head:
+                parts.append(header[start:min(end, head)])
+            if end > head:
+                parts.append(payload[max(start - head, 0):end - head])
+            try:
+                self.sock.sendmsg(parts, [], 0, self.destination)
+                self.datagrams_sent += 1
+            except OSError as e:
+                # A full interface queue or a viewer that went away (ICMP
+                # port unreachable) costs this datagram, not the stream
+                if e.errno not in (errno.ENOBUFS, errno.EAGAIN, errno.ECONNREFUSED, errno.EHOSTUNREACH):
+                    raise
+                self.send_errors += 1
+        self.frame_id = (self.frame_id + 1) & 0xFFFFFFFF
+
+    def settimeout(self, timeout):
+        pass
+
+    def close(self):
+        if self.owns_socket:
+            self.sock.close()
+
+
+class UdpClientWriter(ClientWriter):
+    """
+    ClientWriter for a UDP viewer or multicast group
+    Queueing, frame dropping, delta resync and statistics are the TCP
+    writer's; frames go out through a UdpFrameSender. A unicast subscriber
+    stays until it stops renewing its subscription.
+    """
+
+    def __init__(self, sender, addr, profile=None, mode=None, on_resync=None, lifetime=None):
+        """lifetime: seconds a subscription lasts without renew(); None for never"""
+        self.lifetime = lifetime
+        self.expires = None if lifetime is None else time.monotonic() + lifetime
+        super().__init__(sender, addr, profile, mode=mode, on_resync=on_resync)
+
+    def _configure_socket(self, send_timeout, send_buffer):
+        pass  # Datagram sends do not block on the viewer
+
+    def _transmit(self, header, payload):
+        self.sock.send_frame(header, payload)
+
+    def renew(self):
+        if self.lifetime is not None:
+            self.expires = time.monotonic() + self.lifetime
+
+    def expired(self, now):
+        return self.expires is not None and now > self.expires
+
+
+class _PartialFrame:
+    __slots__ = ('data', 'received', 'missing', 'total', 'count')
+
+    def __init__(self, total, count):
+        self.data = bytearray(total)
+        self.received = bytearray(count)
+        self.missing = count
+        self.total = total
+        self.count = count
+
+
+class UdpFrameReceiver:
+    """
+    Receive and reassemble frames from the UDP transport
+    Frames are delivered once all their fragments are in and only if newer
+    than the last frame delivered; anything older still incomplete is
+    discarded, so a lost datagram costs one frame instead of stalling the
+    stream. read_frame() returns the same (FrameHeader, payload) as
+    FrameReader, and gap tells how many frames were lost just before it.
+    A new sender epoch (the server restarted it, e.g. after the
+    subscription expired during a dropout) starts the frame ids over.
+    """
+
+    def __init__(self, port=0, group=None, server=None, request=None, interface='0.0.0.0',
+                 max_partial=4, receive_buffer=4 * 1024 * 1024, datagram_size=DATAGRAM_SIZE,
+                 max_frame_size=MAX_FRAME_SIZE):
+        """
+        port: local port (multicast: the stream's port)
+        group: multicast group to join
+        server: (host, udp_port) to subscribe to, for unicast
+        request: subscription line, e.g. 'half' or 'half delta'
+        max_partial: incomplete frames kept waiting for fragments
+        datagram_size: the sender's datagram size; with max_frame_size, bounds
+        the frame size a fragment may claim
+        """
+        self.logger = logging.getLogger('UdpFrameReceiver')
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        if group:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)  # Several viewers on one host
+            self.sock.bind(('', port))
+            membership = struct.pack('4s4s', socket.inet_aton(group), socket.inet_aton(interface))
+            self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        else:
+            self.sock.bind((interface, port))
+        self.port = self.sock.getsockname()[1]
+
+        self.server = server
+        self.request = (request or '').encode('ascii') + b'\n'
+        self.next_subscribe = 0.0
+        self.max_partial = max_partial
+        self.chunk = datagram_size - FRAGMENT_HEADER.size
+        self.max_frame_size = max_frame_size
+        self.partial = OrderedDict()  # frame_id -> _PartialFrame, oldest first
+        self.datagram = bytearray(65536)
+        self.epoch = None
+        self.retired_epochs = deque(maxlen=4)  # Stragglers from these are ignored
+        self.last_frame_id = None
+        self.gap = 0
+
+        self.frames_received = 0
+        self.frames_lost = 0
+        self.frames_incomplete = 0
+        self.datagrams_received = 0
+        self.restarts = 0
+
+    def _newer(self, frame_id):
+        return self.last_frame_id is None or 0 < (frame_id - self.last_frame_id) & 0xFFFFFFFF < 0x80000000
+
+    def subscribe(self):
+        """Send (or renew) the subscription to the server"""
+        if self.server:
+            self.sock.sendto(self.request, self.server)
+
+    def request_keyframe(self):
+        """Ask the server's delta stream for a keyframe, e.g. after a lost frame"""
+        if self.server:
+            self.sock.sendto(KEYFRAME_REQUEST.encode('ascii') + b'\n', self.server)
+
+    def read_frame(self, timeout=None):
+        """
+        Wait for the next complete frame
+        Returns (FrameHeader, memoryview of payload), or None on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            if self.server and now >= self.next_subscribe:
+                self.subscribe()
+                self.next_subscribe = now + SUBSCRIBE_INTERVAL
+            wait = self.next_subscribe - now if self.server else None
+            if deadline is not None:
+                if now >= deadline:
+                    return None
+                wait = deadline - now if wait is None else min(wait, deadline - now)
+            self.sock.settimeout(wait)
+            try:
+                size = self.sock.recv_into(self.datagram)
+            except socket.timeout:
+                continue
+
+            frame = self._add_fragment(memoryview(self.datagram)[:size])
+            if frame is not None:
+                return frame
+
+    def _add_fragment(self, datagram):
+        if len(datagram) < FRAGMENT_HEADER.size:
+            return None
+        magic, version, _, epoch, frame_id, index, count, offset, total = FRAGMENT_HEADER.unpack_from(datagram)
+        size = len(datagram) - FRAGMENT_HEADER.size
+        if (magic != FRAGMENT_MAGIC or version != FRAGMENT_VERSION or index >= count or offset + size > total
+                or total > min(count * self.chunk, self.max_frame_size)):
+            return None
+        self.datagrams_received += 1
+        if epoch != self.epoch:
+            if epoch in self.retired_epochs:
+                return None
+            self._start_epoch(epoch)
+        if not self._newer(frame_id):
+            return None  # Late fragment of a frame already delivered or given up on
+
+        frame = self.partial.get(frame_id)
+        if frame is None:
+            frame = self.partial[frame_id] = _PartialFrame(total, count)
+            while len(self.partial) > self.max_partial:
+                self.partial.popitem(last=False)
+                self.frames_incomplete += 1
+        elif frame.count != count or frame.total != total:
+            return None  # Does not belong to the frame already being reassembled
+        if frame.received[index]:
+            return None
+        frame.received[index] = 1
+        frame.missing -= 1
+        frame.data[offset:offset + size] = datagram[FRAGMENT_HEADER.size:]
+        if frame.missing:
+            return None
+
+        # Complete: anything older that is still waiting will never be shown
+        while True:
+            oldest, waiting = next(iter(self.partial.items()))
+            del self.partial[oldest]
+            if oldest == frame_id:
+                break
+            self.frames_incomplete += 1
+        self.gap = 0 if self.last_frame_id is None else (frame_id - self.last_frame_id - 1) & 0xFFFFFFFF
+        self.frames_lost += self.gap
+        self.last_frame_id = frame_id
+        self.frames_received += 1
+
+        header = unpack_header(frame.data)
+        return header, memoryview(frame.data)[FRAME_HEADER.size:FRAME_HEADER.size + header.length]
+
+    def _start_epoch(self, epoch):
+        """Follow a new sender: its frame ids have nothing to do with the old one's"""
+        if self.epoch is not None:
+            self.retired_epochs.append(self.epoch)
+            self.restarts += 1
+            self.logger.info(f"Sender restarted (epoch {epoch:08x})")
+        self.epoch = epoch
+        self.frames_incomplete += len(self.partial)
+        self.partial.clear()
+        self.last_frame_id = None
+
+    def get_stats(self):
+        return {
+            'frames_received': self.frames_received,
+            'frames_lost': self.frames_lost,
+            'frames_incomplete': self.frames_incomplete,
+            'datagrams_received': self.datagrams_received,
+            'restarts': self.restarts,
+        }
+
+    def close(self):
+        self.sock.close()
@@ -0,0 +1,208 @@
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from threading import Lock, Thread
+import numpy as np
+from common.metrics import MetricsExporter, registry
+from .shared_frame_ring import STATUS_FAILED, STATUS_READY, STATUS_STARTING, SharedFrameRing
+
+
+def run_video_process(ring_name, host, port, camera, encoder, udp_port, multicast, stop_event, niceness):
+    """
+    Video process entry point: VideoStream (capture, encode, streaming) plus
+    a publisher that copies every captured frame into the shared ring
+    """
+    from common.async_logging import configure_logging
+    from .video_stream import VideoStream
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The control process decides when to stop
+    os.nice(niceness)  # Cores shared with the control loop go to the control loop first
+    configure_logging()
+    logger = logging.getLogger('VideoProcess')
+    ring = SharedFrameRing.attach(ring_name)
+    stream = VideoStream(host, port, camera=camera, encoder=encoder, udp_port=udp_port, multicast=multicast)
+    metrics_exporter = MetricsExporter(path='/tmp/usv_video_metrics.json')
+
+    if not stream.initialize_camera():
+        ring.set_status(STATUS_FAILED)
+        ring.close()
+        return
+    stream.start_streaming()
+    metrics_exporter.start()
+    ring.set_status(STATUS_READY)
+
+    sequence = -1
+    try:
+        while not stop_event.is_set():
+            frame = stream.capture.wait_for_frame(sequence, timeout=0.5)
+            if frame is None:
+                continue
+            sequence = frame.sequence
+            if frame.image.shape[:2] != (ring.height, ring.width):
+                logger.error(f"Camera resolution {frame.image.shape[1]}x{frame.image.shape[0]} "
+                             f"does not match the shared ring ({ring.width}x{ring.height})")
+                ring.set_status(STATUS_FAILED)
+                break
+            index, (image, depth) = ring.acquire()
+            np.copyto(image, frame.image)
+            np.copyto(depth, frame.depth)
+            ring.commit(index, frame.timestamp, frame.capture_time)
+    finally:
+        metrics_exporter.stop()
+        stream.stop_streaming()
+        ring.close()
+
+
+class VideoProcess:
+    """
+    Runs the video pipeline (VideoStream) in its own process
+    Camera capture, JPEG encoding and client sockets then never hold the
+    control process's GIL. Frames and depth come back through a
+    SharedFrameRing, read as zero-copy views with the same get_depth_frame()
+    interface as VideoStream. A monitor thread restarts the process if it
+    dies or stops delivering frames.
+    """
+
+    def __init__(self, host='0.0.0.0', port=5555, camera=None, encoder=None, udp_port=None, multicast=None,
+                 width=1280, height=720, slots=4, niceness=10, startup_timeout=20.0, frame_timeout=3.0, restart_delay=1.0):
+        """
+        camera: passed to VideoStream ('zed', 'synthetic'; default USV_CAMERA)
+        encoder: JPEG backend passed to VideoStream (default USV_JPEG_ENCODER)
+        udp_port, multicast: UDP transport options passed to VideoStream
+        width, height: camera resolution (the ZED is opened at HD720)
+        niceness: added to the video process's nice value
+        frame_timeout: restart the process when no frame arrives for this long
+        """
+        self.logger = logging.getLogger('VideoProcess')
+        self.host = host
+        self.port = port
+        self.camera = camera
+        self.encoder = encoder
+        self.udp_port = udp_port
+        self.multicast = multicast
+        self.width = width
+        self.height = height
+        self.slots = slots
+        self.niceness = niceness
+        self.startup_timeout = startup_timeout
+        self.frame_timeout = frame_timeout
+        self.restart_delay = restart_delay
+
+        # Spawned, not forked: the control process has threads running
+        self.context = multiprocessing.get_context('spawn')
+        self.ring = None
+        self.process = None
+        self.stop_event = None
+        self.started_at = 0.0
+        self.running = False
+        self.closing = False
+        self.process_lock = Lock()  # Serializes starting and stopping the process (monitor vs. shutdown)
+        self.restarts = registry.counter('video.process.restarts')
+
+    def initialize_camera(self):
+        """Create the shared ring, start the video process and wait until its camera is open"""
+        try:
+            with self.process_lock:
+                self.ring = SharedFrameRing.create(self.width, self.height, self.slots)
+                return self._start_process()
+        except Exception as e:
+            self.logger.error(f"Failed to start video process: {e}")
+            return False
+
+    def _start_process(self):
+        """
+        Spawn the video process; returns True once it reports the camera ready
+        Called with process_lock held.
+        """
+        self.ring.header['status'] = STATUS_STARTING
+        self.stop_event = self.context.Event()
+        self.process = self.context.Process(
+            target=run_video_process, name='usv-video',
+            args=(self.ring.name, self.host, self.port, self.camera, self.encoder, self.udp_port,
+                  self.multicast, self.stop_event, self.niceness),
+            daemon=True
+        )
+        self.process.start()
+        self.started_at = time.monotonic()
+
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline and self.process.is_alive():
+            if self.closing:
+                self._stop_process()  # stop_streaming() is waiting for the lock
+                return False
+            if self.ring.status == STATUS_READY:
+                self.logger.info(f"Video process {self.process.pid} running")
+                return True
+            if self.ring.status == STATUS_FAILED:
+                break
+            time.sleep(0.05)
+        self.logger.error("Video process failed to start")
+        self._stop_process()
+        return False
+
+    def _stop_process(self, timeout=2.0):
+        """Stop the video process, killing it if it does not exit (process_lock held)"""
+        if self.process is None:
+            return
+        self.stop_event.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout)
+        self.process = None
+
+    def start_streaming(self):
+        """Start supervising the video process (it streams on its own)"""
+        self.running = True
+        Thread(target=self._monitor, daemon=True).start()
+
+    def _monitor(self):
+        """Restart the video process when it exits or stops publishing frames"""
+        while self.running:
+            time.sleep(0.5)
+            with self.process_lock:
+                # stop_streaming() may have freed the process and ring meanwhile
+                if not self.running:
+                    break
+                if self.process is not None and self.process.is_alive():
+                    if time.monotonic() - max(self.ring.last_commit, self.started_at) < self.frame_timeout:
+                        continue
+                    self.logger.warning(f"No frames from the video process for {self.frame_timeout} s, restarting it")
+                else:
+                    exit_code = self.process.exitcode if self.process else None
+                    self.logger.warning(f"Video process exited ({exit_code}), restarting it")
+
+                self.restarts.inc()
+                self._stop_process()
+            time.sleep(self.restart_delay)
+            with self.process_lock:
+                if self.running:
+                    self._start_process()
+
+    def stop_streaming(self):
+        """Stop the video process and free the shared ring"""
+        self.running = False
+        self.closing = True
+        with self.process_lock:
+            self._stop_process()
+            if self.ring:
+                self.ring.close()
+                self.ring = None
+        self.logger.info("Video process stopped")
+
+    def get_depth_data(self):
+        """Get a read-only view of the latest depth map (None before the first frame)"""
+        frame = self.ring.latest() if self.ring else None
+        return None if frame is None else frame.depth
+
+    def get_depth_frame(self, after_sequence=-1, timeout=None):
+        """
+        Wait for the newest frame captured after after_sequence
+        Returns a frame with sequence, timestamp, capture_time, image and
+        depth (read-only views of the shared ring), or None on timeout.
+        """
+        if not self.ring:
+            return None
+        return self.ring.wait_for_frame(after_sequence, timeout)
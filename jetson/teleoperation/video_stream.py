@@ -1,19 +1,46 @@
-import cv2
 import threading
-import pyzed.sl as sl
 import socket
-import pickle
-import struct
 import logging
+import os
+import time
+import functools
+from common.metrics import registry
+from .adaptive_stream import AdaptiveController, ladder_index
+from .client_writer import ClientWriter
+from .frame_protocol import MODE_ADAPTIVE, pack_header, parse_stream_request, read_profile_request
+from .profile_encoder import DEFAULT_PROFILE, ProfileEncoder
+from .udp_transport import (KEYFRAME_REQUEST, SUBSCRIPTION_TIMEOUT, UdpClientWriter, UdpFrameSender,
+                            parse_multicast_streams)
+
+ADAPTIVE_SEND_BUFFER = 64 * 1024  # Bytes; keeps an adaptive client's backlog visible to its controller
+
 
 class VideoStream:
-    def __init__(self, host='0.0.0.0', port=5555):
+    def __init__(self, host='0.0.0.0', port=5555, camera=None, encoder=None, udp_port=None, multicast=None):
+        """
+        camera: 'zed' or 'synthetic' (a test pattern, for running without the
+        camera); defaults to the USV_CAMERA environment variable, then 'zed'
+        encoder: JPEG backend ('auto', 'turbojpeg', 'strips', 'opencv');
+        defaults to the USV_JPEG_ENCODER environment variable, then 'auto'
+        udp_port: also serve viewers that subscribe over UDP on this port
+        multicast: streams sent to multicast groups, as
+        'group:port:profile[:mode],...'; defaults to the USV_VIDEO_MULTICAST
+        environment variable
+        """
         self.host = host
         self.port = port
+        self.udp_port = udp_port
+        self.multicast = parse_multicast_streams(multicast or os.environ.get('USV_VIDEO_MULTICAST'))
+        self.udp_socket = None
+        self.camera = camera or os.environ.get('USV_CAMERA', 'zed')
         self.running = False
         self.zed = None
+        self.capture = None
         self.server_socket = None
         self.clients = []
+        self.clients_lock = threading.Lock()
+        self.encoder = ProfileEncoder(encoder=encoder)
+        self.frames_overwritten = registry.counter('video.frames_overwritten')
         
         # Configure logging
         logging.basicConfig(level=logging.INFO)
@@ -21,7 +48,16 @@ class VideoStream:
 
     def initialize_camera(self):
         """Initialize ZED camera with optimal parameters"""
+        if self.camera == 'synthetic':
+            from .synthetic_capture import SyntheticCapture
+            self.capture = SyntheticCapture()
+            self.capture.start()
+            return True
+            
         try:
+            import pyzed.sl as sl  # Only needed with the camera attached
+            from .capture_loop import CaptureLoop
+            
             init_params = sl.InitParameters()
             init_params.camera_resolution = sl.RESOLUTION.HD720
             init_params.camera_fps = 30
@@ -34,6 +70,9 @@ class VideoStream:
                 self.logger.error(f"Camera initialization failed: {status}")
                 return False
                 
+            # One grab loop feeds both the streamer and depth consumers
+            self.capture = CaptureLoop(self.zed)
+            self.capture.start()
             return True
         except Exception as e:
             self.logger.error(f"Camera initialization error: {e}")
@@ -43,6 +82,7 @@ class VideoStream:
         """Start video streaming server"""
         try:
             self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)  # Rebind after a restart
             self.server_socket.bind((self.host, self.port))
             self.server_socket.listen(5)
             self.running = True
@@ -50,6 +90,13 @@ class VideoStream:
             # Start client acceptance thread
             threading.Thread(target=self._accept_clients, daemon=True).start()
             
+            if self.udp_port is not None:
+                self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self.udp_socket.bind((self.host, self.udp_port))
+                threading.Thread(target=self._accept_subscriptions, daemon=True).start()
+            for group, port, profile, mode in self.multicast:
+                self.add_client(UdpFrameSender((group, port)), (group, port), profile, mode, writer=UdpClientWriter)
+            
             # Start video streaming thread
             threading.Thread(target=self._stream_video, daemon=True).start()
             
@@ -63,46 +110,135 @@ class VideoStream:
         while self.running:
             try:
                 client_socket, addr = self.server_socket.accept()
-                self.logger.info(f"New client connected: {addr}")
-                self.clients.append(client_socket)
+                threading.Thread(
+                    target=self._register_client, args=(client_socket, addr), daemon=True
+                ).start()
             except Exception as e:
                 if self.running:
                     self.logger.error(f"Client acceptance error: {e}")
 
+    def _register_client(self, client_socket, addr):
+        """Read the client's profile request and start serving it"""
+        profile, mode = parse_stream_request(read_profile_request(client_socket))
+        self.add_client(client_socket, addr, profile, mode)
+
+    def _accept_subscriptions(self):
+        """
+        Serve UDP viewers
+        A request line from a new address subscribes it, a repeat renews the
+        subscription and 'keyframe' asks its delta stream for a keyframe.
+        Viewers that stop renewing are dropped.
+        """
+        subscribers = {}
+        self.udp_socket.settimeout(1.0)
+        while self.running:
+            try:
+                data, addr = self.udp_socket.recvfrom(64)
+            except socket.timeout:
+                data = None
+            except Exception as e:
+                if self.running:
+                    self.logger.error(f"UDP subscription error: {e}")
+                break
+                
+            now = time.monotonic()
+            for expired in [addr for addr, client in subscribers.items() if client.expired(now) or not client.running]:
+                self.logger.info(f"UDP client {expired} unsubscribed")
+                subscribers.pop(expired).close()
+            if not data:
+                continue
+                
+            request = data.split(b'\n', 1)[0].decode('ascii', 'replace').strip()
+            client = subscribers.get(addr)
+            if request == KEYFRAME_REQUEST:
+                if client:
+                    client.renew()
+                    self.encoder.request_keyframe(client.profile)
+            elif client:
+                client.renew()
+            else:
+                profile, mode = parse_stream_request(request)
+                if mode == MODE_ADAPTIVE:
+                    mode = None  # Datagram sends never push back, so there is nothing to adapt to
+                subscribers[addr] = self.add_client(UdpFrameSender(addr, sock=self.udp_socket), addr, profile, mode,
+                                                    writer=functools.partial(UdpClientWriter,
+                                                                             lifetime=SUBSCRIPTION_TIMEOUT))
+
+    def add_client(self, client_socket, addr, profile=None, mode=None, writer=ClientWriter):
+        """
+        Serve a connected client (or a socket stand-in) with a profile and mode
+        writer: ClientWriter class to serve it with (UdpClientWriter for a
+        UdpFrameSender)
+        Returns its ClientWriter.
+        """
+        profile = profile or DEFAULT_PROFILE
+        if profile not in self.encoder.profiles:
+            self.logger.warning(f"Unknown profile '{profile}' from {addr}, using '{DEFAULT_PROFILE}'")
+            profile = DEFAULT_PROFILE
+            
+        self.logger.info(f"New client connected: {addr} (profile: {profile}, mode: {mode or 'jpeg'})")
+        if mode == MODE_ADAPTIVE:
+            # Plain JPEG frames; the controller moves the client between profiles
+            controller = AdaptiveController(cap=ladder_index(profile), profiles=self.encoder.profiles,
+                                            name=f"{addr[0]}_{addr[1]}".replace('.', '-'))
+            client = ClientWriter(client_socket, addr, profile, controller=controller,
+                                  send_buffer=ADAPTIVE_SEND_BUFFER)
+        else:
+            client = writer(client_socket, addr, profile, mode=mode, on_resync=self.encoder.request_keyframe)
+        with self.clients_lock:
+            self.clients.append(client)
+        if client.mode:
+            self.encoder.request_keyframe(profile)  # A delta viewer starts from a keyframe
+        return client
+
+    def _publish_frame(self, profile, mode, captured, buffer, width, height, codec, keyframe):
+        """Send an encoded frame to every client subscribed to its stream"""
+        if not self.capture.ring.is_current(captured):
+            # The capture loop reused the slot while it was being encoded
+            self.frames_overwritten.inc()
+            if mode:
+                # Delta viewers would miss what this frame changed
+                with self.clients_lock:
+                    for client in self.clients:
+                        if client.profile == profile and client.mode == mode:
+                            client.resync()
+            return
+        header = pack_header(captured.sequence, captured.timestamp, width, height, buffer.nbytes, codec=codec)
+        with self.clients_lock:
+            for client in self.clients:
+                # A stream encoded for one client's frame also reaches viewers whose frame skip drops it
+                if client.profile == profile and client.mode == mode and client.wants(captured.sequence):
+                    client.submit(header, buffer, captured.capture_time, keyframe)
+
     def _stream_video(self):
-        """Capture and stream video frames"""
-        if not self.zed:
+        """Encode and stream frames published by the capture loop"""
+        if not self.capture:
             self.logger.error("Camera not initialized")
             return
 
-        image = sl.Mat()
-        runtime_parameters = sl.RuntimeParameters()
-
+        last_sequence = -1
         while self.running:
             try:
-                if self.zed.grab(runtime_parameters) == sl.ERROR_CODE.SUCCESS:
-                    self.zed.retrieve_image(image, sl.VIEW.LEFT)
-                    frame = image.get_data()
-                    
-                    # Convert to jpg for efficiency
-                    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                    data = pickle.dumps(buffer)
-                    
-                    # Send frame size followed by frame data
-                    message_size = struct.pack("L", len(data))
+                captured = self.capture.wait_for_frame(last_sequence, timeout=1.0)
+                if captured is None:
+                    continue
+                last_sequence = captured.sequence
+                
+                # Only encode the streams someone is watching
+                with self.clients_lock:
+                    self.clients = [client for client in self.clients if client.running]
+                    streams = {(client.profile, client.mode) for client in self.clients
+                               if client.wants(captured.sequence)}
+                if not streams:
+                    continue
                     
-                    # Send to all connected clients
-                    disconnected_clients = []
-                    for client in self.clients:
-                        try:
-                            client.sendall(message_size + data)
-                        except:
-                            disconnected_clients.append(client)
+                # Encoded straight from the capture ring's BGRA view; the
+                # ring is checked again before the result is sent
+                for profile, mode in streams:
+                    self.encoder.submit(profile, captured.image, functools.partial(
+                        self._publish_frame, profile, mode, captured
+                    ), mode=mode)
                     
-                    # Remove disconnected clients
-                    for client in disconnected_clients:
-                        self.clients.remove(client)
-                        
             except Exception as e:
                 self.logger.error(f"Streaming error: {e}")
                 break
@@ -112,19 +248,22 @@ class VideoStream:
         self.running = False
         
         # Close all client connections
-        for client in self.clients:
-            try:
+        with self.clients_lock:
+            for client in self.clients:
                 client.close()
-            except:
-                pass
-        self.clients.clear()
+            self.clients.clear()
         
-        # Close server socket
-        if self.server_socket:
-            try:
-                self.server_socket.close()
-            except:
-                pass
+        self.encoder.shutdown()
+        if self.capture:
+            self.capture.stop()
+        
+        # Close server sockets
+        for server_socket in (self.server_socket, self.udp_socket):
+            if server_socket:
+                try:
+                    server_socket.close()
+                except:
+                    pass
             
         # Close ZED camera
         if self.zed:
@@ -132,13 +271,35 @@ class VideoStream:
             
         self.logger.info("Video streaming stopped")
 
+    def get_client_stats(self):
+        """Get dropped-frame and latency counters for each connected client"""
+        with self.clients_lock:
+            return [client.get_stats() for client in self.clients]
+
+    def get_profile_stats(self):
+        """Get per-stream encode time and bytes/frame metrics ('half', 'half.delta', ...)"""
+        return self.encoder.get_stats()
+
     def get_depth_data(self):
-        """Get depth data for autonomous navigation"""
-        if not self.zed:
+        """
+        Get depth data for autonomous navigation
+        Returns a read-only view of the latest depth map from the shared grab
+        loop; never triggers another grab.
+        """
+        if not self.capture:
             return None
             
-        depth = sl.Mat()
-        if self.zed.grab() == sl.ERROR_CODE.SUCCESS:
-            self.zed.retrieve_measure(depth, sl.MEASURE.DEPTH)
-            return depth.get_data()
-        return None 
\ No newline at end of file
+        frame = self.capture.latest()
+        if frame is None:
+            return None
+        return frame.depth
+
+    def get_depth_frame(self, after_sequence=-1, timeout=None):
+        """
+        Wait for the newest frame captured after after_sequence
+        Returns a frame with sequence, timestamp, image and depth (read-only
+        views of the capture ring), or None on timeout.
+        """
+        if not self.capture:
+            return None
+        return self.capture.wait_for_frame(after_sequence, timeout) 
\ No newline at end of file
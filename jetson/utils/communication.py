@@ -1,54 +1,187 @@
-import smbus
 import logging
-from time import sleep
+import random
+from threading import Condition, Lock, Thread
+from time import monotonic, monotonic_ns, perf_counter, sleep
+from common.command_link import pack_command
+from common.metrics import registry
+from common.trace import JETSON_PROCESSED, LINK_SENT, RC_RECEIVED, tracer
 
 class I2CCommunicator:
-    def __init__(self, address=0x08, bus_number=1):
+    """
+    Command link to the Raspberry Pi
+    send_command() only stores the command in a latest-command slot; a
+    dedicated link thread writes it to the bus. Commands that are replaced
+    before the link thread gets to them are coalesced (never sent), and a
+    failed write is retried with a short jittered backoff only until a newer
+    command arrives, so the control loop is never blocked by the bus.
+    Each command goes out as a sequenced, CRC-checked frame (see
+    common/command_link.py).
+    """
+
+    def __init__(self, address=0x08, bus_number=1, bus=None):
+        """
+        bus: optional SMBus-compatible object, e.g. a StreamBus for a serial
+             or loopback link; the I2C bus is opened when omitted
+        """
         self.address = address
         self.bus_number = bus_number
         self.logger = logging.getLogger('I2CCommunicator')
-        
-        try:
-            self.bus = smbus.SMBus(bus_number)
-        except Exception as e:
-            self.logger.error(f"Failed to initialize I2C: {e}")
-            self.bus = None
-            
+
+        if bus is not None:
+            self.bus = bus
+        else:
+            try:
+                import smbus  # Not needed for stream links
+                self.bus = smbus.SMBus(bus_number)
+            except Exception as e:
+                self.logger.error(f"Failed to initialize I2C: {e}")
+                self.bus = None
+
         # Command retry parameters
         self.max_retries = 3
-        self.retry_delay = 0.1
-            
-    def send_command(self, throttle, steering, gate_control):
+        self.retry_delay = 0.002  # Base backoff, doubled per attempt plus jitter
+
+        # Latest-command slot shared with the link thread
+        self.bus_lock = Lock()
+        self.condition = Condition()
+        self.pending = None
+        self.pending_trace = None
+        self.running = False
+        self.sequence = 0
+
+        # Link statistics
+        self.commands_queued = 0
+        self.commands_sent = 0
+        self.commands_coalesced = 0
+        self.commands_failed = 0
+        self.retry_count = 0
+        self.last_rtt = 0.0
+        self.avg_rtt = 0.0
+
+        # Metrics
+        self.send_time = registry.histogram('i2c.send_command')
+        self.retries = registry.counter('i2c.retries')
+        self.failures = registry.counter('i2c.failures')
+
+        if self.bus:
+            self.running = True
+            Thread(target=self._link_loop, daemon=True).start()
+
+    def send_command(self, throttle, steering, gate_control, trace=None):
         """
-        Send command to Raspberry Pi with retry mechanism
+        Queue a command for the Raspberry Pi without blocking
+        Replaces any command that has not been sent yet.
+        trace: optional (rc_received_ns, processed_ns) timestamps, recorded
+        under the frame's sequence number once the frame is sent
         """
         if not self.bus:
             self.logger.error("I2C bus not initialized")
             return False
-            
-        data = [throttle, steering, gate_control]
-        
-        for attempt in range(self.max_retries):
-            try:
-                self.bus.write_i2c_block_data(self.address, 0, data)
-                return True
-            except Exception as e:
-                self.logger.warning(f"I2C write attempt {attempt + 1} failed: {e}")
-                if attempt < self.max_retries - 1:
-                    sleep(self.retry_delay)
-                    
-        self.logger.error("Failed to send command after all retries")
-        return False
-        
+
+        with self.condition:
+            if self.pending is not None:
+                self.commands_coalesced += 1
+            self.pending = [throttle, steering, gate_control]
+            self.pending_trace = trace
+            self.commands_queued += 1
+            self.condition.notify_all()
+        return True
+
+    def _link_loop(self):
+        """Send the latest command, retrying briefly on bus errors"""
+        while self.running:
+            with self.condition:
+                while self.running and self.pending is None:
+                    self.condition.wait()
+                if not self.running:
+                    break
+                data, self.pending = self.pending, None
+                trace = self.pending_trace
+                self.condition.notify_all()
+
+            # Retries reuse the sequence number so the Pi drops duplicates
+            sequence = self.sequence
+            frame = pack_command(sequence, int(monotonic() * 1000), *data)
+            self.sequence = (self.sequence + 1) & 0xFFFF
+
+            for attempt in range(self.max_retries):
+                if self._write(frame):
+                    if tracer.enabled:
+                        self._trace_sent(sequence, trace)
+                    break
+
+                with self.condition:
+                    superseded = self.pending is not None
+                if superseded or attempt == self.max_retries - 1:
+                    # A newer command replaces this one; don't retry stale data
+                    self.commands_failed += 1
+                    self.failures.inc()
+                    break
+
+                self.retry_count += 1
+                self.retries.inc()
+                sleep(self.retry_delay * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    def _write(self, frame):
+        """Write one command frame to the bus and record the round-trip time"""
+        start = perf_counter()
+        try:
+            with self.bus_lock:
+                # The first frame byte travels as the SMBus command byte
+                self.bus.write_i2c_block_data(self.address, frame[0], list(frame[1:]))
+        except Exception as e:
+            self.logger.debug(f"I2C write failed: {e}")
+            return False
+
+        rtt = perf_counter() - start
+        self.send_time.observe(rtt)
+        self.commands_sent += 1
+        alpha = 1.0 if self.commands_sent == 1 else 0.1  # Moving average
+        self.last_rtt = rtt
+        self.avg_rtt += alpha * (rtt - self.avg_rtt)
+        return True
+
+    def _trace_sent(self, sequence, trace):
+        """Record the Jetson-side stages of a sent command under its sequence number"""
+        sent = monotonic_ns()
+        if trace is not None:
+            received, processed = trace
+            if received is not None:
+                tracer.record(sequence, RC_RECEIVED, timestamp=received)
+            tracer.record(sequence, JETSON_PROCESSED, timestamp=processed)
+        tracer.record(sequence, LINK_SENT, timestamp=sent)
+
+    def get_link_stats(self):
+        """Get success rate, retry count and round-trip time of the link"""
+        attempted = self.commands_sent + self.commands_failed
+        return {
+            'queued': self.commands_queued,
+            'sent': self.commands_sent,
+            'coalesced': self.commands_coalesced,
+            'failed': self.commands_failed,
+            'retries': self.retry_count,
+            'success_rate': self.commands_sent / attempted if attempted else 1.0,
+            'last_rtt': self.last_rtt,
+            'avg_rtt': self.avg_rtt,
+        }
+
     def read_response(self):
         """
         Read response from Raspberry Pi
         """
         if not self.bus:
             return None
-            
+
         try:
-            return self.bus.read_i2c_block_data(self.address, 0, 3)
+            with self.bus_lock:
+                return self.bus.read_i2c_block_data(self.address, 0, 3)
         except Exception as e:
             self.logger.error(f"Failed to read I2C response: {e}")
-            return None 
\ No newline at end of file
+            return None
+
+    def close(self, timeout=0.5):
+        """Stop the link thread once the last queued command has been taken"""
+        with self.condition:
+            self.condition.wait_for(lambda: not self.running or self.pending is None, timeout)
+            self.running = False
+            self.condition.notify_all()
@@ -0,0 +1,89 @@
+# video_client.py
+# Reference viewer for the VideoStream binary frame protocol
+import argparse
+import time
+import cv2
+from teleoperation.frame_protocol import CODEC_JPEG, MODE_ADAPTIVE, MODE_DELTA, FrameReader, connect
+from teleoperation.tile_delta import TileReassembler
+from teleoperation.udp_transport import UdpFrameReceiver
+
+
+def main():
+    parser = argparse.ArgumentParser(description="USV video stream viewer")
+    parser.add_argument('--host', default='192.168.1.10')
+    parser.add_argument('--port', type=int, default=5555)
+    parser.add_argument('--profile', default=None, help="Stream profile: full, half or thumbnail")
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument('--delta', action='store_true', help="Inter-frame (changed tiles) stream for slow links")
+    modes.add_argument('--adaptive', action='store_true',
+                       help="Let the server fit quality, resolution and frame rate to the link (--profile is the best allowed)")
+    transports = parser.add_mutually_exclusive_group()
+    transports.add_argument('--udp', action='store_true',
+                            help="Subscribe over UDP (--udp-port): lost datagrams cost a frame, never a stall")
+    transports.add_argument('--multicast', metavar='GROUP:PORT', help="Join a multicast stream set up on the server")
+    parser.add_argument('--udp-port', type=int, default=5556)
+    parser.add_argument('--no-display', action='store_true', help="Only print statistics")
+    args = parser.parse_args()
+
+    mode = MODE_DELTA if args.delta else MODE_ADAPTIVE if args.adaptive else None
+    udp = args.udp or args.multicast
+    if args.multicast:
+        group, port = args.multicast.rsplit(':', 1)
+        reader = sock = UdpFrameReceiver(int(port), group=group)
+        print(f"Joined {args.multicast}")
+    elif args.udp:
+        request = ' '.join(word for word in (args.profile, mode) if word)
+        reader = sock = UdpFrameReceiver(server=(args.host, args.udp_port), request=request)
+        print(f"Subscribed to {args.host}:{args.udp_port}")
+    else:
+        sock = connect(args.host, args.port, args.profile, mode=mode)
+        reader = FrameReader(sock)
+        print(f"Connected to {args.host}:{args.port}")
+    reassembler = TileReassembler()
+
+    frames = 0
+    received = 0
+    last_sequence = None
+    lost = 0
+    window_start = time.time()
+
+    try:
+        while True:
+            header, payload = reader.read_frame()
+            if not udp:
+                if last_sequence is not None:
+                    lost += (header.sequence - last_sequence - 1) & 0xFFFFFFFF
+            elif reader.gap:
+                lost += reader.gap
+                if header.codec != CODEC_JPEG:
+                    # The lost frame's tiles are missing from the picture
+                    reassembler.reset()
+                    reader.request_keyframe()
+            last_sequence = header.sequence
+            frames += 1
+            received += header.length
+
+            if not args.no_display:
+                frame = reassembler.update(header, payload)
+                if frame is not None:
+                    cv2.imshow('USV', frame)
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
+
+            now = time.time()
+            if now - window_start >= 1.0:
+                print(f"{frames / (now - window_start):.1f} fps, "
+                      f"{header.width}x{header.height}, {received // frames} bytes/frame, "
+                      f"{received / (now - window_start) / 1024:.0f} KiB/s, {lost} frames lost")
+                frames = 0
+                received = 0
+                window_start = now
+    except KeyboardInterrupt:
+        print("\nExiting...")
+    finally:
+        sock.close()
+        cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# bench_command_link.py
+# Loopback throughput/latency test of the Jetson -> Pi command link, no hardware needed
+import os
+import random
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.command_link import StreamBus, pack_command
+from common.scheduler import percentile
+from controllers.command_receiver import CommandReceiver
+
+FRAMES = 2000
+
+
+class PtyStream:
+    """Read side of a pseudo-terminal, standing in for a serial port"""
+
+    def __init__(self, fd):
+        self.file = os.fdopen(fd, 'rb', buffering=0)
+
+    def read(self, size):
+        return self.file.read(size)
+
+    def close(self):
+        self.file.close()
+
+
+def make_link(kind):
+    """Returns (sender bus, receiver stream) for a loopback link"""
+    if kind == 'socketpair':
+        tx, rx = socket.socketpair()
+        return StreamBus(tx), rx.makefile('rb', buffering=0)
+
+    master, slave = os.openpty()
+    import tty
+    tty.setraw(slave)
+    return StreamBus(os.fdopen(master, 'wb', buffering=0)), PtyStream(slave)
+
+
+def send(bus, sequence, corrupt=False):
+    frame = bytearray(pack_command(sequence, int(time.monotonic() * 1000), 128, 128, 0))
+    if corrupt:
+        frame[random.randrange(len(frame))] ^= 0xFF
+    bus.write_i2c_block_data(0x08, frame[0], list(frame[1:]))
+
+
+def wait_for(receiver, sequence, timeout=0.1):
+    end = time.perf_counter() + timeout
+    while time.perf_counter() < end:
+        latest = receiver.latest
+        if latest is not None and latest.sequence == sequence:
+            return True
+    return False
+
+
+def run(kind):
+    bus, stream = make_link(kind)
+    receiver = CommandReceiver(stream=stream)
+
+    # Latency: one frame at a time, sender to latest-command slot
+    latencies = []
+    for sequence in range(200):
+        start = time.perf_counter()
+        send(bus, sequence)
+        if wait_for(receiver, sequence):
+            latencies.append(time.perf_counter() - start)
+
+    # Throughput: back-to-back frames
+    accepted = receiver.accepted
+    start = time.perf_counter()
+    for sequence in range(200, 200 + FRAMES):
+        send(bus, sequence)
+    wait_for(receiver, 200 + FRAMES - 1, timeout=2.0)
+    elapsed = time.perf_counter() - start
+    received = receiver.accepted - accepted
+
+    # Robustness: 10% corrupted frames, duplicates and replays
+    base = 200 + FRAMES
+    for sequence in range(base, base + 500):
+        send(bus, sequence, corrupt=random.random() < 0.1)
+        if random.random() < 0.05:
+            send(bus, sequence)         # Duplicate
+        if random.random() < 0.05:
+            send(bus, sequence - 10)    # Stale replay
+    time.sleep(0.2)
+
+    print(f"{kind:10s} latency p50 {percentile(latencies, 50) * 1e6:7.1f} us "
+          f"p99 {percentile(latencies, 99) * 1e6:7.1f} us  "
+          f"throughput {received / elapsed:9.0f} frames/s")
+    print(f"{'':10s} {receiver.get_stats()}")
+    receiver.close()
+
+
+if __name__ == "__main__":
+    for kind in ('socketpair', 'pty'):
+        run(kind)
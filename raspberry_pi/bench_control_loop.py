@@ -0,0 +1,124 @@
+# bench_control_loop.py
+# Run the full USVHardwareController loop headless on simulated hardware at accelerated time
+import os
+import sys
+import time
+from threading import Thread
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.command_link import StreamBus, pack_command
+from common.metrics import registry
+from common.scheduler import percentile
+from hal.sim import SimBackend
+from main import USVHardwareController
+
+SPEED = 5.0             # Simulated seconds per real second
+PHASE_TIME = 10.0       # Simulated seconds per phase
+COMMAND_RATE = 50       # Jetson command frames per simulated second
+CHANGE_PERIOD = 0.5     # Simulated seconds between stick/command changes
+
+
+def output_latency(sim, sent_at, timeout=0.2):
+    """Real seconds from sent_at until the next PWM block write, or None"""
+    end = time.perf_counter() + timeout
+    while time.perf_counter() < end:
+        writes = [written for written, _, _ in list(sim.i2c.history)[-16:] if written >= sent_at]
+        if writes:
+            return min(writes) - sent_at
+        time.sleep(0.0002)
+    return None
+
+
+def jetson_phase(sim):
+    """Commands over the simulated link; returns command-to-PWM latencies"""
+    sim.rc.channels[4] = 1000   # Aux1 low: Jetson in control
+    bus = StreamBus(sim.commands)
+    latencies = []
+    sequence = 0
+    start = sim.clock.monotonic()
+    next_change = start
+    throttle = 128
+    while sim.clock.monotonic() - start < PHASE_TIME:
+        now = sim.clock.monotonic()
+        changed = now >= next_change
+        if changed:
+            throttle = 200 if throttle != 200 else 60
+            next_change = now + CHANGE_PERIOD
+        frame = pack_command(sequence & 0xFFFF, int(now * 1000) & 0xFFFFFFFF, throttle, 128, 0)
+        sent_at = time.perf_counter()
+        bus.write_i2c_block_data(0x08, frame[0], list(frame[1:]))
+        sequence += 1
+        if changed:
+            latency = output_latency(sim, sent_at)
+            if latency is not None:
+                latencies.append(latency)
+        sim.clock.sleep(1.0 / COMMAND_RATE)
+    return latencies
+
+
+def rc_phase(sim):
+    """Direct RC control; returns stick-to-PWM latencies (includes the 7ms iBUS frame period)"""
+    sim.rc.channels[4] = 2000   # Aux1 high: direct RC mode
+    latencies = []
+    start = sim.clock.monotonic()
+    while sim.clock.monotonic() - start < PHASE_TIME:
+        sim.rc.channels[2] = 1900 if sim.rc.channels[2] != 1900 else 1100
+        sent_at = time.perf_counter()
+        latency = output_latency(sim, sent_at)
+        if latency is not None:
+            latencies.append(latency)
+        sim.clock.sleep(CHANGE_PERIOD)
+    return latencies
+
+
+def report(name, latencies):
+    if not latencies:
+        print(f"  {name:24s} no output changes observed")
+        return
+    print(f"  {name:24s} p50 {percentile(latencies, 50) * 1e3:6.2f} ms  "
+          f"p99 {percentile(latencies, 99) * 1e3:6.2f} ms  max {max(latencies) * 1e3:6.2f} ms  "
+          f"({len(latencies)} changes)")
+
+
+def main():
+    sim = SimBackend(speed=SPEED)
+    controller = USVHardwareController(hal=sim)
+    Thread(target=controller.start, daemon=True).start()
+
+    # ESC calibration takes 6 simulated seconds before the loop starts
+    motor_task = controller.scheduler.tasks['motor']
+    while motor_task.runs == 0:
+        time.sleep(0.01)
+
+    real_start = time.perf_counter()
+    sim_start = sim.clock.monotonic()
+    runs_start = motor_task.runs
+    jetson = jetson_phase(sim)
+    rc = rc_phase(sim)
+    real_elapsed = time.perf_counter() - real_start
+    sim_elapsed = sim.clock.monotonic() - sim_start
+    runs = motor_task.runs - runs_start
+
+    stats = motor_task.get_stats()
+    update = registry.histogram('motor.set_thruster_speeds')
+    print(f"{sim_elapsed:.1f} simulated s in {real_elapsed:.1f} real s ({sim_elapsed / real_elapsed:.1f}x)")
+    print(f"  motor loop {runs / sim_elapsed:6.1f} Hz simulated ({runs / real_elapsed:6.0f} Hz real), "
+          f"{stats['overruns']} overruns, {stats['skipped_periods']} skipped periods")
+    print(f"  thruster update p50 {update.percentile(50) * 1e6:6.1f} us  p99 {update.percentile(99) * 1e6:6.1f} us")
+    print(f"  PWM bus {sim.i2c.transactions} transactions, RC frames {controller.receiver.parser.frames}, "
+          f"commands {controller.command_receiver.get_stats()['accepted']}")
+    print(f"  gate {controller.gate_controller.get_state()}")
+    print("Real-time latency to the PWM write:")
+    report('Jetson command', jetson)
+    report('RC stick', rc)
+
+    controller.running = False
+    controller.scheduler.stop()
+    controller.metrics_exporter.stop()
+    controller.command_receiver.close()
+    controller.receiver.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# bench_gate.py
+# Limit-switch reaction time of the gate controller on simulated hardware: edge callbacks vs. supervisor polling alone
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.scheduler import percentile
+from controllers.gate_controller import GateController
+from hal.sim import SimBackend
+
+
+def run_cycles(cycles, speed, edges):
+    """Open and close the gate cycles times; returns (reaction times in real s, overtravel in simulated s)"""
+    sim = SimBackend(speed=speed)
+    gate = GateController(hal=sim)
+    if not edges:
+        for pin in (gate.limit_switch_open, gate.limit_switch_closed):
+            sim.gpio_pins.remove_event_detect(pin)
+    pwm = sim.gpio_pins.pwms[gate.motor_pin]
+
+    reactions = []
+    for cycle in range(cycles):
+        for command, target in ((1, 'open'), (2, 'closed')):
+            gate.control_gate(command)
+            if gate.wait_for_state((target, 'stopped'), timeout=2 * sim.gate.travel_time / speed + 1) != target:
+                print(f"  cycle {cycle}: gate did not reach {target}")
+                continue
+            reactions.append(pwm.changed_at - sim.gate.limit_hit_at)
+    gate.close()
+    return reactions, sim.gate.overtravel
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gate limit-switch reaction time")
+    parser.add_argument('--cycles', type=int, default=10, help="open/close cycles per mode")
+    parser.add_argument('--speed', type=float, default=10.0, help="simulated seconds per real second")
+    args = parser.parse_args()
+    print(f"{args.cycles} open/close cycles at {args.speed}x, switch closed -> motor stopped")
+
+    for name, edges in (('edge callbacks', True), ('supervisor only', False)):
+        reactions, overtravel = run_cycles(args.cycles, args.speed, edges)
+        ms = [reaction * 1e3 for reaction in reactions]
+        print(f"  {name:16s} p50 {percentile(ms, 50):7.3f} ms  p99 {percentile(ms, 99):7.3f} ms  "
+              f"max {max(ms, default=0.0):7.3f} ms (real time)  "
+              f"motor against the stop {overtravel * 1e3 / max(1, len(ms)):.1f} ms per stop (simulated)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# bench_ibus_parser.py
+# Replay benchmark: streaming iBUS parser vs. the old fixed 32-byte reads on noisy byte streams
+import bisect
+import random
+import time
+from controllers.ibus_parser import IBusParser, build_frame
+
+FRAMES = 20000
+FRAME_PERIOD = 0.007  # iBUS sends a frame every 7 ms
+
+
+def generate_stream(noise_rate, seed=0):
+    """
+    Generate iBUS frames with noise
+    Channel 13 carries the frame index so decoded frames can be verified.
+    Returns (chunks as read from the UART, frame indices hit by noise).
+    """
+    rng = random.Random(seed)
+    data = bytearray()
+    noisy = []
+    for index in range(FRAMES):
+        channels = [1000 + rng.randrange(1000) for _ in range(13)] + [index]
+        frame = bytearray(build_frame(channels))
+        if rng.random() < noise_rate:
+            noisy.append(index)
+            if rng.random() < 0.5:
+                frame[rng.randrange(len(frame))] ^= 1 << rng.randrange(8)   # Bit error
+            else:
+                data += bytes(rng.randrange(256) for _ in range(rng.randint(1, 8)))  # Line glitch
+        data += frame
+
+    # Split as a UART driver would deliver it
+    chunks = []
+    position = 0
+    while position < len(data):
+        size = rng.randint(1, 64)
+        chunks.append(bytes(data[position:position + size]))
+        position += size
+    return chunks, noisy
+
+
+def streaming_parser(chunks):
+    parser = IBusParser()
+    decoded = []
+    for chunk in chunks:
+        for channels in parser.feed(chunk):
+            decoded.append(channels[13])
+    return decoded
+
+
+def legacy_parser(chunks):
+    """The old _read_loop: wait for >32 bytes, read 32, check only the header"""
+    pending = bytearray()
+    decoded = []
+    for chunk in chunks:
+        pending += chunk
+        while len(pending) > 32:
+            data = pending[:32]
+            del pending[:32]
+            if data[0] == 0x20 and data[1] == 0x40:
+                decoded.append(int.from_bytes(data[28:30], byteorder='little'))
+    return decoded
+
+
+def recovery_stats(decoded, noisy):
+    """Frames from each noise event until the next correctly decoded frame"""
+    good = sorted(set(index for index in decoded if 0 <= index < FRAMES))
+    recoveries = []
+    for event in noisy:
+        position = bisect.bisect_right(good, event)
+        recoveries.append((good[position] if position < len(good) else FRAMES) - event)
+    return recoveries
+
+
+def run(name, parse, chunks, noisy):
+    start = time.perf_counter()
+    decoded = parse(chunks)
+    elapsed = time.perf_counter() - start
+
+    correct = len(set(index for index in decoded if 0 <= index < FRAMES))
+    recoveries = sorted(recovery_stats(decoded, noisy)) or [0]
+    worst = recoveries[-1] * FRAME_PERIOD * 1e3
+    median = recoveries[len(recoveries) // 2] * FRAME_PERIOD * 1e3
+    print(f"  {name:9s} {len(decoded) / elapsed:9.0f} frames/s  "
+          f"{correct / FRAMES * 100:5.1f}% delivered  "
+          f"recovery median {median:7.1f} ms, worst {worst:8.1f} ms")
+
+
+def main():
+    for noise_rate in (0.0, 0.01, 0.05):
+        chunks, noisy = generate_stream(noise_rate)
+        print(f"{FRAMES} frames, {noise_rate * 100:.0f}% noisy ({len(noisy)} events)")
+        run('streaming', streaming_parser, chunks, noisy)
+        run('legacy', legacy_parser, chunks, noisy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# bench_motor_mixing.py
+# Per-update cost of the allocation-matrix thruster mixer vs. the old per-motor dict path
+# Up to SCALAR_THRUSTERS the mixer runs on precomputed scalar rows and costs about the same as
+# the old path (4.1-5.5 us against 4.4-5.5 us per update for four thrusters on the test
+# machine, run to run); larger layouts use one NumPy operation per step.
+import random
+import time
+import numpy as np
+from controllers.thruster_mixer import ThrusterMixer
+
+UPDATES = 100000
+
+
+class LegacyMixer:
+    """The old MotorController mixing path, minus the PWM writes"""
+
+    def __init__(self):
+        self.motor_channels = {'front_left': 0, 'front_right': 1, 'rear_left': 2, 'rear_right': 3}
+        self.min_pulse = 1100
+        self.max_pulse = 1900
+        self.neutral_pulse = 1500
+        self.max_acceleration = 0.2
+        self.current_powers = {channel: 0 for channel in self.motor_channels.values()}
+        self.duty_cycles = [0] * 4
+
+    def update(self, throttle, steering):
+        left_power = throttle - steering
+        right_power = throttle + steering
+        max_power = max(abs(left_power), abs(right_power))
+        if max_power > 1:
+            left_power /= max_power
+            right_power /= max_power
+        powers = {'front_left': left_power, 'front_right': right_power,
+                  'rear_left': left_power, 'rear_right': right_power}
+
+        for motor, power in powers.items():
+            channel = self.motor_channels[motor]
+            current_power = self.current_powers[channel]
+            power_change = power - current_power
+            if abs(power_change) > self.max_acceleration:
+                power_change = np.sign(power_change) * self.max_acceleration
+            new_power = current_power + power_change
+            self.current_powers[channel] = new_power
+
+            pulse_width = self.neutral_pulse + (new_power * (self.max_pulse - self.min_pulse) / 2)
+            self.duty_cycles[channel] = int((pulse_width / 20000) * 65535)
+        return self.duty_cycles
+
+
+def make_inputs(count, seed=0):
+    rng = random.Random(seed)
+    return [((rng.randrange(256) - 128) / 128, (rng.randrange(256) - 128) / 128) for _ in range(count)]
+
+
+def check_equivalence(inputs):
+    """
+    Compare the differential layout with the old duty cycles
+    The mixer folds pulse width and duty conversion into one multiply-add,
+    which can round a truncated duty one count differently; more than that
+    is an error. Returns the number of updates that differed at all.
+    """
+    legacy = LegacyMixer()
+    mixer = ThrusterMixer('differential')
+    differing = 0
+    for throttle, steering in inputs:
+        expected = list(legacy.update(throttle, steering))
+        actual = mixer.update(throttle, 0.0, steering).tolist()
+        if expected != actual:
+            assert max(abs(a - b) for a, b in zip(expected, actual)) <= 1, (expected, actual)
+            differing += 1
+    return differing
+
+
+def time_per_update(update, inputs):
+    start = time.perf_counter()
+    for throttle, steering in inputs:
+        update(throttle, steering)
+    return (time.perf_counter() - start) / len(inputs)
+
+
+def main():
+    inputs = make_inputs(UPDATES)
+    differing = check_equivalence(inputs)
+    print(f"differential layout within one count of the legacy duty cycles; "
+          f"{differing} of {len(inputs)} updates differ at all")
+
+    legacy = LegacyMixer()
+    differential = ThrusterMixer('differential')
+    vectored = ThrusterMixer('vectored')
+
+    results = [
+        ('legacy dict', time_per_update(legacy.update, inputs)),
+        ('matrix differential', time_per_update(lambda t, s: differential.update(t, 0.0, s), inputs)),
+        ('matrix vectored', time_per_update(lambda t, s: vectored.update(t, s * 0.5, s), inputs)),
+    ]
+    for name, per_update in results:
+        print(f"  {name:20s} {per_update * 1e6:6.2f} us/update  ({1 / per_update:9.0f} updates/s)")
+
+    # Larger thruster counts: 8 still runs on scalar rows, 16 on the NumPy path
+    for count in (8, 16):
+        matrix = np.tile(np.array([[1.0, 1.0, -1.0], [1.0, -1.0, 1.0]]), (count // 2, 1))
+        mixer = ThrusterMixer(matrix)
+        per_update = time_per_update(lambda t, s: mixer.update(t, 0.0, s), inputs)
+        print(f"  {f'matrix {count} thrusters':20s} {per_update * 1e6:6.2f} us/update")
+
+
+if __name__ == "__main__":
+    main()
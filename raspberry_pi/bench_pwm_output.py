@@ -0,0 +1,79 @@
+# bench_pwm_output.py
+# I2C transactions and bus time per thruster update: batched block writes vs. one write per channel
+import random
+from controllers.pwm_output import FakeI2CBus, PCA9685Output, LED0_ON_L
+from controllers.thruster_mixer import ThrusterMixer
+
+UPDATES = 10000
+CHANNELS = [0, 1, 2, 3]
+BUS_HZ = 100000            # Standard-mode I2C on the Pi
+
+
+def bus_time(transactions, data_bytes):
+    """Seconds on the wire: start, address, register, data, 9 bits per byte"""
+    return (transactions * 3 + data_bytes) * 9 / BUS_HZ
+
+
+class PerChannelOutput:
+    """The old path: the Adafruit driver writes each channel's registers separately"""
+
+    def __init__(self, bus, address=0x40):
+        self.bus = bus
+        self.address = address
+
+    def set_duty_cycles(self, channels, duty_cycles):
+        for channel, duty_cycle in zip(channels, duty_cycles):
+            count = (int(duty_cycle) + 1) >> 4
+            self.bus.write_i2c_block_data(self.address, LED0_ON_L + 4 * channel,
+                                          [0, 0, count & 0xFF, count >> 8])
+
+
+def command_stream(seed=0):
+    """Stick input as the control loop sees it: long holds with occasional moves"""
+    rng = random.Random(seed)
+    throttle = steering = 0.0
+    commands = []
+    for _ in range(UPDATES):
+        if rng.random() < 0.05:
+            throttle = rng.uniform(-1, 1)
+            steering = rng.uniform(-0.5, 0.5)
+        commands.append((throttle, steering))
+    return commands
+
+
+def run(name, output, bus, commands):
+    mixer = ThrusterMixer('differential')
+    transactions = bus.transactions
+    written = bus.bytes_written
+    for throttle, steering in commands:
+        output.set_duty_cycles(CHANNELS, mixer.update(throttle, 0.0, steering).tolist())
+    transactions = bus.transactions - transactions
+    written = bus.bytes_written - written
+    per_update = bus_time(transactions, written) / len(commands)
+    print(f"  {name:12s} {transactions / len(commands):5.2f} transactions/update  "
+          f"{written / len(commands):5.1f} bytes/update  {per_update * 1e6:6.0f} us bus time/update")
+    return bus
+
+
+def main():
+    commands = command_stream()
+
+    legacy_bus = FakeI2CBus()
+    run('per-channel', PerChannelOutput(legacy_bus), legacy_bus, commands)
+
+    batched_bus = FakeI2CBus()
+    output = PCA9685Output(batched_bus)
+    run('batched', output, batched_bus, commands)
+    print(f"  {'':12s} {output.get_stats()}")
+
+    # Both paths must leave the same values in the chip
+    for channel in CHANNELS:
+        assert legacy_bus.off_count(0x40, channel) == batched_bus.off_count(0x40, channel)
+
+    # Skew: per-channel writes update the front and rear thrusters in
+    # separate transactions; a block write latches all of them at its STOP
+    print(f"front-to-rear skew: per-channel {bus_time(3, 12) * 1e6:.0f} us, batched 0 us")
+
+
+if __name__ == "__main__":
+    main()
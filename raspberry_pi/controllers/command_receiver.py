@@ -0,0 +1,127 @@
+import logging
+import time
+from threading import Lock, Thread
+from common.command_link import CommandParser, sequence_newer
+from common.trace import PI_RECEIVED, tracer
+from hal.backend import get_backend
+
+
+class CommandReceiver:
+    """
+    Receive command frames from the Jetson on a background thread
+    Valid frames go into a latest-command slot; corrupt frames are dropped
+    by the parser and duplicate or out-of-order sequence numbers are
+    rejected here. The control loop takes each new command once with
+    take_command().
+    """
+
+    def __init__(self, i2c_address=0x08, port=None, baudrate=115200, stream=None, hal=None):
+        """
+        Link selection: an explicit stream (anything with read(size)), else a
+        serial port if port is given, else the I2C slave at i2c_address.
+        hal: hardware backend providing the port or slave (default: the
+        process-wide one)
+        """
+        self.logger = logging.getLogger('CommandReceiver')
+        self.hal = hal or get_backend()
+        self.clock = self.hal.clock
+        self.parser = CommandParser()
+        self.stream = stream
+        self.running = False
+
+        # Latest-command slot
+        self.data_lock = Lock()
+        self.latest = None
+        self.latest_time = 0.0
+        self.taken_sequence = None
+        self.max_age = 0.2        # Commands older than this are stale
+        self.resync_timeout = 0.5  # Accept any sequence after this long (sender restarted)
+
+        # Statistics
+        self.accepted = 0
+        self.duplicates = 0
+        self.out_of_order = 0
+
+        try:
+            if self.stream is None:
+                if port:
+                    self.stream = self.hal.open_serial(port=port, baudrate=baudrate, timeout=0.05)
+                else:
+                    self.stream = self.hal.command_stream(i2c_address)
+            self.running = True
+            Thread(target=self._read_loop, daemon=True).start()
+            self.logger.info("Command receiver initialized successfully")
+        except Exception as e:
+            self.logger.error(f"Failed to initialize command receiver: {e}")
+
+    def _read_chunk(self):
+        """Block for at least one byte, then take everything available"""
+        waiting = getattr(self.stream, 'in_waiting', None)
+        if waiting is None:
+            return self.stream.read(256)
+        return self.stream.read(max(1, waiting))
+
+    def _read_loop(self):
+        """Continuous reading loop for command frames"""
+        while self.running:
+            try:
+                data = self._read_chunk()
+                if not data:
+                    continue
+                now = self.clock.monotonic()
+                for command in self.parser.feed(data):
+                    self._accept(command, now)
+            except Exception as e:
+                if self.running:
+                    self.logger.error(f"Error reading commands: {e}")
+                    time.sleep(0.1)
+
+    def _accept(self, command, now):
+        """Store a command if it is newer than the last one"""
+        with self.data_lock:
+            if self.latest is not None and now - self.latest_time < self.resync_timeout:
+                if command.sequence == self.latest.sequence:
+                    self.duplicates += 1
+                    return
+                if not sequence_newer(command.sequence, self.latest.sequence):
+                    self.out_of_order += 1
+                    return
+            self.latest = command
+            self.latest_time = now
+            self.accepted += 1
+        tracer.record(command.sequence, PI_RECEIVED)
+
+    def take_command(self):
+        """
+        Get the newest command not taken before
+        Returns (throttle, steering, gate), or None if nothing new has
+        arrived within max_age.
+        """
+        with self.data_lock:
+            command = self.latest
+            if command is None or command.sequence == self.taken_sequence:
+                return None
+            if self.clock.monotonic() - self.latest_time > self.max_age:
+                return None
+            self.taken_sequence = command.sequence
+            return command.throttle, command.steering, command.gate
+
+    def get_stats(self):
+        """Get frame, error and rejection counters"""
+        return {
+            'frames': self.parser.frames,
+            'crc_errors': self.parser.crc_errors,
+            'bytes_discarded': self.parser.bytes_discarded,
+            'accepted': self.accepted,
+            'duplicates': self.duplicates,
+            'out_of_order': self.out_of_order,
+        }
+
+    def close(self):
+        """Clean shutdown of the receiver"""
+        self.running = False
+        if self.stream:
+            try:
+                self.stream.close()
+            except:
+                pass
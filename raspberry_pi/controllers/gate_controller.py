@@ -1,42 +1,82 @@
-import RPi.GPIO as GPIO
 import logging
-import time
-from threading import Lock
+from collections import deque
+from threading import Condition, Thread
+from hal.backend import get_backend
+
+# Gate motor PWM pin, in order of preference; boards before the Pi 4 put
+# the command link's I2C slave on GPIO 18/19
+GATE_MOTOR_PINS = (18, 12)
 
 class GateController:
-    def __init__(self, motor_pin=18, limit_switch_open=23, limit_switch_closed=24):
+    """
+    Gate motor with limit switches
+    The limit switches stop the motor from edge callbacks the moment they
+    close, and a low-rate supervisor thread enforces max_operation_time and
+    re-checks the switches in case an edge was missed, so nothing in the
+    main loop has to poll GPIO. State changes are published as events.
+    """
+        
+    def __init__(self, motor_pin=None, limit_switch_open=23, limit_switch_closed=24, hal=None,
+                 supervisor_rate=10):
+        """
+        motor_pin: BCM pin of the motor PWM; defaults to the first of
+        GATE_MOTOR_PINS the command link leaves free
+        supervisor_rate: supervisor checks per second
+        """
         self.logger = logging.getLogger('GateController')
+        self.hal = hal or get_backend()
+        self.clock = self.hal.clock
         
         # Pin configuration
+        link_pins = set(self.hal.command_link_pins())
+        if motor_pin is None:
+            motor_pin = next(pin for pin in GATE_MOTOR_PINS if pin not in link_pins)
         self.motor_pin = motor_pin
         self.limit_switch_open = limit_switch_open
         self.limit_switch_closed = limit_switch_closed
+        clash = {motor_pin, limit_switch_open, limit_switch_closed} & link_pins
+        if clash:
+            raise ValueError(f"Gate pins {sorted(clash)} are used by the Jetson command link")
         
         # Initialize GPIO
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setup(self.motor_pin, GPIO.OUT)
-        GPIO.setup(self.limit_switch_open, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-        GPIO.setup(self.limit_switch_closed, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+        self.gpio = self.hal.gpio()
+        self.gpio.setmode(self.gpio.BCM)
+        self.gpio.setup(self.motor_pin, self.gpio.OUT)
+        self.gpio.setup(self.limit_switch_open, self.gpio.IN, pull_up_down=self.gpio.PUD_UP)
+        self.gpio.setup(self.limit_switch_closed, self.gpio.IN, pull_up_down=self.gpio.PUD_UP)
         
         # Create PWM object for motor control
-        self.motor_pwm = GPIO.PWM(self.motor_pin, 100)  # 100Hz PWM frequency
+        self.motor_pwm = self.gpio.PWM(self.motor_pin, 100)  # 100Hz PWM frequency
         self.motor_pwm.start(0)
         
         # State tracking
-        self.current_state = "unknown"  # unknown, opening, closing, open, closed
+        self.current_state = "unknown"  # unknown, opening, closing, open, closed, stopped
         self.last_command = 0
-        self.command_lock = Lock()
+        self.state_condition = Condition()  # Guards commands and state; notified on every change
+        self.events = deque(maxlen=100)  # (time, state) per state change
+        self.listeners = []  # Called with (state) on every change
         
         # Timing parameters
         self.max_operation_time = 5.0  # Maximum time for open/close operation
         self.operation_start_time = 0
+        self.timeouts = 0
+        
+        # Switches are active low: a falling edge means one just closed
+        with self.state_condition:
+            self._check_limits()
+        for pin in (self.limit_switch_open, self.limit_switch_closed):
+            self.gpio.add_event_detect(pin, self.gpio.FALLING, callback=self._on_limit_switch, bouncetime=20)
+            
+        self.supervisor_period = 1.0 / supervisor_rate
+        self.running = True
+        Thread(target=self._supervise, daemon=True).start()
         
     def control_gate(self, command):
         """
         Control gate based on command
         command: 0 = Stop, 1 = Open, 2 = Close
         """
-        with self.command_lock:
+        with self.state_condition:
             try:
                 if command == self.last_command:
                     return
@@ -57,55 +97,103 @@ class GateController:
     def _open_gate(self):
         """Open the gate"""
         if self._is_fully_open():
-            self._stop_gate()
+            self._stop_gate("open")
             return
             
-        self.current_state = "opening"
-        self.operation_start_time = time.time()
+        self._set_state("opening")
+        self.operation_start_time = self.clock.time()
         self.motor_pwm.ChangeDutyCycle(100)  # Full power to open
         
     def _close_gate(self):
         """Close the gate"""
         if self._is_fully_closed():
-            self._stop_gate()
+            self._stop_gate("closed")
             return
             
-        self.current_state = "closing"
-        self.operation_start_time = time.time()
+        self._set_state("closing")
+        self.operation_start_time = self.clock.time()
         self.motor_pwm.ChangeDutyCycle(-100)  # Full power to close
         
-    def _stop_gate(self):
+    def _stop_gate(self, state="stopped"):
         """Stop gate movement"""
         self.motor_pwm.ChangeDutyCycle(0)
-        self.current_state = "stopped"
+        self._set_state(state)
         
+    def _set_state(self, state):
+        """Record a state change and notify waiters and listeners (state_condition held)"""
+        if state == self.current_state:
+            return
+        self.current_state = state
+        self.events.append((self.clock.time(), state))
+        self.state_condition.notify_all()
+        for listener in self.listeners:
+            try:
+                listener(state)
+            except Exception as e:
+                self.logger.error(f"Gate state listener failed: {e}")
+                
+    def _on_limit_switch(self, pin):
+        """Edge callback: stop the motor as soon as the switch in its direction closes"""
+        with self.state_condition:
+            self._check_limits()
+            
+    def _check_limits(self):
+        """Stop at a closed limit switch in the direction of travel (state_condition held)"""
+        if self.current_state in ("opening", "unknown") and self._is_fully_open():
+            self._stop_gate("open")
+        elif self.current_state in ("closing", "unknown") and self._is_fully_closed():
+            self._stop_gate("closed")
+            
     def _is_fully_open(self):
         """Check if gate is fully open"""
-        return not GPIO.input(self.limit_switch_open)
+        return not self.gpio.input(self.limit_switch_open)
         
     def _is_fully_closed(self):
         """Check if gate is fully closed"""
-        return not GPIO.input(self.limit_switch_closed)
+        return not self.gpio.input(self.limit_switch_closed)
         
     def _check_timeout(self):
         """Check if operation has timed out"""
         if self.current_state in ["opening", "closing"]:
-            if time.time() - self.operation_start_time > self.max_operation_time:
+            if self.clock.time() - self.operation_start_time > self.max_operation_time:
                 self.logger.warning("Gate operation timed out")
+                self.timeouts += 1
                 self._stop_gate()
                 return True
         return False
         
+    def _supervise(self):
+        """Enforce the operation timeout and catch missed edges while the gate moves"""
+        while self.running:
+            self.clock.sleep(self.supervisor_period)
+            with self.state_condition:
+                if self.current_state in ("opening", "closing"):
+                    try:
+                        self._check_limits()
+                        self._check_timeout()
+                    except Exception as e:
+                        self.logger.error(f"Gate supervisor error: {e}")
+                        self._stop_gate()
+                        
+    def add_listener(self, callback):
+        """Call callback(state) on every state change, from the thread that made it"""
+        self.listeners.append(callback)
+        
+    def wait_for_state(self, states, timeout=None):
+        """Block until the state is one of states; returns the state, or None on timeout"""
+        with self.state_condition:
+            if self.state_condition.wait_for(lambda: self.current_state in states, timeout):
+                return self.current_state
+            return None
+            
     def get_state(self):
         """Get current gate state"""
-        if self._is_fully_open():
-            return "open"
-        elif self._is_fully_closed():
-            return "closed"
-        else:
-            return self.current_state
-            
+        return self.current_state
+        
     def close(self):
         """Cleanup GPIO"""
+        self.running = False
+        for pin in (self.limit_switch_open, self.limit_switch_closed):
+            self.gpio.remove_event_detect(pin)
         self.motor_pwm.stop()
-        GPIO.cleanup([self.motor_pin, self.limit_switch_open, self.limit_switch_closed]) 
\ No newline at end of file
+        self.gpio.cleanup([self.motor_pin, self.limit_switch_open, self.limit_switch_closed])
\ No newline at end of file
@@ -0,0 +1,76 @@
+import struct
+
+# FlySky iBUS servo frame (115200 baud, one frame every 7 ms):
+#   0x20 0x40, 14 channels as uint16 little-endian, checksum uint16 little-endian
+# checksum = 0xFFFF - sum of the first 30 bytes
+IBUS_HEADER = b'\x20\x40'
+IBUS_FRAME_LENGTH = 32
+IBUS_CHANNEL_COUNT = 14
+IBUS_PAYLOAD = struct.Struct('<14HH')  # Channels and checksum, after the header
+
+
+class IBusParser:
+    """
+    Incremental iBUS parser
+    Accepts bytes in any chunking, hunts for the header, validates the
+    checksum and decodes all channels with one struct call. On a bad
+    checksum it resynchronises one byte further on, so a glitch costs at
+    most the frame it hit.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+        # Statistics
+        self.frames = 0
+        self.checksum_errors = 0
+        self.bytes_discarded = 0
+
+    def feed(self, data):
+        """
+        Add received bytes
+        Returns the list of valid frames completed by this data, each a
+        tuple of 14 channel values.
+        """
+        buffer = self.buffer
+        buffer += data
+        frames = []
+        start = 0
+
+        while True:
+            header = buffer.find(IBUS_HEADER, start)
+            if header < 0:
+                # Keep a trailing 0x20; it may start the next frame
+                keep = 1 if start < len(buffer) and buffer[-1] == IBUS_HEADER[0] else 0
+                self.bytes_discarded += len(buffer) - start - keep
+                start = len(buffer) - keep
+                break
+
+            self.bytes_discarded += header - start
+            start = header
+            if len(buffer) - start < IBUS_FRAME_LENGTH:
+                break
+
+            values = IBUS_PAYLOAD.unpack_from(buffer, start + 2)
+            frame = memoryview(buffer)[start:start + IBUS_FRAME_LENGTH - 2]
+            valid = (0xFFFF - sum(frame)) & 0xFFFF == values[IBUS_CHANNEL_COUNT]
+            frame.release()
+
+            if not valid:
+                self.checksum_errors += 1
+                self.bytes_discarded += 1
+                start += 1
+                continue
+
+            frames.append(values[:IBUS_CHANNEL_COUNT])
+            self.frames += 1
+            start += IBUS_FRAME_LENGTH
+
+        del buffer[:start]
+        return frames
+
+
+def build_frame(channels):
+    """Encode 14 channel values as an iBUS frame (for tests and replay)"""
+    body = IBUS_HEADER + struct.pack('<14H', *channels)
+    return body + struct.pack('<H', (0xFFFF - sum(body)) & 0xFFFF)
@@ -1,19 +1,33 @@
-from adafruit_pca9685 import PCA9685
-import board
-import busio
 import logging
-import numpy as np
-from time import sleep
+from time import perf_counter
+from common.metrics import registry
+from common.trace import FLOW_LINK, MIXED, PWM_WRITTEN, tracer
+from hal.backend import get_backend
+from .pwm_output import PCA9685Output
+from .thruster_mixer import ThrusterMixer
 
 class MotorController:
-    def __init__(self):
+    def __init__(self, layout='differential', bus_number=1, bus=None, hal=None, clock=None):
+        """
+        layout: thruster allocation, a name from MIXER_LAYOUTS ('differential',
+        'vectored') or an (N, 3) matrix with rows in motor_channels order
+        bus: optional SMBus-compatible object, e.g. a FakeI2CBus for testing
+        without hardware; otherwise I2C bus bus_number is opened
+        hal: hardware backend (default: the process-wide one)
+        clock: time source for the acceleration limit, with a monotonic()
+        function (default: the hal's); a replay passes one that follows the
+        recorded timestamps
+        """
         self.logger = logging.getLogger('MotorController')
+        self.hal = hal or get_backend()
+        self.clock = clock or self.hal.clock
+        self.update_time = registry.histogram('motor.set_thruster_speeds')
         
         # Initialize I2C and PCA9685
         try:
-            i2c = busio.I2C(board.SCL, board.SDA)
-            self.pwm = PCA9685(i2c)
-            self.pwm.frequency = 50
+            if bus is None:
+                bus = self.hal.i2c_bus(bus_number)
+            self.pwm = PCA9685Output(bus, frequency=50)
             self.initialized = True
         except Exception as e:
             self.logger.error(f"Failed to initialize PCA9685: {e}")
@@ -34,32 +48,49 @@ class MotorController:
         
         # Safety features
         self.emergency_stop_active = False
-        self.max_acceleration = 0.2  # Maximum change in power per update
-        self.current_powers = {channel: 0 for channel in self.motor_channels.values()}
+        self.max_acceleration = 0.2  # Maximum change in power per update_period
+        self.update_period = 0.01  # The 100Hz motor tick; direct RC frames come faster
+        self.last_update = None
+        
+        # Mixing, acceleration limiting and duty conversion for all thrusters at once
+        self.mixer = ThrusterMixer(layout, self.max_acceleration,
+                                   self.min_pulse, self.max_pulse, self.neutral_pulse)
+        self.channel_list = list(self.motor_channels.values())
+        if len(self.mixer.matrix) != len(self.channel_list):
+            raise ValueError(f"Allocation matrix has {len(self.mixer.matrix)} rows for "
+                             f"{len(self.channel_list)} motor channels")
+        self.current_powers = self.mixer.powers  # Per thruster, motor_channels order
+        self.neutral_duty = self.mixer.pulse_to_duty(self.neutral_pulse)
         
-    def set_thruster_speeds(self, throttle, steering):
+    def set_thruster_speeds(self, throttle, steering, lateral=128, trace=None, flow=FLOW_LINK):
         """
-        Set thruster speeds based on throttle and steering inputs
+        Set thruster speeds based on throttle, steering and lateral inputs
         throttle: 0-255 (128 is neutral)
         steering: 0-255 (128 is neutral)
+        lateral: 0-255 (128 is neutral), sway; ignored by the differential layout
+        trace: trace id of the command (see common/trace.py), if traced
         """
         if not self.initialized or self.emergency_stop_active:
             return False
             
+        start = perf_counter()
         try:
-            # Normalize inputs to -1 to 1
-            throttle = (throttle - 128) / 128
-            steering = (steering - 128) / 128
+            # The acceleration limit is a rate: updates closer together than
+            # update_period get a proportional share of it (never more than one)
+            now = self.clock.monotonic()
+            step = 1.0 if self.last_update is None else min(1.0, (now - self.last_update) / self.update_period)
+            self.last_update = now
             
-            # Calculate motor powers using mixing algorithm
-            powers = self._mix_powers(throttle, steering)
-            
-            # Apply power to each motor with acceleration limiting
-            for motor, power in powers.items():
-                channel = self.motor_channels[motor]
-                limited_power = self._limit_acceleration(channel, power)
-                self._set_motor_power(channel, limited_power)
-                
+            # Normalize inputs to -1 to 1 and run them through the mixer
+            duty_cycles = self.mixer.update((throttle - 128) / 128,
+                                            (lateral - 128) / 128,
+                                            (steering - 128) / 128,
+                                            step)
+            if trace is not None:
+                tracer.record(trace, MIXED, flow)
+            self._set_duty_cycles(duty_cycles)
+            if trace is not None:
+                tracer.record(trace, PWM_WRITTEN, flow)
             return True
             
         except Exception as e:
@@ -67,61 +98,22 @@ class MotorController:
             self.emergency_stop()
             return False
             
-    def _mix_powers(self, throttle, steering):
-        """
-        Mix throttle and steering commands for differential drive
-        Returns dict of motor powers (-1 to 1)
-        """
-        left_power = throttle - steering
-        right_power = throttle + steering
-        
-        # Normalize if any power exceeds [-1, 1]
-        max_power = max(abs(left_power), abs(right_power))
-        if max_power > 1:
-            left_power /= max_power
-            right_power /= max_power
+        finally:
+            self.update_time.observe(perf_counter() - start)
             
-        return {
-            'front_left': left_power,
-            'front_right': right_power,
-            'rear_left': left_power,
-            'rear_right': right_power
-        }
-        
-    def _limit_acceleration(self, channel, target_power):
-        """Limit acceleration to prevent sudden changes"""
-        current_power = self.current_powers[channel]
-        power_change = target_power - current_power
-        
-        if abs(power_change) > self.max_acceleration:
-            power_change = np.sign(power_change) * self.max_acceleration
+    def _set_duty_cycles(self, duty_cycles, force=False):
+        """Write one duty cycle per thruster (motor_channels order) in one transaction"""
+        self.pwm.set_duty_cycles(self.channel_list, duty_cycles.tolist(), force)
             
-        new_power = current_power + power_change
-        self.current_powers[channel] = new_power
-        return new_power
-        
-    def _set_motor_power(self, channel, power):
-        """
-        Set motor power (-1 to 1) for given channel
-        Converts power to appropriate PWM pulse width
-        """
-        # Convert power to pulse width
-        pulse_range = self.max_pulse - self.min_pulse
-        pulse_width = self.neutral_pulse + (power * pulse_range / 2)
-        
-        # Convert pulse width to duty cycle
-        duty_cycle = int((pulse_width / 20000) * 65535)
-        
-        # Set PWM
-        self.pwm.channels[channel].duty_cycle = duty_cycle
-        
     def emergency_stop(self):
         """Emergency stop all motors"""
         self.emergency_stop_active = True
         if self.initialized:
-            for channel in self.motor_channels.values():
-                self.pwm.channels[channel].duty_cycle = int((self.neutral_pulse / 20000) * 65535)
-                self.current_powers[channel] = 0
+            try:
+                self.pwm.set_duty_cycles(self.channel_list, [self.neutral_duty] * len(self.channel_list), force=True)
+            except Exception as e:
+                self.logger.error(f"Failed to write emergency stop: {e}")
+        self.mixer.reset()
                 
     def resume(self):
         """Resume normal operation after emergency stop"""
@@ -134,19 +126,16 @@ class MotorController:
             
         try:
             # Set max pulse
-            for channel in self.motor_channels.values():
-                self.pwm.channels[channel].duty_cycle = int((self.max_pulse / 20000) * 65535)
-            sleep(2)
+            self.pwm.set_duty_cycles(self.channel_list, [self.mixer.pulse_to_duty(self.max_pulse)] * len(self.channel_list), force=True)
+            self.hal.clock.sleep(2)
             
             # Set min pulse
-            for channel in self.motor_channels.values():
-                self.pwm.channels[channel].duty_cycle = int((self.min_pulse / 20000) * 65535)
-            sleep(2)
+            self.pwm.set_duty_cycles(self.channel_list, [self.mixer.pulse_to_duty(self.min_pulse)] * len(self.channel_list), force=True)
+            self.hal.clock.sleep(2)
             
             # Set neutral
-            for channel in self.motor_channels.values():
-                self.pwm.channels[channel].duty_cycle = int((self.neutral_pulse / 20000) * 65535)
-            sleep(2)
+            self.pwm.set_duty_cycles(self.channel_list, [self.neutral_duty] * len(self.channel_list), force=True)
+            self.hal.clock.sleep(2)
             
             return True
             
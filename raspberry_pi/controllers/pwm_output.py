@@ -0,0 +1,150 @@
+import time
+
+# PCA9685 registers
+MODE1 = 0x00
+PRESCALE = 0xFE
+LED0_ON_L = 0x06           # Each channel has ON_L, ON_H, OFF_L, OFF_H
+MODE1_SLEEP = 0x10
+MODE1_AUTO_INCREMENT = 0x20
+MODE1_RESTART = 0x80
+FULL_ON = 0x1000           # Bit 4 of ON_H/OFF_H
+REFERENCE_CLOCK = 25000000
+MAX_BLOCK = 32             # SMBus block write limit, 8 channels
+
+
+class PCA9685Output:
+    """
+    PCA9685 PWM output with batched register writes
+    All channels are set together: the on/off counts for the changed
+    channels go out in one auto-increment block write, so the thrusters
+    update in a single I2C transaction and unchanged channels cost nothing.
+    Duty cycles are 16-bit, as with the Adafruit driver.
+    """
+
+    def __init__(self, bus, address=0x40, frequency=50):
+        """
+        bus: SMBus-compatible object (write_byte_data, write_i2c_block_data)
+        """
+        self.bus = bus
+        self.address = address
+        self.counts = {}       # Channel -> last 12-bit off count written
+
+        # Statistics
+        self.transactions = 0
+        self.skipped = 0
+
+        self.set_frequency(frequency)
+
+    def set_frequency(self, frequency):
+        """Set the PWM frequency; the chip must sleep while the prescaler changes"""
+        prescale = int(REFERENCE_CLOCK / 4096.0 / frequency + 0.5)
+        if prescale < 3:
+            raise ValueError("PCA9685 cannot output that frequency")
+        self._write_byte(MODE1, MODE1_SLEEP)
+        self._write_byte(PRESCALE, prescale)
+        self._write_byte(MODE1, 0x00)
+        time.sleep(0.005)  # Oscillator start-up
+        self._write_byte(MODE1, MODE1_RESTART | MODE1_AUTO_INCREMENT)
+        self.frequency = frequency
+        self.counts.clear()
+
+    def set_duty_cycles(self, channels, duty_cycles, force=False):
+        """
+        Set several channels at once
+        channels: channel numbers; duty_cycles: matching 16-bit duty cycles.
+        Channels whose output would not change are skipped unless force is
+        set; the rest are written as one block covering the lowest to
+        highest changed channel.
+        """
+        changed = {}
+        for channel, duty_cycle in zip(channels, duty_cycles):
+            count = 0xFFFF if duty_cycle >= 0xFFFF else (int(duty_cycle) + 1) >> 4
+            if force or self.counts.get(channel) != count:
+                changed[channel] = count
+
+        if not changed:
+            self.skipped += 1
+            return 0
+
+        # Unchanged channels inside the span are rewritten with their current
+        # value; a channel this object never set splits the block instead.
+        # A block's counts are only cached once its write went through, so a
+        # failed write is not mistaken for "unchanged" by the next command.
+        last = max(changed)
+        channel = min(changed)
+        while channel <= last:
+            block = channel
+            data = []
+            while channel <= last and (channel in changed or channel in self.counts) and len(data) < MAX_BLOCK:
+                data += self._registers(changed.get(channel, self.counts.get(channel)))
+                channel += 1
+            if data:
+                try:
+                    self.bus.write_i2c_block_data(self.address, LED0_ON_L + 4 * block, data)
+                except Exception:
+                    for written in range(block, channel):
+                        self.counts.pop(written, None)  # Unknown until written again
+                    raise
+                self.transactions += 1
+                for written in range(block, channel):
+                    if written in changed:
+                        self.counts[written] = changed[written]
+            else:
+                channel += 1
+        return len(changed)
+
+    def set_duty_cycle(self, channel, duty_cycle, force=False):
+        """Set a single channel"""
+        return self.set_duty_cycles((channel,), (duty_cycle,), force)
+
+    @staticmethod
+    def _registers(count):
+        """ON_L, ON_H, OFF_L, OFF_H for a 12-bit off count (0xFFFF is fully on)"""
+        if count == 0xFFFF:
+            return [0x00, FULL_ON >> 8, 0x00, 0x00]
+        return [0x00, 0x00, count & 0xFF, count >> 8]
+
+    def _write_byte(self, register, value):
+        self.bus.write_byte_data(self.address, register, value)
+        self.transactions += 1
+
+    def get_stats(self):
+        """Get transaction counters"""
+        return {'transactions': self.transactions, 'skipped': self.skipped}
+
+    def close(self):
+        """Put the chip to sleep (all outputs off)"""
+        self._write_byte(MODE1, MODE1_SLEEP)
+
+
+class FakeI2CBus:
+    """
+    SMBus stand-in that records register writes and counts transactions
+    For exercising PWM output code without hardware.
+    """
+
+    def __init__(self):
+        self.registers = {}    # (address, register) -> value
+        self.transactions = 0
+        self.bytes_written = 0
+
+    def write_byte_data(self, address, register, value):
+        self.registers[(address, register)] = value
+        self.transactions += 1
+        self.bytes_written += 1
+
+    def write_i2c_block_data(self, address, register, data):
+        if len(data) > MAX_BLOCK:
+            raise ValueError("SMBus block writes are limited to 32 bytes")
+        for offset, value in enumerate(data):
+            self.registers[(address, register + offset)] = value
+        self.transactions += 1
+        self.bytes_written += len(data)
+
+    def off_count(self, address, channel):
+        """12-bit off count currently in a channel's registers"""
+        base = LED0_ON_L + 4 * channel
+        return self.registers.get((address, base + 2), 0) | self.registers.get((address, base + 3), 0) << 8
+
+    def close(self):
+        pass
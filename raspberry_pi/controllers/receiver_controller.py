@@ -1,11 +1,36 @@
-import serial
 import logging
-from threading import Thread, Lock
+from threading import Condition, Thread, Lock
 import time
+from common.trace import FLOW_RC, RC_RECEIVED, tracer
+from hal.backend import get_backend
+from .ibus_parser import IBusParser
+
+class RCFrame:
+    """
+    One received RC frame, normalized once on arrival
+    Mapped channels are 0-255; channels holds the raw 1000-2000 values.
+    """
+    __slots__ = ('sequence', 'timestamp', 'channels', 'steering', 'throttle', 'aux1', 'aux2', 'gate')
+    
+    def __init__(self):
+        self.sequence = -1
+        self.timestamp = 0.0
+        self.channels = ()
+        self.steering = 128
+        self.throttle = 128
+        self.aux1 = 0
+        self.aux2 = 0
+        self.gate = 0
+        
+    def get(self, name, default=None):
+        """Dict-style access to a mapped channel"""
+        return getattr(self, name, default)
 
 class ReceiverController:
-    def __init__(self, port="/dev/serial0", baudrate=115200):
+    def __init__(self, port="/dev/serial0", baudrate=115200, hal=None):
         self.logger = logging.getLogger('ReceiverController')
+        self.hal = hal or get_backend()
+        self.clock = self.hal.clock
         
         # Serial configuration
         self.port = port
@@ -25,6 +50,16 @@ class ReceiverController:
         self.channels = [1500] * 14  # Default to center position
         self.data_lock = Lock()
         self.running = False
+        self.parser = IBusParser()
+        
+        # Frame delivery: a small ring of reusable RCFrame objects. A frame
+        # handed to a consumer stays unchanged until the reader has wrapped
+        # around the ring (three more frames, about 21ms).
+        self._frames = [RCFrame() for _ in range(4)]
+        self._frame_index = 0
+        self._latest = None
+        self.sequence = 0
+        self.frame_condition = Condition(self.data_lock)
         
         # Signal quality monitoring
         self.last_update = 0
@@ -35,7 +70,7 @@ class ReceiverController:
     def _initialize_serial(self):
         """Initialize serial connection to receiver"""
         try:
-            self.serial = serial.Serial(
+            self.serial = self.hal.open_serial(
                 port=self.port,
                 baudrate=self.baudrate,
                 timeout=0.1
@@ -56,46 +91,75 @@ class ReceiverController:
         """Continuous reading loop for iBUS data"""
         while self.running:
             try:
-                if self.serial.in_waiting > 32:
-                    data = self.serial.read(32)
+                # Block until at least one byte arrives (or the serial
+                # timeout expires), then take everything that is waiting
+                data = self.serial.read(max(1, self.serial.in_waiting))
+                if not data:
+                    continue
                     
-                    # Verify iBUS protocol header
-                    if data[0] == 0x20 and data[1] == 0x40:
-                        with self.data_lock:
-                            # Parse channel data
-                            for i in range(14):
-                                self.channels[i] = int.from_bytes(
-                                    data[2+2*i:4+2*i], 
-                                    byteorder='little'
-                                )
-                            self.last_update = time.time()
-                            
+                frames = self.parser.feed(data)
+                if frames:
+                    self._publish(frames[-1])  # Newest frame wins
+                        
             except Exception as e:
                 self.logger.error(f"Error reading RC data: {e}")
                 time.sleep(0.1)
                 
+    def _publish(self, channels):
+        """Normalize a frame once and wake anyone waiting for it"""
+        frame = self._frames[self._frame_index]
+        self._frame_index = (self._frame_index + 1) % len(self._frames)
+        
+        frame.timestamp = self.clock.time()
+        frame.channels = channels
+        for name, channel in self.channel_map.items():
+            setattr(frame, name, self._normalize_channel(channels[channel]))
+            
+        with self.frame_condition:
+            frame.sequence = self.sequence
+            self.sequence += 1
+            self.channels[:] = channels
+            self.last_update = frame.timestamp
+            self._latest = frame
+            self.frame_condition.notify_all()
+        tracer.record(frame.sequence, RC_RECEIVED, FLOW_RC)
+            
+    def latest_frame(self):
+        """Get the newest RCFrame, or None if the signal has timed out"""
+        frame = self._latest
+        if frame is None or self.clock.time() - frame.timestamp > self.signal_timeout:
+            return None
+        return frame
+        
+    def wait_for_frame(self, after_sequence=-1, timeout=None):
+        """
+        Wait for an RC frame newer than after_sequence
+        Returns the newest RCFrame, or None on timeout or shutdown.
+        """
+        with self.frame_condition:
+            self.frame_condition.wait_for(
+                lambda: not self.running or
+                (self._latest is not None and self._latest.sequence > after_sequence),
+                timeout
+            )
+            frame = self._latest
+        if frame is None or frame.sequence <= after_sequence:
+            return None
+        return frame
+        
     def read_channels(self):
         """
         Read current channel values
-        Returns dict of channel values mapped to functions
+        Returns the newest RCFrame (supports dict-style get()), or None
         """
         if not self.running:
             return None
             
         # Check signal timeout
-        if time.time() - self.last_update > self.signal_timeout:
-            self.logger.warning("RC signal timeout")
-            return None
-            
-        with self.data_lock:
-            try:
-                return {
-                    name: self._normalize_channel(self.channels[channel])
-                    for name, channel in self.channel_map.items()
-                }
-            except Exception as e:
-                self.logger.error(f"Error processing channel data: {e}")
-                return None
+        frame = self.latest_frame()
+        if frame is None:
+            self.logger.warning("RC signal timeout", extra={'rate_limit': 'rc_signal_timeout'})
+        return frame
                 
     def _normalize_channel(self, value):
         """
@@ -110,7 +174,9 @@ class ReceiverController:
         
     def close(self):
         """Clean shutdown of receiver"""
-        self.running = False
+        with self.frame_condition:
+            self.running = False
+            self.frame_condition.notify_all()
         if self.serial:
             try:
                 self.serial.close()
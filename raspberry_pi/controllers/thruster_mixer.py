@@ -0,0 +1,140 @@
+import numpy as np
+
+# Allocation matrices: one row per thruster (front_left, front_right,
+# rear_left, rear_right), columns are (surge, sway, yaw) demands in -1..1.
+# Positive yaw drives the right side harder, matching the original
+# left = throttle - steering, right = throttle + steering mix.
+MIXER_LAYOUTS = {
+    # Four fixed fore-aft thrusters, skid steering; sway is not available
+    'differential': [
+        [1.0, 0.0, -1.0],
+        [1.0, 0.0, 1.0],
+        [1.0, 0.0, -1.0],
+        [1.0, 0.0, 1.0],
+    ],
+    # Vectored X: corner thrusters angled 45 degrees, giving sway as well.
+    # Flip the sway column if the thrusters are mounted the other way round.
+    'vectored': [
+        [1.0, 1.0, -1.0],
+        [1.0, -1.0, 1.0],
+        [1.0, -1.0, -1.0],
+        [1.0, 1.0, 1.0],
+    ],
+}
+
+# Up to this many thrusters, plain float arithmetic over the matrix rows
+# is faster than NumPy's per-call overhead; above it each step is one
+# array operation
+SCALAR_THRUSTERS = 8
+
+
+class ThrusterMixer:
+    """
+    Map surge/sway/yaw demands to per-thruster PWM duty cycles
+    Mixing, saturation, acceleration limiting and pulse-to-duty conversion
+    run over the matrix rows as floats for small layouts (the boat's four
+    thrusters), or as one array operation each over all thrusters, writing
+    into buffers allocated once. powers and duty_cycles are arrays either way.
+    """
+
+    def __init__(self, layout='differential', max_acceleration=0.2,
+                 min_pulse=1100, max_pulse=1900, neutral_pulse=1500, pwm_period=20000):
+        """
+        layout: name from MIXER_LAYOUTS or an (N, 3) allocation matrix
+        max_acceleration: maximum change in power per (full-step) update
+        pwm_period: PWM period in microseconds (20000 for 50Hz)
+        """
+        matrix = MIXER_LAYOUTS[layout] if isinstance(layout, str) else layout
+        self.matrix = np.asarray(matrix, dtype=np.float64)
+        self.max_acceleration = max_acceleration
+
+        # Pulse width (us) = neutral + power * half_range; duty = pulse * scale,
+        # folded into one affine map from power to duty
+        self.duty_scale = 65535 / pwm_period
+        self.duty_per_power = (max_pulse - min_pulse) / 2 * self.duty_scale
+        self.neutral_duty = neutral_pulse * self.duty_scale
+
+        count = len(self.matrix)
+        self.demand = np.zeros(3)
+        self.target = np.zeros(count)
+        self.powers = np.zeros(count)   # Current, acceleration-limited powers
+        self._delta = np.zeros(count)
+        self._duty = np.zeros(count)
+        self.duty_cycles = np.zeros(count, dtype=np.int64)
+        self.rows = [tuple(row) for row in self.matrix.tolist()] if count <= SCALAR_THRUSTERS else None
+
+    def mix(self, surge, sway, yaw):
+        """
+        Compute saturated target powers (-1 to 1) for all thrusters
+        If any thruster would exceed full power, all are scaled down together
+        so the ratio between them (and so the direction of travel) is kept.
+        """
+        if self.rows is not None:
+            self.target[:] = self._mix_rows(surge, sway, yaw)
+            return self.target
+
+        demand = self.demand
+        demand[0] = surge
+        demand[1] = sway
+        demand[2] = yaw
+        np.dot(self.matrix, demand, out=self.target)
+
+        # A Python max over the few values beats a NumPy reduction here
+        peak = max(map(abs, self.target.tolist()))
+        if peak > 1.0:
+            self.target /= peak
+        return self.target
+
+    def _mix_rows(self, surge, sway, yaw):
+        """mix() for small layouts, as a list"""
+        target = [a * surge + b * sway + c * yaw for a, b, c in self.rows]
+        peak = max(map(abs, target))
+        if peak > 1.0:
+            target = [power / peak for power in target]
+        return target
+
+    def update(self, surge, sway, yaw, step=1.0):
+        """
+        Mix, rate-limit and convert to duty cycles
+        step: fraction of max_acceleration allowed this update, for callers
+        that update more often than the rate the limit was set for
+        Returns the duty cycle array (one per thruster, reused between calls).
+        """
+        # Acceleration limit: move each power at most max_acceleration * step
+        limit = self.max_acceleration * step
+        if self.rows is not None:
+            powers = []
+            for target, power in zip(self._mix_rows(surge, sway, yaw), self.powers.tolist()):
+                delta = target - power
+                if delta > limit:
+                    delta = limit
+                elif delta < -limit:
+                    delta = -limit
+                powers.append(power + delta)
+            self.powers[:] = powers
+            scale, offset = self.duty_per_power, self.neutral_duty
+            self.duty_cycles[:] = [int(power * scale + offset) for power in powers]  # Truncate like int()
+            return self.duty_cycles
+
+        self.mix(surge, sway, yaw)
+        np.subtract(self.target, self.powers, out=self._delta)
+        np.minimum(self._delta, limit, out=self._delta)
+        np.maximum(self._delta, -limit, out=self._delta)
+        self.powers += self._delta
+
+        return self.to_duty_cycles(self.powers)
+
+    def to_duty_cycles(self, powers):
+        """Convert powers (-1 to 1) to 16-bit PCA9685 duty cycles"""
+        np.multiply(powers, self.duty_per_power, out=self._duty)
+        self._duty += self.neutral_duty
+        np.copyto(self.duty_cycles, self._duty, casting='unsafe')  # Truncate like int()
+        return self.duty_cycles
+
+    def pulse_to_duty(self, pulse):
+        """Duty cycle for a fixed pulse width in microseconds"""
+        return int(pulse * self.duty_scale)
+
+    def reset(self):
+        """Forget the current powers (after an emergency stop)"""
+        self.powers[:] = 0.0
@@ -0,0 +1,35 @@
+import os
+from .hardware import HardwareBackend
+
+# Startup selection: USV_HAL=hardware (default) or USV_HAL=sim, with
+# USV_SIM_SPEED setting the simulated clock rate (e.g. 10 for 10x real time)
+BACKENDS = ('hardware', 'sim')
+
+_backend = None
+
+
+def create_backend(name=None, **options):
+    """Create a hardware backend by name (default from USV_HAL)"""
+    name = name or os.environ.get('USV_HAL', 'hardware')
+    if name == 'hardware':
+        return HardwareBackend()
+    if name == 'sim':
+        from .sim import SimBackend
+        options.setdefault('speed', float(os.environ.get('USV_SIM_SPEED', '1.0')))
+        return SimBackend(**options)
+    raise ValueError(f"Unknown hardware backend '{name}', expected one of {BACKENDS}")
+
+
+def get_backend():
+    """The process-wide backend, created from the environment on first use"""
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend):
+    """Make backend the process-wide default (before creating controllers)"""
+    global _backend
+    _backend = backend
+    return backend
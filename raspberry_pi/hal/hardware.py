@@ -0,0 +1,81 @@
+import time
+
+
+def bsc_slave_pins():
+    """
+    BCM (SDA, SCL) pins of the BSC I2C slave peripheral
+    GPIO 10/11 on the Pi 4 (BCM2711), GPIO 18/19 on older boards; never the
+    usual I2C master pins.
+    """
+    try:
+        with open('/proc/device-tree/compatible', 'rb') as f:
+            if b'bcm2711' in f.read():
+                return (10, 11)
+    except OSError:
+        pass
+    return (18, 19)
+
+
+class I2CSlaveStream:
+    """
+    Byte stream from the Pi's BSC I2C slave peripheral
+    Requires the pigpio daemon (sudo pigpiod). The BSC peripheral answers
+    on bsc_slave_pins(): GPIO 10/11 (SDA/SCL) on the Pi 4, which are also
+    SPI0's pins, so SPI must stay disabled.
+    """
+
+    def __init__(self, address=0x08, poll_interval=0.001):
+        import pigpio  # Only needed on the boat
+
+        self.address = address
+        self.poll_interval = poll_interval
+        self.pi = pigpio.pi()
+        if not self.pi.connected:
+            raise IOError("pigpio daemon not running")
+        self.pi.bsc_i2c(address)
+
+    def read(self, size):
+        """Return whatever the master has written since the last call"""
+        _, count, data = self.pi.bsc_i2c(self.address)
+        if count <= 0:
+            time.sleep(self.poll_interval)
+            return b''
+        return bytes(data[:count])
+
+    def close(self):
+        self.pi.bsc_i2c(0)
+        self.pi.stop()
+
+
+class HardwareBackend:
+    """
+    The boat's real hardware
+    Driver modules are imported on first use, so code that only needs
+    the interfaces (or the simulated backend) runs without them.
+    """
+
+    name = 'hardware'
+    clock = time  # time(), monotonic() and sleep()
+
+    def i2c_bus(self, bus_number=1):
+        """SMBus for the I2C master (PCA9685)"""
+        import smbus
+        return smbus.SMBus(bus_number)
+
+    def gpio(self):
+        """The RPi.GPIO module"""
+        import RPi.GPIO as GPIO
+        return GPIO
+
+    def open_serial(self, port, baudrate, timeout):
+        """A UART (RC receiver, or a serial command link)"""
+        import serial
+        return serial.Serial(port=port, baudrate=baudrate, timeout=timeout)
+
+    def command_stream(self, address=0x08):
+        """Byte stream of command frames written by the Jetson over I2C"""
+        return I2CSlaveStream(address)
+
+    def command_link_pins(self):
+        """GPIO pins the command link occupies, which nothing else may drive"""
+        return bsc_slave_pins()
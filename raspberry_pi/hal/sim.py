@@ -0,0 +1,373 @@
+import time
+from collections import deque
+from threading import Condition, Lock, Thread
+from controllers.ibus_parser import IBUS_CHANNEL_COUNT, build_frame
+from controllers.pwm_output import FakeI2CBus
+
+
+class SimClock:
+    """
+    Scaled clock: simulated time runs speed times faster than real time
+    Has the time(), monotonic() and sleep() functions of the time module,
+    so it can replace it wherever the control code reads the clock.
+    """
+
+    def __init__(self, speed=1.0):
+        self.speed = speed
+        self._real_start = time.monotonic()
+        self._wall_start = time.time()
+
+    def monotonic(self):
+        return self._real_start + (time.monotonic() - self._real_start) * self.speed
+
+    def time(self):
+        return self._wall_start + (time.monotonic() - self._real_start) * self.speed
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds / self.speed)
+
+
+class RecordingI2CBus(FakeI2CBus):
+    """
+    Fake I2C bus that also keeps a history of block writes
+    Each entry is (perf_counter, register, data), for measuring when
+    PWM outputs changed.
+    """
+
+    def __init__(self, history=10000):
+        super().__init__()
+        self.history = deque(maxlen=history)
+
+    def write_i2c_block_data(self, address, register, data):
+        super().write_i2c_block_data(address, register, data)
+        self.history.append((time.perf_counter(), register, tuple(data)))
+
+
+class SimPWM:
+    """Software PWM channel with the RPi.GPIO PWM interface"""
+
+    def __init__(self, pin, frequency):
+        self.pin = pin
+        self.frequency = frequency
+        self.duty_cycle = 0
+        self.running = False
+        self.changes = 0
+        self.changed_at = 0.0   # perf_counter of the last duty cycle change
+
+    def start(self, duty_cycle):
+        self.running = True
+        self.ChangeDutyCycle(duty_cycle)
+
+    def ChangeDutyCycle(self, duty_cycle):
+        # RPi.GPIO only accepts 0-100; the sign is kept here as drive direction
+        self.duty_cycle = duty_cycle
+        self.changes += 1
+        self.changed_at = time.perf_counter()
+
+    def ChangeFrequency(self, frequency):
+        self.frequency = frequency
+
+    def stop(self):
+        self.running = False
+        self.duty_cycle = 0
+        self.changed_at = time.perf_counter()
+
+
+class SimGPIO:
+    """
+    Simulated pins with the subset of the RPi.GPIO module interface we use
+    Input levels are set by the simulation with set_input(); input hooks
+    run before each read so models (such as SimGate) can update lazily.
+    Edge callbacks registered with add_event_detect() run on one event
+    thread, as with RPi.GPIO, so they never run inside the simulation.
+    """
+
+    BCM = 'BCM'
+    BOARD = 'BOARD'
+    IN = 'in'
+    OUT = 'out'
+    PUD_UP = 'pud_up'
+    PUD_DOWN = 'pud_down'
+    PUD_OFF = 'pud_off'
+    LOW = 0
+    HIGH = 1
+    RISING = 'rising'
+    FALLING = 'falling'
+    BOTH = 'both'
+
+    def __init__(self):
+        self.lock = Lock()
+        self.mode = None
+        self.directions = {}
+        self.levels = {}
+        self.pwms = {}
+        self.input_hooks = []
+
+        # Edge detection
+        self.edge_detect = {}       # pin -> [edge, bouncetime (s), last event perf_counter, callbacks]
+        self.events = deque()
+        self.event_condition = Condition(self.lock)
+        self.event_thread = None
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def setup(self, pin, direction, pull_up_down=None, initial=None):
+        with self.lock:
+            self.directions[pin] = direction
+            if pin not in self.levels:
+                if direction == self.IN:
+                    self.levels[pin] = self.HIGH if pull_up_down == self.PUD_UP else self.LOW
+                else:
+                    self.levels[pin] = initial or self.LOW
+
+    def input(self, pin):
+        for hook in self.input_hooks:
+            hook()
+        with self.lock:
+            return self.levels.get(pin, self.LOW)
+
+    def output(self, pin, value):
+        with self.lock:
+            self.levels[pin] = value
+
+    def set_input(self, pin, level):
+        """Drive an input pin from the simulation, queueing any edge event"""
+        with self.lock:
+            previous = self.levels.get(pin, self.LOW)
+            self.levels[pin] = level
+            detect = self.edge_detect.get(pin)
+            if detect is None or level == previous:
+                return
+            edge = self.RISING if level else self.FALLING
+            now = time.perf_counter()
+            if detect[0] in (edge, self.BOTH) and now - detect[2] >= detect[1]:
+                detect[2] = now
+                self.events.append(pin)
+                self.event_condition.notify()
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        with self.lock:
+            self.edge_detect[pin] = [edge, (bouncetime or 0) / 1000, 0.0, [callback] if callback else []]
+            if self.event_thread is None:
+                self.event_thread = Thread(target=self._event_loop, daemon=True)
+                self.event_thread.start()
+
+    def add_event_callback(self, pin, callback):
+        with self.lock:
+            self.edge_detect[pin][3].append(callback)
+
+    def remove_event_detect(self, pin):
+        with self.lock:
+            self.edge_detect.pop(pin, None)
+
+    def _event_loop(self):
+        """Run edge callbacks one at a time, outside the simulation's locks"""
+        while True:
+            with self.lock:
+                while not self.events:
+                    self.event_condition.wait()
+                pin = self.events.popleft()
+                detect = self.edge_detect.get(pin)
+                callbacks = list(detect[3]) if detect else []
+            for callback in callbacks:
+                callback(pin)
+
+    def PWM(self, pin, frequency):
+        pwm = SimPWM(pin, frequency)
+        self.pwms[pin] = pwm
+        return pwm
+
+    def cleanup(self, pins=None):
+        with self.lock:
+            for pin in ([pins] if isinstance(pins, int) else pins or list(self.directions)):
+                self.directions.pop(pin, None)
+                self.pwms.pop(pin, None)
+                self.edge_detect.pop(pin, None)
+
+
+class SimGate:
+    """
+    Gate mechanism model: the motor PWM moves the gate, limit switches close at the ends
+    Switches are active low (closed to ground, inputs pulled up), as wired
+    on the boat. A thread moves the gate every step while the motor runs,
+    so the switches close on time even when nothing reads them.
+    """
+
+    def __init__(self, gpio, clock, motor_pin=18, limit_switch_open=23, limit_switch_closed=24,
+                 travel_time=3.0, step=0.001):
+        """
+        travel_time: seconds from closed to open at full power
+        step: simulated seconds between updates while the motor runs
+        """
+        self.gpio = gpio
+        self.clock = clock
+        self.motor_pin = motor_pin
+        self.limit_switch_open = limit_switch_open
+        self.limit_switch_closed = limit_switch_closed
+        self.travel_time = travel_time
+        self.step = step
+        self.position = 0.0   # 0 closed, 1 open
+        self.last_update = clock.monotonic()
+        self.lock = Lock()
+        self.limit_hit_at = 0.0   # perf_counter when a limit switch last closed
+        self.overtravel = 0.0     # Simulated seconds the motor drove against a closed switch
+        gpio.input_hooks.append(self.update)
+        self._set_switches()
+        Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            self.update()
+            pwm = self.gpio.pwms.get(self.motor_pin)
+            moving = pwm is not None and pwm.running and pwm.duty_cycle != 0
+            self.clock.sleep(self.step if moving else 0.05)
+
+    def update(self):
+        """Advance the gate to the current time"""
+        with self.lock:
+            now = self.clock.monotonic()
+            pwm = self.gpio.pwms.get(self.motor_pin)
+            if pwm is not None and pwm.running and pwm.duty_cycle:
+                travel = (now - self.last_update) / self.travel_time * pwm.duty_cycle / 100
+                position = min(1.0, max(0.0, self.position + travel))
+                if position == self.position:
+                    self.overtravel += now - self.last_update
+                self.position = position
+            self.last_update = now
+            self._set_switches()
+
+    def _set_switches(self):
+        was_open = self.gpio.levels.get(self.limit_switch_open) == SimGPIO.LOW
+        was_closed = self.gpio.levels.get(self.limit_switch_closed) == SimGPIO.LOW
+        is_open = self.position >= 1.0
+        is_closed = self.position <= 0.0
+        if (is_open and not was_open) or (is_closed and not was_closed):
+            self.limit_hit_at = time.perf_counter()
+        self.gpio.set_input(self.limit_switch_open, SimGPIO.LOW if is_open else SimGPIO.HIGH)
+        self.gpio.set_input(self.limit_switch_closed, SimGPIO.LOW if is_closed else SimGPIO.HIGH)
+
+
+class SimSerial:
+    """
+    In-memory byte pipe with the pyserial read interface
+    The simulation writes bytes in; the code under test reads them out.
+    """
+
+    def __init__(self, timeout=0.1):
+        self.timeout = timeout
+        self.buffer = bytearray()
+        self.condition = Condition()
+        self.closed = False
+
+    @property
+    def in_waiting(self):
+        return len(self.buffer)
+
+    def write(self, data):
+        with self.condition:
+            self.buffer += data
+            self.condition.notify_all()
+        return len(data)
+
+    def read(self, size=1):
+        """Wait up to timeout (real seconds) for data, then return up to size bytes"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.buffer or self.closed, self.timeout)
+            data = bytes(self.buffer[:size])
+            del self.buffer[:size]
+            return data
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class SimIBusSerial:
+    """
+    Simulated RC receiver UART: an iBUS frame every frame_period of clock time
+    Set channels (raw 1000-2000 values) to move the sticks; clear connected
+    to simulate losing the transmitter.
+    """
+
+    def __init__(self, clock, frame_period=0.007, timeout=0.1):
+        self.clock = clock
+        self.frame_period = frame_period
+        self.timeout = timeout
+        self.channels = [1500] * IBUS_CHANNEL_COUNT
+        self.connected = True
+        self.closed = False
+        self.buffer = bytearray()
+        self.next_frame = clock.monotonic()
+        self.frames_sent = 0
+
+    @property
+    def in_waiting(self):
+        self._generate()
+        return len(self.buffer)
+
+    def _generate(self):
+        """Append the frames that are due by now"""
+        now = self.clock.monotonic()
+        while self.next_frame <= now:
+            if self.connected:
+                self.buffer += build_frame(self.channels)
+                self.frames_sent += 1
+            self.next_frame += self.frame_period
+
+    def read(self, size=1):
+        """Block until a frame is due (at most timeout clock seconds), then return up to size bytes"""
+        deadline = self.clock.monotonic() + self.timeout
+        self._generate()
+        while not self.buffer and not self.closed:
+            now = self.clock.monotonic()
+            if now >= deadline:
+                break
+            self.clock.sleep(min(self.next_frame, deadline) - now)
+            self._generate()
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def close(self):
+        self.closed = True
+
+
+class SimBackend:
+    """
+    Simulated hardware for running the control loop off the boat
+    PWM writes land on a RecordingI2CBus, the gate is a SimGate behind
+    SimGPIO, the RC receiver is a SimIBusSerial and the Jetson command
+    link is a SimSerial pipe (write frames into `commands`). All of them
+    share one SimClock, so the whole loop can run at speed times real time.
+    """
+
+    name = 'sim'
+
+    def __init__(self, speed=1.0):
+        self.clock = SimClock(speed)
+        self.i2c = RecordingI2CBus()
+        self.gpio_pins = SimGPIO()
+        self.gate = SimGate(self.gpio_pins, self.clock)
+        self.rc = SimIBusSerial(self.clock)
+        self.commands = SimSerial()
+        self.serial_ports = {'/dev/serial0': self.rc}
+
+    def i2c_bus(self, bus_number=1):
+        return self.i2c
+
+    def gpio(self):
+        return self.gpio_pins
+
+    def open_serial(self, port, baudrate, timeout):
+        if port not in self.serial_ports:
+            raise IOError(f"No simulated device on {port}")
+        return self.serial_ports[port]
+
+    def command_stream(self, address=0x08):
+        return self.commands
+
+    def command_link_pins(self):
+        return ()  # The simulated link is a serial pipe
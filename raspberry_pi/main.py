@@ -1,35 +1,74 @@
 import logging
+import os
 import signal
 import sys
+
+# Modules shared by both computers live in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from common.async_logging import configure_logging
+from common.flight_recorder import FLAG_DIRECT_RC, FLAG_EMERGENCY_STOP, FLAG_NEW_COMMAND, GATE_STATE_CODES, FlightRecorder
+from common.metrics import MetricsExporter, registry
+from common.scheduler import PeriodicScheduler
+from common.trace import FLOW_RC, tracer
 from controllers.motor_controller import MotorController
 from controllers.gate_controller import GateController
 from controllers.receiver_controller import ReceiverController
-import time
+from controllers.command_receiver import CommandReceiver
+from hal.backend import get_backend
+from threading import Lock, Thread
 
 class USVHardwareController:
-    def __init__(self):
-        # Configure logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
+    def __init__(self, hal=None):
+        """
+        hal: hardware backend; defaults to the one selected by USV_HAL
+        (USV_HAL=sim runs the whole loop against simulated hardware)
+        """
+        # Configure logging: written by a background thread, repeats of a message rate-limited
+        configure_logging(level=logging.INFO)
         self.logger = logging.getLogger('USVHardwareController')
+        self.hal = hal or get_backend()
+        self.clock = self.hal.clock
+        tracer.source = tracer.source or 'pi'
+        self.logger.info(f"Using {self.hal.name} hardware backend")
         
         # Initialize controllers
-        self.motor_controller = MotorController()
-        self.gate_controller = GateController()
-        self.receiver = ReceiverController()
+        self.motor_controller = MotorController(hal=self.hal)
+        gate_pin = os.environ.get('USV_GATE_MOTOR_PIN')  # BCM pin, if not the default
+        self.gate_controller = GateController(motor_pin=int(gate_pin) if gate_pin else None, hal=self.hal)
+        self.receiver = ReceiverController(hal=self.hal)
+        self.command_receiver = CommandReceiver(hal=self.hal)
+        self.gate_controller.add_listener(lambda state: self.logger.info(f"Gate {state}"))
         
         # Control flags
         self.running = False
         self.direct_rc_mode = False  # For direct RC control bypass
+        self.gate_command = 0  # Latest gate command, applied by the gate task
+        self.last_command = (128, 128, 0)  # Latest (throttle, steering, gate) applied
+        self.control_lock = Lock()  # RC thread and motor task share the controllers
+        
+        # Fixed-rate tasks
+        self.scheduler = PeriodicScheduler(clock=self.clock.monotonic, sleep=self.clock.sleep)
+        self.scheduler.add_task('motor', 100, self._motor_step)
+        self.scheduler.add_task('gate', 20, self._gate_step)
+        self.scheduler.add_task('telemetry', 5, self._report_telemetry)
+        self.motor_task = self.scheduler.tasks['motor']
+        
+        # Metrics snapshot for field diagnostics
+        self.metrics_exporter = MetricsExporter(path='/tmp/usv_pi_metrics.json')
+        self.loop_overruns = registry.gauge('loop.motor.overruns')
+        self.loop_jitter_p99 = registry.gauge('loop.motor.jitter_p99')
+        self.loop_exec_p99 = registry.gauge('loop.motor.exec_p99')
+        
+        # Binary record of every motor step and applied command (USV_RECORD=0 turns it off)
+        self.flight_recorder = FlightRecorder('/tmp/usv_pi_flight', source='pi')
         
         # Setup signal handlers
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
         
         # Watchdog timer for command timeout
-        self.last_command_time = time.time()
+        self.last_command_time = self.clock.time()
         self.command_timeout = 1.0  # 1 second timeout
         
     def start(self):
@@ -42,6 +81,11 @@ class USVHardwareController:
             return False
             
         self.running = True
+        self.metrics_exporter.start()
+        self.flight_recorder.start()
+        
+        # RC frames are handled as they arrive, not on the 100Hz tick
+        Thread(target=self._rc_loop, daemon=True).start()
         
         try:
             self._main_loop()
@@ -51,32 +95,69 @@ class USVHardwareController:
             
     def _main_loop(self):
         """Main control loop"""
+        self.scheduler.run()
+        
+    def _rc_loop(self):
+        """Handle each RC frame as soon as the receiver delivers it"""
+        sequence = -1
         while self.running:
-            try:
-                current_time = time.time()
-                
+            rc_data = self.receiver.wait_for_frame(sequence, timeout=0.1)
+            if rc_data is None:
+                if not self.receiver.running:
+                    break
+                continue
+            sequence = rc_data.sequence
+            
+            with self.control_lock:
                 # Check for direct RC control
-                rc_data = self.receiver.read_channels()
-                if rc_data:
-                    self.direct_rc_mode = rc_data.get('aux1', False)  # Aux channel for mode selection
-                    
+                self.direct_rc_mode = rc_data.aux1  # Aux channel for mode selection
                 if self.direct_rc_mode:
-                    # Direct RC control mode
                     self._handle_rc_control(rc_data)
-                else:
+                    
+    def _motor_step(self):
+        """Command handling and thruster output, run at 100Hz"""
+        try:
+            current_time = self.clock.time()
+            
+            with self.control_lock:
+                applied = False
+                if not self.direct_rc_mode:
                     # Normal I2C command mode
-                    self._handle_i2c_commands()
+                    applied = self._handle_i2c_commands()
                     
                 # Check command timeout
                 if current_time - self.last_command_time > self.command_timeout:
-                    self.logger.warning("Command timeout - engaging safety stop")
+                    self.logger.warning("Command timeout - engaging safety stop", extra={'rate_limit': 'command_timeout'})
                     self.motor_controller.emergency_stop()
                     
-                time.sleep(0.01)  # 100Hz update rate
+                if self.flight_recorder.running:
+                    self._record_flight(applied, self.command_receiver.taken_sequence or 0)
                 
-            except Exception as e:
-                self.logger.error(f"Error in control loop: {e}")
-                self.motor_controller.emergency_stop()
+        except Exception as e:
+            self.logger.error(f"Error in control loop: {e}")
+            self.motor_controller.emergency_stop()
+            
+    def _gate_step(self):
+        """Apply the latest gate command, run at 20Hz"""
+        try:
+            self.gate_controller.control_gate(self.gate_command)
+        except Exception as e:
+            self.logger.error(f"Error controlling gate: {e}")
+            
+    def _report_telemetry(self):
+        """Publish loop timing to the metrics registry, run at 5Hz"""
+        stats = self.scheduler.tasks['motor'].get_stats()
+        self.loop_overruns.set(stats['overruns'])
+        self.loop_jitter_p99.set(stats['jitter_p99'])
+        self.loop_exec_p99.set(stats['exec_p99'])
+        
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        self.logger.debug(
+            f"Motor loop: {stats['overruns']} overruns, "
+            f"jitter p50 {stats['jitter_p50'] * 1e3:.2f} ms, p99 {stats['jitter_p99'] * 1e3:.2f} ms, "
+            f"gate {self.gate_controller.get_state()}"
+        )
                 
     def _handle_rc_control(self, rc_data):
         """Process direct RC control inputs"""
@@ -85,43 +166,64 @@ class USVHardwareController:
             
         try:
             # Update last command time
-            self.last_command_time = time.time()
+            self.last_command_time = self.clock.time()
             
-            # Process RC channels
-            throttle = rc_data.get('throttle', 128)
-            steering = rc_data.get('steering', 128)
-            gate = rc_data.get('gate', 0)
+            # Process RC channels (normalized once by the receiver)
+            throttle = rc_data.throttle
+            steering = rc_data.steering
+            gate = rc_data.gate
             
             # Apply commands
-            self.motor_controller.set_thruster_speeds(throttle, steering)
-            self.gate_controller.control_gate(gate)
+            self.motor_controller.set_thruster_speeds(throttle, steering, trace=rc_data.sequence, flow=FLOW_RC)
+            self.gate_command = gate
+            self.last_command = (throttle, steering, gate)
+            if self.flight_recorder.running:
+                self._record_flight(True, rc_data.sequence)
             
         except Exception as e:
             self.logger.error(f"Error processing RC control: {e}")
             self.motor_controller.emergency_stop()
             
     def _handle_i2c_commands(self):
-        """Process commands from Jetson Nano via I2C"""
+        """Process commands from Jetson Nano via I2C; returns True if one was applied"""
         try:
             # Read I2C commands (implement this based on your I2C setup)
             commands = self._read_i2c_commands()
             
             if commands:
                 throttle, steering, gate = commands
-                self.last_command_time = time.time()
+                self.last_command_time = self.clock.time()
                 
-                # Apply commands
-                self.motor_controller.set_thruster_speeds(throttle, steering)
-                self.gate_controller.control_gate(gate)
+                # Apply commands (traced by the command frame's sequence number)
+                trace = self.command_receiver.taken_sequence
+                self.motor_controller.set_thruster_speeds(throttle, steering, trace=trace)
+                self.gate_command = gate
+                self.last_command = commands
+                return True
                 
         except Exception as e:
             self.logger.error(f"Error processing I2C commands: {e}")
             self.motor_controller.emergency_stop()
+        return False
             
+    def _record_flight(self, new_command, sequence):
+        """Append the current inputs, outputs and loop timing to the flight recorder"""
+        task = self.motor_task
+        flags = ((FLAG_EMERGENCY_STOP if self.motor_controller.emergency_stop_active else 0)
+                 | (FLAG_DIRECT_RC if self.direct_rc_mode else 0)
+                 | (FLAG_NEW_COMMAND if new_command else 0))
+        self.flight_recorder.append(
+            self.clock.monotonic(), tuple(self.receiver.channels), self.last_command, sequence & 0xFFFF,
+            flags, GATE_STATE_CODES.get(self.gate_controller.current_state, 0),
+            self.motor_controller.current_powers.tolist(),
+            self.command_receiver.accepted, self.command_receiver.parser.crc_errors, 0.0,
+            task.overruns, task.jitter[-1] if task.jitter else 0.0,
+            task.exec_times[-1] if task.exec_times else 0.0,
+        )
+        
     def _read_i2c_commands(self):
-        """Read commands from I2C bus"""
-        # Implement I2C reading logic here
-        return None
+        """Take the newest command frame received from the Jetson, if any"""
+        return self.command_receiver.take_command()
             
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals"""
@@ -132,8 +234,15 @@ class USVHardwareController:
         """Clean shutdown of all systems"""
         self.logger.info("Shutting down USV Hardware Control System...")
         self.running = False
+        self.scheduler.stop()
+        self.metrics_exporter.stop()
         self.motor_controller.emergency_stop()
+        self.flight_recorder.stop()
         self.gate_controller.close()  # Implement this in gate controller
+        self.command_receiver.close()
+        self.receiver.close()
+        if tracer.enabled:
+            self.logger.info(f"Wrote {tracer.dump('/tmp/usv_pi_trace.bin')} trace records")
         sys.exit(0)
 
 if __name__ == "__main__":
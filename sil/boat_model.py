@@ -0,0 +1,84 @@
+import math
+from threading import Lock
+import numpy as np
+
+# Thruster geometry in motor order (front_left, front_right, rear_left,
+# rear_right): x forward and y to port in metres, thrust angle in radians
+# (0 = thrusting forward, positive towards port)
+DIFFERENTIAL_THRUSTERS = [
+    (0.5, 0.3, 0.0),
+    (0.5, -0.3, 0.0),
+    (-0.5, 0.3, 0.0),
+    (-0.5, -0.3, 0.0),
+]
+
+# Vectored X: corner thrusters angled 45 degrees, matching the 'vectored'
+# layout in raspberry_pi/controllers/thruster_mixer.py
+VECTORED_THRUSTERS = [
+    (0.5, 0.3, -math.pi / 4),
+    (0.5, -0.3, math.pi / 4),
+    (-0.5, 0.3, math.pi / 4),
+    (-0.5, -0.3, -math.pi / 4),
+]
+
+
+class BoatModel:
+    """
+    Planar boat dynamics: surge, sway and yaw with linear drag
+    Thruster powers (-1 to 1) become body forces and a yaw moment through
+    the thruster geometry; velocities are integrated with explicit Euler
+    steps, which is plenty at the 100Hz the harness steps it.
+    """
+
+    def __init__(self, thrusters=DIFFERENTIAL_THRUSTERS, mass=35.0, inertia=6.0,
+                 drag=(30.0, 80.0, 12.0), max_thrust=40.0):
+        """
+        mass: kg; inertia: yaw moment of inertia, kg m^2
+        drag: linear drag in surge (N s/m), sway (N s/m) and yaw (N m s/rad)
+        max_thrust: thrust at full power per thruster, N (a T200 gives about 40)
+        """
+        geometry = np.asarray(thrusters, dtype=np.float64)
+        x, y, angle = geometry[:, 0], geometry[:, 1], geometry[:, 2]
+        # Generalized force per unit power: rows surge force, sway force, yaw moment
+        fx = np.cos(angle) * max_thrust
+        fy = np.sin(angle) * max_thrust
+        self.allocation = np.vstack([fx, fy, x * fy - y * fx])
+
+        self.mass = mass
+        self.inertia = inertia
+        self.drag = np.asarray(drag, dtype=np.float64)
+        self.lock = Lock()
+
+        # State: world pose (x, y, heading) and body velocities (u, v, r)
+        self.x = 0.0
+        self.y = 0.0
+        self.heading = 0.0
+        self.velocity = np.zeros(3)
+        self.distance = 0.0
+
+    def step(self, powers, dt):
+        """Advance dt seconds with the given thruster powers"""
+        forces = self.allocation @ np.clip(powers, -1.0, 1.0)
+        acceleration = (forces - self.drag * self.velocity) / (self.mass, self.mass, self.inertia)
+        with self.lock:
+            self.velocity += acceleration * dt
+            u, v, r = self.velocity
+            cos_h = math.cos(self.heading)
+            sin_h = math.sin(self.heading)
+            self.x += (u * cos_h - v * sin_h) * dt
+            self.y += (u * sin_h + v * cos_h) * dt
+            self.heading = (self.heading + r * dt + math.pi) % (2 * math.pi) - math.pi
+            self.distance += math.hypot(u, v) * dt
+
+    def reset(self, x=0.0, y=0.0, heading=0.0):
+        """Place the boat at rest at the given pose"""
+        with self.lock:
+            self.x = x
+            self.y = y
+            self.heading = heading
+            self.velocity[:] = 0.0
+
+    def pose(self):
+        """Current (x, y, heading)"""
+        with self.lock:
+            return self.x, self.y, self.heading
@@ -0,0 +1,125 @@
+# link_emulator.py
+# Stand-ins for slow radio links, for testing the video stream without one
+import random
+import socket
+import time
+from threading import Lock
+
+
+class ThrottledSocket:
+    """
+    Socket stand-in for a TCP connection over a slow link
+    Bytes drain at rate bytes/s out of a send buffer of buffer_size bytes;
+    sendmsg()/sendall() accept what fits and block (up to the socket
+    timeout) while the buffer is full, like a real socket whose peer is
+    behind a slow radio. The rate can be changed while running to script
+    link fades. Has enough of the socket API for ClientWriter.
+    """
+
+    family = socket.AF_INET
+
+    def __init__(self, rate, buffer_size=64 * 1024):
+        self.rate = float(rate)
+        self.buffer_size = buffer_size
+        self.timeout = None
+        self.closed = False
+        self.lock = Lock()
+        self.backlog = 0.0
+        self.drained_at = time.monotonic()
+        self.bytes_accepted = 0
+
+    def set_rate(self, rate):
+        """Change the link rate in bytes/s"""
+        with self.lock:
+            self._drain()
+            self.rate = float(rate)
+
+    def _drain(self):
+        now = time.monotonic()
+        self.backlog = max(0.0, self.backlog - (now - self.drained_at) * self.rate)
+        self.drained_at = now
+
+    @property
+    def bytes_delivered(self):
+        """Bytes that have crossed the link so far"""
+        with self.lock:
+            self._drain()
+            return self.bytes_accepted - int(self.backlog)
+
+    def setsockopt(self, level, option, value):
+        if option == socket.SO_SNDBUF:
+            self.buffer_size = value
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def _send(self, size):
+        """Accept up to size bytes, waiting for buffer space; returns the number accepted"""
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            if self.closed:
+                raise OSError("socket closed")
+            with self.lock:
+                self._drain()
+                free = int(self.buffer_size - self.backlog)
+                if free > 0:
+                    accepted = min(size, free)
+                    self.backlog += accepted
+                    self.bytes_accepted += accepted
+                    return accepted
+                wait = (self.backlog - self.buffer_size + min(size, 1500)) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                time.sleep(max(0.0, deadline - time.monotonic()))
+                raise socket.timeout("timed out")
+            time.sleep(wait)
+
+    def sendmsg(self, buffers):
+        return self._send(sum(memoryview(buffer).nbytes for buffer in buffers))
+
+    def sendall(self, data):
+        remaining = memoryview(data).nbytes
+        while remaining:
+            remaining -= self._send(remaining)
+
+    def close(self):
+        self.closed = True
+
+
+class LossyDatagramSocket:
+    """
+    UDP socket wrapper that loses outgoing datagrams
+    Each datagram is dropped with probability loss; with burst > 1 a loss
+    takes out that many datagrams in a row, like a radio fade. Everything
+    else is the wrapped socket's.
+    """
+
+    def __init__(self, sock, loss=0.0, burst=1, seed=None):
+        self.sock = sock
+        self.loss = loss
+        self.burst = burst
+        self.random = random.Random(seed)
+        self.dropping = 0
+        self.datagrams_dropped = 0
+
+    def _lost(self):
+        if not self.dropping and self.random.random() < self.loss:
+            self.dropping = self.burst
+        if self.dropping:
+            self.dropping -= 1
+            self.datagrams_dropped += 1
+            return True
+        return False
+
+    def sendmsg(self, buffers, ancdata=(), flags=0, address=None):
+        size = sum(memoryview(buffer).nbytes for buffer in buffers)
+        if self._lost():
+            return size
+        return self.sock.sendmsg(buffers, ancdata, flags, address)
+
+    def sendto(self, data, address):
+        if self._lost():
+            return memoryview(data).nbytes
+        return self.sock.sendto(data, address)
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
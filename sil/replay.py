@@ -0,0 +1,144 @@
+# replay.py
+# Replay recorded flight data through the real control code, as a deterministic regression benchmark
+#
+#   python3 -m sil.replay --pi /tmp/usv_pi_flight --jetson /tmp/usv_jetson_flight --repeat 5
+#
+# Pi records: every applied command goes through MotorController (on a fake
+# PCA9685 bus) and the resulting thruster powers are compared with the
+# recorded ones. Jetson records: the RC channels of every teleoperation step
+# go through CommandProcessor and the commands it produces are compared with
+# the recorded ones. The motor controller's clock follows the recorded
+# timestamps, so its acceleration limit sees the recorded command spacing.
+# Timing is per call, with nothing else running.
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'jetson'))
+sys.path.insert(0, os.path.join(ROOT, 'raspberry_pi'))
+
+import numpy as np
+from common.flight_recorder import FLAG_AUTONOMOUS, FLAG_EMERGENCY_STOP, FLAG_NEW_COMMAND, load_flight
+from controllers.motor_controller import MotorController
+from controllers.pwm_output import FakeI2CBus
+from hal.sim import SimBackend
+from teleoperation.command_processor import CommandProcessor
+
+
+class ReplayClock:
+    """Clock that reads the timestamp of the record being replayed"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+class CaptureLink:
+    """Stands in for the I2CCommunicator; keeps the last command sent"""
+
+    def __init__(self):
+        self.command = None
+
+    def send_command(self, throttle, steering, gate_control, trace=None):
+        self.command = (throttle, steering, gate_control)
+        return True
+
+    def close(self):
+        pass
+
+
+def replay_motor(records):
+    """
+    Apply the recorded commands in order, each at its recorded time
+    Returns (per-call seconds, max power error). Emergency stops are
+    replayed from the flags so the mixer state matches.
+    """
+    clock = ReplayClock()
+    motor = MotorController(bus=FakeI2CBus(), hal=SimBackend(), clock=clock)
+    applied = records[(records['flags'] & FLAG_NEW_COMMAND) != 0]
+    commands = applied['command'].tolist()
+    timestamps = applied['timestamp'].tolist()
+    stopped = ((applied['flags'] & FLAG_EMERGENCY_STOP) != 0).tolist()
+    powers = np.empty((len(applied), len(motor.current_powers)))
+    times = np.empty(len(applied))
+
+    for index, (throttle, steering, _) in enumerate(commands):
+        if stopped[index] and not motor.emergency_stop_active:
+            motor.emergency_stop()
+        elif not stopped[index] and motor.emergency_stop_active:
+            motor.resume()
+        clock.now = timestamps[index]
+        start = time.perf_counter()
+        motor.set_thruster_speeds(throttle, steering)
+        times[index] = time.perf_counter() - start
+        powers[index] = motor.current_powers
+
+    error = np.abs(powers - applied['thruster_powers'][:, :powers.shape[1]]).max(initial=0.0)
+    return times, float(error)
+
+
+def replay_commands(records):
+    """
+    Feed the recorded teleoperation RC input through CommandProcessor
+    Returns (per-call seconds, commands that differ from the recording).
+    Autonomous steps are skipped: they depend on depth frames, which are
+    not recorded.
+    """
+    link = CaptureLink()
+    processor = CommandProcessor(link)
+    teleop = records[(records['flags'] & FLAG_AUTONOMOUS) == 0]
+    channels = teleop['rc_channels'].tolist()
+    expected = [tuple(command) for command in teleop['command'].tolist()]
+    times = np.empty(len(teleop))
+    mismatches = 0
+
+    for index, rc in enumerate(channels):
+        start = time.perf_counter()
+        processor.process_rc_input(rc)
+        times[index] = time.perf_counter() - start
+        mismatches += link.command != expected[index]
+    return times, mismatches
+
+
+def summarize(name, times, repeat):
+    us = times * 1e6
+    print(f"  {name}: {len(times) // repeat} calls x {repeat}, p50 {np.percentile(us, 50):.1f} us, "
+          f"p99 {np.percentile(us, 99):.1f} us, total {times.sum() / repeat * 1e3:.1f} ms per pass")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded flight data through the control code")
+    parser.add_argument('--pi', metavar='PATH', help="Pi flight records (directory or flight_*.bin file)")
+    parser.add_argument('--jetson', metavar='PATH', help="Jetson flight records (directory or flight_*.bin file)")
+    parser.add_argument('--repeat', type=int, default=3, help="passes over the recording")
+    args = parser.parse_args()
+    if not args.pi and not args.jetson:
+        parser.error("give --pi and/or --jetson")
+
+    if args.pi:
+        records = load_flight(args.pi)
+        print(f"{args.pi}: {len(records)} records, "
+              f"{np.count_nonzero(records['flags'] & FLAG_NEW_COMMAND)} commands applied")
+        passes = [replay_motor(records) for _ in range(args.repeat)]
+        summarize("MotorController.set_thruster_speeds", np.concatenate([t for t, _ in passes]), args.repeat)
+        print(f"  largest thruster power difference from the recording: {max(e for _, e in passes):.4f}")
+
+    if args.jetson:
+        records = load_flight(args.jetson)
+        print(f"{args.jetson}: {len(records)} records, "
+              f"{np.count_nonzero(records['flags'] & FLAG_AUTONOMOUS)} autonomous")
+        passes = [replay_commands(records) for _ in range(args.repeat)]
+        summarize("CommandProcessor.process_rc_input", np.concatenate([t for t, _ in passes]), args.repeat)
+        print(f"  commands different from the recording: {passes[0][1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+# run_sil.py
+# Closed-loop software-in-the-loop run of the Jetson and Pi controllers on simulated hardware
+#
+#   python3 -m sil.run_sil --speed 2 --max-latency-p99 30 --min-command-rate 90
+#
+# Exits with status 1 if a performance threshold is missed, so it can gate deployments.
+import argparse
+import importlib.util
+import logging
+import os
+import sys
+import time
+from threading import Lock, Thread
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'jetson'))
+sys.path.insert(0, os.path.join(ROOT, 'raspberry_pi'))
+
+from common.command_link import StreamBus
+from common.scheduler import percentile
+from common.trace import tracer
+from hal.sim import SimBackend
+from teleoperation.command_processor import CommandProcessor
+from utils.communication import I2CCommunicator
+from .boat_model import BoatModel
+from .scene import DepthScene, SimDepthCamera
+
+STEP = 0.01                 # Simulated seconds per boat dynamics step
+PWM_PERIOD_US = 20000       # 50Hz PCA9685 output
+
+# Buoys along the course for the autonomous phase: (x, y, radius)
+COURSE = [(8.0, 0.5, 0.6), (14.0, -1.5, 0.6), (20.0, 1.0, 0.8), (26.0, -0.5, 0.6)]
+
+# Teleoperation stick script, cycled every change period: (throttle, steering) raw values
+STICK_SCRIPT = [(1800, 1500), (1800, 1800), (1500, 1500), (1800, 1200), (1300, 1500)]
+
+
+def load_main(name, directory):
+    """Import a controller's main.py under a unique module name"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, directory, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class SimRCSource:
+    """Synthetic RC transmitter for the Jetson: raw 1000-2000 channel values"""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.channels = [1500] * 14
+
+    def set(self, **values):
+        """Set channels by index name, e.g. set(ch2=1800)"""
+        with self.lock:
+            for name, value in values.items():
+                self.channels[int(name[2:])] = value
+
+    def read_channels(self):
+        with self.lock:
+            return list(self.channels)
+
+
+def thruster_powers(sim, channels=(0, 1, 2, 3)):
+    """Read thruster powers (-1 to 1) back from the simulated PCA9685 registers"""
+    powers = []
+    for channel in channels:
+        count = sim.i2c.off_count(0x40, channel)
+        if count == 0:
+            powers.append(0.0)  # Not written yet: output off
+            continue
+        pulse = count * PWM_PERIOD_US / 4096
+        powers.append(max(-1.0, min(1.0, (pulse - 1500) / 400)))
+    return powers
+
+
+def first_write_after(sim, sent_at):
+    """perf_counter time of the first PWM block write at or after sent_at, or None"""
+    writes = [written for written, _, _ in list(sim.i2c.history)[-32:] if written >= sent_at]
+    return min(writes) if writes else None
+
+
+class SILHarness:
+    """
+    Runs USVController (Jetson) and USVHardwareController (Pi) in one process
+    The Jetson's I2CCommunicator writes command frames into the Pi's
+    simulated command link, the Pi drives a recording PWM bus, and the
+    thruster outputs read back from it move a BoatModel, whose pose feeds
+    the Jetson's synthetic depth camera. Everything runs on one SimClock.
+    """
+
+    def __init__(self, speed=1.0, change_period=1.0):
+        self.speed = speed
+        self.change_period = change_period
+
+        jetson_main = load_main('jetson_main', 'jetson')
+        pi_main = load_main('pi_main', 'raspberry_pi')
+
+        self.sim = SimBackend(speed=speed)
+        self.clock = self.sim.clock
+        self.boat = BoatModel()
+        self.scene = DepthScene(COURSE)
+        self.camera = SimDepthCamera(self.scene, self.boat, self.clock)
+        self.rc = SimRCSource()
+
+        self.pi = pi_main.USVHardwareController(hal=self.sim)
+        self.link = I2CCommunicator(bus=StreamBus(self.sim.commands))
+        self.jetson = jetson_main.USVController(
+            command_processor=CommandProcessor(self.link),
+            video_stream=self.camera,
+            rc_source=self.rc,
+            clock=self.clock,
+        )
+
+        # Results
+        self.latencies = []         # Simulated seconds, RC input to PWM write
+        self.missed = 0             # Input changes with no PWM write seen
+        self.closest_approach = float('inf')
+        self.collisions = 0
+
+    def start(self):
+        """Start both controllers and wait for ESC calibration to finish"""
+        self.sim.rc.channels[4] = 1000  # Pi aux1 low: follow the Jetson
+        Thread(target=self.pi.start, daemon=True).start()
+        Thread(target=self.jetson.start, daemon=True).start()
+        motor_task = self.pi.scheduler.tasks['motor']
+        while motor_task.runs == 0:
+            time.sleep(0.01)
+
+    def _step(self, next_step):
+        """Sleep to the next dynamics step and advance the boat"""
+        self.clock.sleep(next_step - self.clock.monotonic())
+        self.boat.step(thruster_powers(self.sim), STEP)
+        x, y, _ = self.boat.pose()
+        clearance = self.scene.clearance(x, y)
+        if clearance < 0 and self.closest_approach >= 0:
+            self.collisions += 1
+        self.closest_approach = min(self.closest_approach, clearance)
+        return next_step + STEP
+
+    def _counters(self):
+        """Running totals that the per-phase update rates are computed from"""
+        return {
+            'jetson_control': self.jetson.scheduler.tasks['control'].runs,
+            'pi_motor': self.pi.scheduler.tasks['motor'].runs,
+            'commands': self.pi.command_receiver.accepted,
+            'pwm_writes': self.sim.i2c.transactions,
+            'depth_frames': self.camera.frames_rendered,
+            'time': self.clock.monotonic(),
+        }
+
+    def _rates(self, before):
+        """Per simulated second update rates since a _counters() snapshot"""
+        after = self._counters()
+        elapsed = after.pop('time') - before['time']
+        return {name: (value - before[name]) / elapsed for name, value in after.items()}
+
+    def run_teleoperation(self, duration):
+        """Scripted stick moves; measures RC input to PWM output latency"""
+        self.rc.set(ch5=1000)  # Manual mode
+        before = self._counters()
+        start = next_step = self.clock.monotonic()
+        next_change = start
+        script_index = 0
+        pending = None
+        while self.clock.monotonic() - start < duration:
+            if self.clock.monotonic() >= next_change:
+                if pending is not None:
+                    self.missed += 1
+                throttle, steering = STICK_SCRIPT[script_index % len(STICK_SCRIPT)]
+                script_index += 1
+                self.rc.set(ch2=throttle, ch0=steering)
+                pending = time.perf_counter()
+                next_change += self.change_period
+            next_step = self._step(next_step)
+            if pending is not None:
+                written = first_write_after(self.sim, pending)
+                if written is not None:
+                    self.latencies.append((written - pending) * self.speed)
+                    pending = None
+        return self._rates(before)
+
+    def run_autonomous(self, duration):
+        """Obstacle-map navigation through the buoy course, from the start line"""
+        self.boat.reset()
+        self.closest_approach = float('inf')
+        self.rc.set(ch2=1500, ch0=1500, ch5=2000)  # Autonomous mode
+        before = self._counters()
+        start = next_step = self.clock.monotonic()
+        while self.clock.monotonic() - start < duration:
+            next_step = self._step(next_step)
+        return self._rates(before)
+
+    def stop(self):
+        for controller in (self.jetson, self.pi):
+            controller.running = False
+            controller.scheduler.stop()
+            controller.metrics_exporter.stop()
+            controller.flight_recorder.stop()
+        self.link.close()
+        self.pi.command_receiver.close()
+        self.pi.receiver.close()
+
+    def report(self, elapsed_real, elapsed_sim, phases):
+        """Print the results; returns a dict of the headline numbers"""
+        link = self.link.get_link_stats()
+        results = {
+            'speed': elapsed_sim / elapsed_real,
+            'command_rate': phases['teleoperation']['commands'],
+            'latency_p50': percentile(self.latencies, 50),
+            'latency_p90': percentile(self.latencies, 90),
+            'latency_p99': percentile(self.latencies, 99),
+            'latency_max': max(self.latencies, default=0.0),
+        }
+        print(f"SIL: {elapsed_sim:.1f} simulated s in {elapsed_real:.1f} real s ({results['speed']:.1f}x)")
+        for name, rates in phases.items():
+            print(f"  {name} (per simulated s): Jetson control {rates['jetson_control']:.1f} Hz, "
+                  f"Pi motor {rates['pi_motor']:.1f} Hz, commands accepted {rates['commands']:.1f} Hz, "
+                  f"PWM writes {rates['pwm_writes']:.1f} Hz, depth frames {rates['depth_frames']:.1f} Hz")
+        print(f"  link: {link['sent']} frames sent, {link['coalesced']} coalesced, {link['failed']} failed; "
+              f"receiver {self.pi.command_receiver.get_stats()}")
+        print(f"  RC input -> PWM output ({len(self.latencies)} changes, {self.missed} missed): "
+              f"p50 {results['latency_p50'] * 1e3:.1f} ms, p90 {results['latency_p90'] * 1e3:.1f} ms, "
+              f"p99 {results['latency_p99'] * 1e3:.1f} ms, max {results['latency_max'] * 1e3:.1f} ms")
+        x, y, heading = self.boat.pose()
+        print(f"  boat: travelled {self.boat.distance:.1f} m, now at ({x:.1f}, {y:.1f}), "
+              f"closest approach {self.closest_approach:.2f} m, {self.collisions} collisions")
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="USV software-in-the-loop run")
+    parser.add_argument('--speed', type=float, default=2.0, help="simulated seconds per real second")
+    parser.add_argument('--teleop-time', type=float, default=30.0, help="simulated seconds of teleoperation")
+    parser.add_argument('--auto-time', type=float, default=20.0, help="simulated seconds of autonomy")
+    parser.add_argument('--max-latency-p99', type=float, help="fail above this RC-to-PWM p99 (ms)")
+    parser.add_argument('--min-command-rate', type=float,
+                        help="fail below this accepted command rate during teleoperation (Hz)")
+    parser.add_argument('--trace', metavar='PATH',
+                        help="record per-stage command traces and dump them here (see common/trace_report.py)")
+    parser.add_argument('--record', metavar='DIR',
+                        help="write both controllers' flight records under DIR (see sil/replay.py)")
+    parser.add_argument('--verbose', action='store_true', help="keep the controllers' info logging")
+    args = parser.parse_args()
+
+    if args.trace:
+        tracer.enabled = True
+        tracer.source = 'sil'
+    harness = SILHarness(speed=args.speed)
+    for name, controller in (('jetson', harness.jetson), ('pi', harness.pi)):
+        controller.flight_recorder.enabled = bool(args.record)
+        if args.record:
+            controller.flight_recorder.directory = os.path.join(args.record, name)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    harness.start()
+
+    real_start = time.perf_counter()
+    sim_start = harness.clock.monotonic()
+    phases = {
+        'teleoperation': harness.run_teleoperation(args.teleop_time),
+        'autonomous': harness.run_autonomous(args.auto_time),
+    }
+    elapsed_real = time.perf_counter() - real_start
+    elapsed_sim = harness.clock.monotonic() - sim_start
+    harness.stop()
+    results = harness.report(elapsed_real, elapsed_sim, phases)
+    if args.trace:
+        print(f"  wrote {tracer.dump(args.trace)} trace records to {args.trace}")
+
+    failures = []
+    if args.max_latency_p99 is not None and results['latency_p99'] * 1e3 > args.max_latency_p99:
+        failures.append(f"RC-to-PWM p99 {results['latency_p99'] * 1e3:.1f} ms > {args.max_latency_p99} ms")
+    if args.min_command_rate is not None and results['command_rate'] < args.min_command_rate:
+        failures.append(f"command rate {results['command_rate']:.1f} Hz < {args.min_command_rate} Hz")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
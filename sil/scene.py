@@ -0,0 +1,105 @@
+import math
+from collections import namedtuple
+import numpy as np
+
+DepthFrame = namedtuple('DepthFrame', ['sequence', 'timestamp', 'depth'])
+
+
+class DepthScene:
+    """
+    Round obstacles (buoys, posts) on open water, rendered as a ZED-style depth map
+    Each image column is one ray from the camera; its depth is the planar
+    distance to the nearest obstacle it hits (+inf when nothing is in
+    range), repeated down every row. Rendering is vectorized over columns.
+    """
+
+    def __init__(self, obstacles, width=320, height=180, horizontal_fov=87.0, max_range=20.0):
+        """
+        obstacles: list of (x, y, radius) in world metres
+        width, height: depth map size; a reduced ZED resolution keeps the
+        simulation cheap while exercising the same obstacle-map code
+        """
+        self.obstacles = np.asarray(obstacles, dtype=np.float64).reshape(-1, 3)
+        self.width = width
+        self.height = height
+        self.max_range = max_range
+
+        # Column angles, positive to the right of the bow (as in PolarObstacleMap)
+        focal = (width / 2) / math.tan(math.radians(horizontal_fov) / 2)
+        self.column_angles = np.arctan((np.arange(width) + 0.5 - width / 2) / focal)
+        self.cos_angles = np.cos(self.column_angles)
+
+    def render(self, x, y, heading, out=None):
+        """Depth map (height, width, float32) seen from the given pose"""
+        if out is None:
+            out = np.empty((self.height, self.width), dtype=np.float32)
+
+        # World-frame ray directions; right of the bow is a negative rotation
+        ray_angles = heading - self.column_angles
+        dx = np.cos(ray_angles)
+        dy = np.sin(ray_angles)
+
+        ranges = np.full(self.width, np.inf)
+        for ox, oy, radius in self.obstacles:
+            px = x - ox
+            py = y - oy
+            b = px * dx + py * dy
+            c = px * px + py * py - radius * radius
+            disc = b * b - c
+            t = -b - np.sqrt(np.maximum(disc, 0.0))
+            hit = (disc >= 0) & (t > -radius)
+            np.minimum(ranges, np.where(hit, np.maximum(t, 0.0), np.inf), out=ranges)
+
+        depth = ranges * self.cos_angles
+        depth[ranges > self.max_range] = np.inf
+        out[:] = depth.astype(np.float32)
+        return out
+
+    def clearance(self, x, y):
+        """Distance from a point to the nearest obstacle edge"""
+        if not len(self.obstacles):
+            return math.inf
+        distances = np.hypot(self.obstacles[:, 0] - x, self.obstacles[:, 1] - y) - self.obstacles[:, 2]
+        return float(distances.min())
+
+
+class SimDepthCamera:
+    """
+    Stand-in for VideoStream on the Jetson side of the SIL harness
+    Renders a new depth frame from the boat's current pose at the camera
+    frame rate, on demand, with the get_depth_frame() interface of
+    VideoStream. No image stream is served.
+    """
+
+    def __init__(self, scene, boat, clock, fps=30):
+        self.scene = scene
+        self.boat = boat
+        self.clock = clock
+        self.period = 1.0 / fps
+        self.sequence = -1
+        self.next_frame = 0.0
+        self.frame = None
+        self._depth = np.empty((scene.height, scene.width), dtype=np.float32)
+        self.frames_rendered = 0
+
+    def initialize_camera(self):
+        return True
+
+    def start_streaming(self):
+        pass
+
+    def stop_streaming(self):
+        pass
+
+    def get_depth_frame(self, after_sequence=-1, timeout=None):
+        """Newest depth frame if newer than after_sequence, else None (never blocks)"""
+        now = self.clock.monotonic()
+        if now >= self.next_frame:
+            self.scene.render(*self.boat.pose(), out=self._depth)
+            self.sequence += 1
+            self.frames_rendered += 1
+            self.frame = DepthFrame(self.sequence, now, self._depth)
+            self.next_frame = max(self.next_frame + self.period, now)
+        if self.frame is None or self.frame.sequence <= after_sequence:
+            return None
+        return self.frame
@@ -0,0 +1,110 @@
+# test_adaptive_stream.py
+# AdaptiveController policy on a fake clock, and adaptive viewers over the throttled link stand-in
+import time
+import pytest
+from sil.link_emulator import ThrottledSocket
+from teleoperation.adaptive_stream import AdaptiveController, Rung, ladder_index
+from teleoperation.frame_protocol import MODE_ADAPTIVE
+from teleoperation.video_stream import VideoStream
+
+FRAME_PERIOD = 1 / 30
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run_frames(controller, clock, seconds, size, latency=0.01, dropped=False):
+    """Feed the controller 30 fps of frames of size bytes for seconds of fake time"""
+    for _ in range(int(seconds / FRAME_PERIOD)):
+        clock.now += FRAME_PERIOD
+        controller.frame_offered(size)
+        if dropped:
+            controller.frame_dropped()
+        else:
+            controller.frame_sent(size, 0.001, latency, 0)
+
+
+def test_starts_at_half_within_cap():
+    assert AdaptiveController().profile == 'half'
+    assert AdaptiveController(cap=ladder_index('thumbnail')).profile == 'thumbnail'
+
+
+def test_steps_down_when_congested_and_back_up_when_clear():
+    clock = FakeClock()
+    controller = AdaptiveController(clock=clock)
+    start = controller.rung
+
+    run_frames(controller, clock, 2.5, 20000, latency=0.5)  # Frames take half a second to leave
+    assert controller.rung > start
+    congested = controller.rung
+
+    # Link recovered: fast, no drops; the higher rungs are tried again once
+    # the congested link rate is older than link_timeout
+    run_frames(controller, clock, controller.link_timeout + 5.0, 2000)
+    assert controller.rung < congested
+
+
+def test_drops_step_down():
+    clock = FakeClock()
+    controller = AdaptiveController(clock=clock)
+    start = controller.rung
+    run_frames(controller, clock, 2.5, 20000, dropped=True)  # The first window after start only settles
+    assert controller.rung > start
+
+
+def test_never_above_cap():
+    clock = FakeClock()
+    cap = ladder_index('half')
+    controller = AdaptiveController(cap=cap, start=cap, clock=clock)
+    run_frames(controller, clock, 20.0, 1000)
+    assert controller.rung == cap
+
+
+def test_failed_probe_doubles_hold():
+    clock = FakeClock()
+    controller = AdaptiveController(start=3, clock=clock)
+    run_frames(controller, clock, 2.5, 1000)  # Clear for hold: probe one rung up
+    assert controller.rung == 2
+    run_frames(controller, clock, 1.0, 20000, latency=1.0)  # The probe congests the link at once
+    assert controller.rung >= 3
+    assert controller.hold == 2 * controller.base_hold
+
+
+def test_frame_skip():
+    controller = AdaptiveController(ladder=(Rung('thumbnail', 3),))
+    assert [controller.wants(sequence) for sequence in range(6)] == [True, False, False, True, False, False]
+
+
+@pytest.fixture
+def stream():
+    stream = VideoStream(port=0, camera='synthetic')
+    stream.initialize_camera()
+    stream.start_streaming()
+    yield stream
+    stream.stop_streaming()
+
+
+def test_steps_down_on_slow_link(stream):
+    client = stream.add_client(ThrottledSocket(40 * 1024), ('slow', 0), 'full', MODE_ADAPTIVE)
+    start = client.controller.rung
+    deadline = time.monotonic() + 8.0
+    while time.monotonic() < deadline and client.controller.rung <= start + 1:
+        time.sleep(0.1)
+    assert client.controller.rung > start + 1
+    assert client.get_stats()['frames_sent'] > 0
+
+
+def test_frame_skip_applies_when_sharing_a_profile(stream):
+    fixed = stream.add_client(ThrottledSocket(100e6), ('fixed', 0), 'half')
+    adaptive = stream.add_client(ThrottledSocket(100e6), ('adaptive', 0), 'half', MODE_ADAPTIVE)
+    adaptive.controller.ladder = (Rung('half', 2),)  # Pinned to every other frame
+    adaptive.controller.rung = 0
+    time.sleep(2.0)
+    sent, skipped = fixed.get_stats()['frames_sent'], adaptive.get_stats()['frames_sent']
+    assert sent > 20
+    assert skipped <= 0.6 * sent
@@ -0,0 +1,73 @@
+# test_async_logging.py
+# Per-message rate limiting and the reporting of suppressed counts
+import io
+import logging
+import queue
+import time
+from common.async_logging import FlushingQueueListener, RateLimitFilter
+
+
+def make_record(created, message="RC signal timeout", level=logging.WARNING, key='rc_signal_timeout'):
+    record = logging.LogRecord('test', level, 'main.py', 10, message, None, None)
+    record.created = created
+    if key is not None:
+        record.rate_limit = key
+    return record
+
+
+def test_burst_per_interval_and_count_carried_by_next_record():
+    limit = RateLimitFilter(interval=1.0, burst=1)
+    assert limit.filter(make_record(0.0))
+    assert not any(limit.filter(make_record(0.01 * step)) for step in range(1, 50))
+    assert limit.filter(make_record(0.5, key='command_timeout'))  # Another key has its own window
+
+    record = make_record(1.2)
+    assert limit.filter(record)
+    assert record.getMessage() == "RC signal timeout (49 similar messages suppressed)"
+    assert limit.flush() == []  # Already reported
+
+
+def test_flush_reports_a_flood_that_stopped():
+    limit = RateLimitFilter(interval=1.0, burst=1)
+    for step in range(20):
+        limit.filter(make_record(0.01 * step))
+    assert limit.flush(now=0.5) == []  # Window still open: the next record may carry it
+
+    record, = limit.flush(now=1.5)
+    assert record.getMessage() == "RC signal timeout (19 similar messages suppressed)"
+    assert record.levelno == logging.WARNING
+    assert limit.flush(now=3.0) == []
+
+
+def test_listener_writes_pending_counts_without_new_records():
+    limit = RateLimitFilter(interval=0.2, burst=1)
+    output = io.StringIO()
+    handler = logging.StreamHandler(output)
+    records = queue.Queue()
+    listener = FlushingQueueListener(records, limit, handler)
+    listener.start()
+    try:
+        now = time.time()
+        for step in range(10):
+            record = make_record(now + 0.001 * step)
+            if limit.filter(record):
+                records.put(record)
+        time.sleep(0.6)  # No further records: the listener reports the count on its own
+    finally:
+        listener.stop()
+    assert output.getvalue().splitlines() == ["RC signal timeout", "RC signal timeout (9 similar messages suppressed)"]
+
+
+def test_unkeyed_records_are_limited_per_message_below_warning():
+    limit = RateLimitFilter(interval=1.0, burst=1)
+    assert limit.filter(make_record(0.0, "Gate opening", logging.INFO, key=None))
+    assert limit.filter(make_record(0.1, "Gate open", logging.INFO, key=None))  # Same line, other message
+    assert not limit.filter(make_record(0.2, "Gate open", logging.INFO, key=None))
+
+
+def test_unkeyed_warnings_and_errors_always_pass():
+    limit = RateLimitFilter(interval=1.0, burst=1)
+    for level in (logging.WARNING, logging.ERROR):
+        assert all(limit.filter(make_record(0.01 * step, "Error in control loop: bus", level, key=None))
+                   for step in range(5))
+    assert limit.flush() == []
@@ -0,0 +1,100 @@
+# test_command_link.py
+# Command frames and the Jetson -> Pi link over a socketpair loopback
+import socket
+import time
+import pytest
+from common.command_link import COMMAND_FRAME, CommandParser, StreamBus, pack_command, sequence_newer
+from controllers.command_receiver import CommandReceiver
+from controllers.gate_controller import GateController
+from hal.sim import SimBackend
+from utils.communication import I2CCommunicator
+
+
+def wait_for(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.001)
+    return False
+
+
+@pytest.fixture
+def link():
+    """(sender bus, receiver) joined by a socketpair"""
+    tx, rx = socket.socketpair()
+    receiver = CommandReceiver(stream=rx.makefile('rb', buffering=0))
+    yield StreamBus(tx), receiver
+    receiver.close()
+    tx.close()
+    rx.close()
+
+
+def send(bus, frame):
+    bus.write_i2c_block_data(0x08, frame[0], list(frame[1:]))
+
+
+def test_parser_accepts_arbitrary_chunks():
+    data = b''.join(pack_command(sequence, 1000 + sequence, 130, 120, 1) for sequence in range(5))
+    parser = CommandParser()
+    commands = []
+    for index in range(len(data)):
+        commands += parser.feed(data[index:index + 1])
+    assert [command.sequence for command in commands] == list(range(5))
+    assert commands[0][2:] == (130, 120, 1)
+    assert parser.crc_errors == 0 and parser.bytes_discarded == 0
+
+
+def test_parser_rejects_corrupt_frame_and_resyncs():
+    corrupt = bytearray(pack_command(1, 0, 200, 128, 0))
+    corrupt[COMMAND_FRAME.size - 4] ^= 0xFF  # Gate byte
+    parser = CommandParser()
+    commands = parser.feed(b'\x00garbage' + bytes(corrupt) + pack_command(2, 0, 128, 128, 0))
+    assert [command.sequence for command in commands] == [2]
+    assert parser.crc_errors == 1
+
+
+def test_sequence_wraps():
+    assert sequence_newer(0, 0xFFFF)
+    assert not sequence_newer(0xFFFF, 0)
+    assert not sequence_newer(5, 5)
+
+
+def test_receiver_rejects_duplicates_and_stale_frames(link):
+    bus, receiver = link
+    for sequence in (10, 10, 11, 3, 12):
+        send(bus, pack_command(sequence, 0, 128 + sequence, 128, 0))
+    assert wait_for(lambda: receiver.get_stats()['frames'] == 5)
+    stats = receiver.get_stats()
+    assert (stats['accepted'], stats['duplicates'], stats['out_of_order']) == (3, 1, 1)
+    assert receiver.take_command() == (140, 128, 0)
+    assert receiver.take_command() is None  # Nothing new since
+
+
+def test_receiver_drops_stale_command(link):
+    bus, receiver = link
+    receiver.max_age = 0.05
+    send(bus, pack_command(1, 0, 200, 128, 0))
+    assert wait_for(lambda: receiver.accepted == 1)
+    time.sleep(0.1)
+    assert receiver.take_command() is None
+
+
+def test_communicator_to_receiver(link):
+    bus, receiver = link
+    communicator = I2CCommunicator(bus=bus)
+    try:
+        communicator.send_command(180, 90, 2)
+        assert wait_for(lambda: receiver.accepted == 1)
+        assert receiver.take_command() == (180, 90, 2)
+    finally:
+        communicator.close()
+
+
+def test_gate_refuses_command_link_pins():
+    class OldBoard(SimBackend):
+        def command_link_pins(self):
+            return (18, 19)  # BSC slave before the Pi 4
+
+    with pytest.raises(ValueError):
+        GateController(motor_pin=18, hal=OldBoard())
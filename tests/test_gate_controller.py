@@ -0,0 +1,71 @@
+# test_gate_controller.py
+# Gate stops on limit-switch edges and on the operation timeout, on simulated hardware
+import pytest
+from controllers.gate_controller import GateController
+from hal.sim import SimBackend
+
+SPEED = 10.0  # Simulated seconds per real second
+
+
+@pytest.fixture
+def sim():
+    return SimBackend(speed=SPEED)
+
+
+def test_limit_edge_stops_motor(sim):
+    gate = GateController(hal=sim, supervisor_rate=0.01)  # Supervisor effectively off: only edges stop it
+    states = []
+    gate.add_listener(states.append)
+    pwm = sim.gpio_pins.pwms[gate.motor_pin]
+    try:
+        gate.control_gate(1)
+        assert gate.wait_for_state(('open', 'stopped'), timeout=2 * sim.gate.travel_time / SPEED + 1) == 'open'
+        assert pwm.duty_cycle == 0
+        assert pwm.changed_at - sim.gate.limit_hit_at < 0.02  # Real seconds from switch to motor stop
+
+        gate.control_gate(2)
+        assert gate.wait_for_state(('closed', 'stopped'), timeout=2 * sim.gate.travel_time / SPEED + 1) == 'closed'
+        assert states == ['opening', 'open', 'closing', 'closed']
+    finally:
+        gate.close()
+
+
+def test_operation_timeout_stops_motor(sim):
+    sim.gate.travel_time = 100.0  # Jammed: never reaches a switch
+    gate = GateController(hal=sim)
+    gate.max_operation_time = 0.5
+    try:
+        gate.control_gate(1)
+        assert gate.wait_for_state(('stopped',), timeout=2.0) == 'stopped'
+        assert gate.timeouts == 1
+        assert sim.gpio_pins.pwms[gate.motor_pin].duty_cycle == 0
+    finally:
+        gate.close()
+
+
+def test_already_open_does_not_move(sim):
+    sim.gate.position = 1.0
+    sim.gate.update()
+    gate = GateController(hal=sim)
+    try:
+        assert gate.get_state() == 'open'
+        gate.control_gate(1)
+        assert gate.get_state() == 'open'
+        assert sim.gpio_pins.pwms[gate.motor_pin].duty_cycle == 0
+    finally:
+        gate.close()
+
+
+class OlderBoardSim(SimBackend):
+    """Simulated board whose command link takes GPIO 18/19, as before the Pi 4"""
+
+    def command_link_pins(self):
+        return (18, 19)
+
+
+def test_default_pins_avoid_the_command_link():
+    gate = GateController(hal=OlderBoardSim(speed=SPEED))
+    try:
+        assert gate.motor_pin == 12
+    finally:
+        gate.close()
@@ -0,0 +1,52 @@
+# test_motor_controller.py
+# MotorController acceleration limiting at the motor tick rate and at the faster direct-RC rate
+import numpy as np
+import pytest
+from controllers.motor_controller import MotorController
+from controllers.pwm_output import FakeI2CBus
+from hal.sim import SimBackend
+
+
+class SteppedClock:
+    """Clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def controller():
+    return MotorController(bus=FakeI2CBus(), hal=SimBackend(), clock=SteppedClock())
+
+
+def ramp_rate(controller, rate_hz, updates=4):
+    """Power gained per second under full throttle commands at rate_hz"""
+    clock = controller.clock
+    controller.mixer.reset()
+    for _ in range(updates):
+        clock.now += 1 / rate_hz
+        controller.set_thruster_speeds(255, 128)
+    return controller.current_powers[0] / (updates / rate_hz)
+
+
+def test_ramp_rate_does_not_depend_on_update_rate(controller):
+    per_second = controller.max_acceleration / controller.update_period
+    assert ramp_rate(controller, 100) == pytest.approx(per_second)
+    assert ramp_rate(controller, 143) == pytest.approx(per_second)  # iBUS frames arrive about every 7 ms
+
+
+def test_first_update_after_a_pause_is_one_step(controller):
+    controller.set_thruster_speeds(255, 128)
+    controller.clock.now += 5.0
+    before = controller.current_powers.copy()
+    controller.set_thruster_speeds(255, 128)
+    assert np.allclose(controller.current_powers - before, controller.max_acceleration)
@@ -0,0 +1,44 @@
+# test_obstacle_map.py
+# PolarObstacleMap ranges and steering suggestions on synthetic depth
+import numpy as np
+import pytest
+from autonomy.obstacle_map import PolarObstacleMap
+from bench_obstacle_map import FOV, HEIGHT, WIDTH, synthetic_depth
+
+
+@pytest.fixture
+def grid():
+    return PolarObstacleMap(WIDTH, HEIGHT, horizontal_fov=FOV)
+
+
+def test_obstacle_ahead(grid):
+    bin_degrees = np.degrees(grid.bin_angles)
+    ranges = grid.update(synthetic_depth([(-5, 5, 4.0)])).copy()
+    assert np.allclose(ranges[np.abs(bin_degrees) < 3], 4.0, rtol=0.02)
+    assert np.all(ranges[np.abs(bin_degrees) > 8] == grid.max_range)  # Open water
+
+    suggestion = grid.suggest()
+    assert suggestion.direction in ('left', 'right')
+    assert abs(suggestion.steering) > 0.05
+
+
+def test_off_axis_obstacle(grid):
+    bin_degrees = np.degrees(grid.bin_angles)
+    ranges = grid.update(synthetic_depth([(20, 40, 7.5)])).copy()
+    assert np.allclose(ranges[(bin_degrees > 22) & (bin_degrees < 38)], 7.5, rtol=0.02)
+    assert grid.suggest().direction == 'forward'  # The bow is clear
+
+
+def test_wall_all_round_stops(grid):
+    grid.update(synthetic_depth([(-45, 45, 1.0)]))
+    assert grid.suggest().direction == 'stop'
+
+
+def test_invalid_depth(grid):
+    bin_degrees = np.degrees(grid.bin_angles)
+    depth = synthetic_depth([])
+    depth[:, :WIDTH // 2] = -np.inf
+    depth[:, WIDTH // 2:] = np.nan
+    ranges = grid.update(depth)
+    assert np.all(ranges[bin_degrees < -2] == grid.min_range)  # -inf: something closer than the camera sees
+    assert np.all(ranges[bin_degrees > 2] == grid.max_range)  # All-NaN columns are ignored
@@ -0,0 +1,52 @@
+# test_pwm_output.py
+# PCA9685Output block writes, skipping of unchanged channels and recovery from failed writes
+import pytest
+from controllers.pwm_output import FakeI2CBus, PCA9685Output
+
+
+class FlakyBus(FakeI2CBus):
+    """FakeI2CBus whose next block writes fail"""
+
+    def __init__(self):
+        super().__init__()
+        self.failures = 0
+
+    def write_i2c_block_data(self, address, register, data):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("I2C write failed")
+        super().write_i2c_block_data(address, register, data)
+
+
+@pytest.fixture
+def bus():
+    return FlakyBus()
+
+
+def test_changed_channels_are_one_block(bus):
+    pwm = PCA9685Output(bus)
+    transactions = bus.transactions
+    assert pwm.set_duty_cycles([0, 1, 2, 3], [8000, 9000, 10000, 11000]) == 4
+    assert bus.transactions == transactions + 1
+    assert [bus.off_count(pwm.address, channel) for channel in range(4)] == [500, 562, 625, 687]
+
+
+def test_unchanged_channels_are_skipped(bus):
+    pwm = PCA9685Output(bus)
+    pwm.set_duty_cycles([0, 1, 2, 3], [8000] * 4)
+    transactions = bus.transactions
+    assert pwm.set_duty_cycles([0, 1, 2, 3], [8000] * 4) == 0
+    assert bus.transactions == transactions
+    assert pwm.set_duty_cycles([0, 1, 2, 3], [8000, 8000, 9000, 8000]) == 1
+
+
+def test_failed_write_is_retried_by_the_same_command(bus):
+    pwm = PCA9685Output(bus)
+    pwm.set_duty_cycles([0, 1, 2, 3], [8000] * 4)
+    bus.failures = 1
+    with pytest.raises(OSError):
+        pwm.set_duty_cycles([0, 1, 2, 3], [4915] * 4)  # E.g. an emergency stop to neutral
+    assert bus.off_count(pwm.address, 0) == 500  # The chip still has the old output
+
+    assert pwm.set_duty_cycles([0, 1, 2, 3], [4915] * 4) == 4  # Not skipped as unchanged
+    assert [bus.off_count(pwm.address, channel) for channel in range(4)] == [307] * 4
@@ -0,0 +1,22 @@
+# test_replay.py
+# Replaying a recorded SIL run through MotorController reproduces the recorded thruster powers
+import os
+import subprocess
+import sys
+import numpy as np
+from common.flight_recorder import FLAG_NEW_COMMAND, load_flight
+from sil.replay import replay_motor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def test_replay_matches_recorded_powers(tmp_path):
+    subprocess.run([sys.executable, '-m', 'sil.run_sil', '--teleop-time', '3', '--auto-time', '1',
+                    '--speed', '2', '--record', str(tmp_path)], cwd=ROOT, check=True, capture_output=True)
+    records = load_flight(str(tmp_path / 'pi'))
+    applied = records[(records['flags'] & FLAG_NEW_COMMAND) != 0]
+    assert len(applied) > 100
+    assert np.abs(applied['thruster_powers']).max() > 0.5   # The sticks moved the thrusters
+
+    _, error = replay_motor(records)
+    assert error < 0.02
@@ -0,0 +1,50 @@
+# test_thruster_mixer.py
+# Allocation-matrix mixing against the original differential mix, and MotorController layout checks
+import numpy as np
+import pytest
+from bench_motor_mixing import LegacyMixer, make_inputs
+from controllers.motor_controller import MotorController
+from controllers.pwm_output import FakeI2CBus
+from controllers.thruster_mixer import ThrusterMixer
+from hal.sim import SimBackend
+
+
+def test_differential_matches_legacy_mix():
+    legacy = LegacyMixer()
+    mixer = ThrusterMixer('differential')
+    for throttle, steering in make_inputs(5000):
+        expected = legacy.update(throttle, steering)
+        actual = mixer.update(throttle, 0.0, steering).tolist()
+        # One multiply-add instead of pulse then duty may round a truncated count differently
+        assert max(abs(a - b) for a, b in zip(expected, actual)) <= 1
+
+
+def test_saturation_keeps_ratio():
+    mixer = ThrusterMixer('vectored', max_acceleration=2.0)
+    mixer.update(1.0, 0.0, 0.5)
+    assert np.max(np.abs(mixer.powers)) == pytest.approx(1.0)
+    assert mixer.powers[0] / mixer.powers[1] == pytest.approx(0.5 / 1.5)
+
+
+def test_acceleration_limit():
+    mixer = ThrusterMixer('differential', max_acceleration=0.2)
+    mixer.update(1.0, 0.0, 0.0)
+    assert np.allclose(mixer.powers, 0.2)
+    mixer.update(1.0, 0.0, 0.0)
+    assert np.allclose(mixer.powers, 0.4)
+
+
+def test_scalar_rows_match_array_path():
+    scalar = ThrusterMixer('vectored', max_acceleration=0.3)
+    array = ThrusterMixer('vectored', max_acceleration=0.3)
+    array.rows = None
+    assert scalar.rows is not None
+    for throttle, steering in make_inputs(2000):
+        expected = array.update(throttle, steering * 0.5, steering, step=0.7).tolist()
+        assert scalar.update(throttle, steering * 0.5, steering, step=0.7).tolist() == expected
+        assert np.allclose(scalar.powers, array.powers)
+
+
+def test_motor_controller_rejects_matrix_of_wrong_size():
+    with pytest.raises(ValueError):
+        MotorController(layout=[[1.0, 0.0, -1.0], [1.0, 0.0, 1.0]], bus=FakeI2CBus(), hal=SimBackend())
@@ -0,0 +1,40 @@
+# test_trace_report.py
+# Per-stage tables and clock alignment in trace_report
+import numpy as np
+from common.trace import FLOW_LINK, FLOW_RC, LINK_SENT, MIXED, PI_RECEIVED, PWM_WRITTEN, TRACE_DTYPE
+from common.trace_report import align_clocks, stage_table
+
+
+def records(*rows):
+    """Build trace records from (trace, stage, flow, timestamp) tuples"""
+    data = np.zeros(len(rows), dtype=TRACE_DTYPE)
+    for index, (trace, stage, flow, timestamp) in enumerate(rows):
+        data[index]['trace'] = trace
+        data[index]['stage'] = stage
+        data[index]['flow'] = flow
+        data[index]['timestamp'] = timestamp
+    return data
+
+
+def test_stage_table_keeps_first_occurrence():
+    table = stage_table(records(
+        (1, LINK_SENT, FLOW_LINK, 1000),
+        (1, LINK_SENT, FLOW_LINK, 5000),   # Retried send
+        (2, LINK_SENT, FLOW_LINK, 2000),
+        (1, PI_RECEIVED, FLOW_LINK, 3000),
+        (1, PI_RECEIVED, FLOW_LINK, 2500),  # Out of record order, but earlier
+        (3, MIXED, FLOW_RC, 100),           # Other flow
+    ), FLOW_LINK)
+    assert table.shape[0] == 2
+    assert table[0, LINK_SENT] == 1000
+    assert table[0, PI_RECEIVED] == 2500
+    assert table[1, LINK_SENT] == 2000
+    assert np.isnan(table[1, PI_RECEIVED])
+    assert np.isnan(table[:, PWM_WRITTEN]).all()
+
+
+def test_align_clocks_uses_fastest_frame():
+    jetson = records((1, LINK_SENT, FLOW_LINK, 1000), (2, LINK_SENT, FLOW_LINK, 2000))
+    pi = records((1, PI_RECEIVED, FLOW_LINK, 50300), (2, PI_RECEIVED, FLOW_LINK, 51100))
+    assert align_clocks([jetson, pi]) == 49100
+    assert list(pi['timestamp']) == [1200, 2000]
@@ -0,0 +1,153 @@
+# test_udp_transport.py
+# UDP video transport: fragmentation, reassembly under datagram loss, sender restarts and subscriptions
+import socket
+import time
+import numpy as np
+import pytest
+from sil.link_emulator import LossyDatagramSocket
+from teleoperation.frame_protocol import FRAME_HEADER, pack_header
+from teleoperation.udp_transport import (DATAGRAM_SIZE, FRAGMENT_HEADER, FRAGMENT_MAGIC, FRAGMENT_VERSION,
+                                         UdpFrameReceiver, UdpFrameSender, parse_multicast_streams)
+from teleoperation.video_stream import VideoStream
+
+
+@pytest.fixture
+def receiver():
+    receiver = UdpFrameReceiver(interface='127.0.0.1')
+    yield receiver
+    receiver.close()
+
+
+def frame(sequence, size):
+    payload = np.random.default_rng(sequence).integers(0, 256, size, dtype=np.uint8)
+    return pack_header(sequence, 0, 64, 48, size), payload
+
+
+def receive_all(receiver):
+    frames = []
+    while True:
+        received = receiver.read_frame(timeout=0.2)
+        if received is None:
+            return frames
+        header, payload = received
+        frames.append((header.sequence, bytes(payload)))
+
+
+def test_fragments_reassemble_to_the_tcp_frame(receiver):
+    sender = UdpFrameSender(('127.0.0.1', receiver.port))
+    header, payload = frame(7, 10 * DATAGRAM_SIZE + 123)
+    sender.send_frame(header, payload)
+    assert sender.datagrams_sent == -(-(FRAME_HEADER.size + payload.nbytes) // sender.chunk)
+
+    (sequence, data), = receive_all(receiver)
+    assert sequence == 7
+    assert data == payload.tobytes()
+    sender.close()
+
+
+def test_incomplete_frames_are_skipped_not_waited_for(receiver):
+    lossy = LossyDatagramSocket(socket.socket(socket.AF_INET, socket.SOCK_DGRAM), loss=0.05, seed=3)
+    sender = UdpFrameSender(('127.0.0.1', receiver.port), sock=lossy)
+    sent = {}
+    for sequence in range(200):
+        header, payload = frame(sequence, 8 * DATAGRAM_SIZE)
+        sender.send_frame(header, payload)
+        sent[sequence] = payload.tobytes()
+        time.sleep(0.0005)  # Keep the loopback receive buffer from overflowing
+
+    frames = receive_all(receiver)
+    sequences = [sequence for sequence, _ in frames]
+    assert lossy.datagrams_dropped > 0
+    assert 0 < len(frames) < 200
+    assert sequences == sorted(sequences)  # In order, each at most once
+    assert all(data == sent[sequence] for sequence, data in frames)  # Never a frame with a hole in it
+    assert receiver.frames_received + receiver.frames_lost == sequences[-1] - sequences[0] + 1
+    lossy.close()
+
+
+def test_late_and_duplicate_fragments_are_ignored(receiver):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    captured = []
+
+    class Recorder:
+        def sendmsg(self, parts, ancdata, flags, address):
+            captured.append(b''.join(bytes(part) for part in parts))
+
+    sender = UdpFrameSender(('127.0.0.1', receiver.port), sock=Recorder())
+    for sequence in range(2):
+        sender.send_frame(*frame(sequence, 3 * DATAGRAM_SIZE))
+    first, second = captured[:len(captured) // 2], captured[len(captured) // 2:]
+    for datagram in second + second + first:  # Frame 1, a repeat of it, then the late frame 0
+        sock.sendto(datagram, ('127.0.0.1', receiver.port))
+
+    assert [sequence for sequence, _ in receive_all(receiver)] == [1]
+    sock.close()
+
+
+def test_fragments_with_bad_sizes_are_dropped(receiver):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    captured = []
+
+    class Recorder:
+        def sendmsg(self, parts, ancdata, flags, address):
+            captured.append(b''.join(bytes(part) for part in parts))
+
+    sender = UdpFrameSender(('127.0.0.1', receiver.port), sock=Recorder())
+    header, payload = frame(0, 2 * DATAGRAM_SIZE)
+    sender.send_frame(header, payload)
+
+    def forged(index, count, total):
+        return FRAGMENT_HEADER.pack(FRAGMENT_MAGIC, FRAGMENT_VERSION, 0, sender.epoch, 0,
+                                    index, count, 0, total) + b'x' * 100
+
+    for datagram in (forged(0, 1, 0xFFFFFFFF),        # Would allocate 4 GiB
+                     forged(0, 0xFFFF, 0xFFFFFFF0),   # Enough fragments for it, but over the frame size cap
+                     captured[0],
+                     forged(5, 8, 8 * 1000),          # Another shape for the frame already open
+                     *captured[1:]):
+        sock.sendto(datagram, ('127.0.0.1', receiver.port))
+
+    (sequence, data), = receive_all(receiver)
+    assert data == payload.tobytes()
+    assert receiver.datagrams_received == len(captured) + 1  # The oversized ones fail the header checks
+    sock.close()
+
+
+def test_restarted_sender_is_followed(receiver):
+    for count in (100, 50):
+        sender = UdpFrameSender(('127.0.0.1', receiver.port))  # Frame ids start again at 0
+        for sequence in range(count):
+            sender.send_frame(*frame(sequence, 1000))
+        assert len(receive_all(receiver)) == count
+        sender.close()
+    assert receiver.restarts == 1
+
+
+def test_parse_multicast_streams():
+    assert parse_multicast_streams('239.1.2.3:5600:half, 239.1.2.3:5601:thumbnail:delta') == [
+        ('239.1.2.3', 5600, 'half', None), ('239.1.2.3', 5601, 'thumbnail', 'delta')]
+    assert parse_multicast_streams(None) == []
+
+
+def test_subscription_and_expiry():
+    stream = VideoStream(host='127.0.0.1', port=0, camera='synthetic', udp_port=0)
+    stream.initialize_camera()
+    stream.start_streaming()
+    viewer = None
+    try:
+        viewer = UdpFrameReceiver(interface='127.0.0.1', server=stream.udp_socket.getsockname(),
+                                  request='thumbnail')
+        received = [viewer.read_frame(timeout=2.0) for _ in range(10)]
+        assert all(received)
+        assert received[0][0].width == 320
+
+        viewer.close()
+        viewer = None
+        deadline = time.monotonic() + 6.0
+        while time.monotonic() < deadline and stream.get_client_stats():
+            time.sleep(0.2)
+        assert stream.get_client_stats() == []  # Dropped once it stopped renewing
+    finally:
+        if viewer:
+            viewer.close()
+        stream.stop_streaming()
@@ -0,0 +1,46 @@
+# test_video_process.py
+# VideoProcess supervision: restarts, and shutdown racing a restart
+import threading
+import time
+import pytest
+from teleoperation.video_process import VideoProcess
+
+
+@pytest.fixture
+def thread_errors(monkeypatch):
+    """Exceptions raised in background threads during the test"""
+    errors = []
+    monkeypatch.setattr(threading, 'excepthook', errors.append)
+    return errors
+
+
+def test_restarts_and_serves_frames(thread_errors):
+    video = VideoProcess(port=0, camera='synthetic', restart_delay=0.0)
+    assert video.initialize_camera()
+    try:
+        video.start_streaming()
+        assert video.get_depth_frame(timeout=5.0) is not None
+        restarts = video.restarts.value
+        video.process.kill()  # The monitor notices and starts a new one
+        deadline = time.monotonic() + 10.0
+        while video.restarts.value == restarts and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert video.restarts.value == restarts + 1
+        frame = video.get_depth_frame(timeout=10.0)
+        assert video.get_depth_frame(frame.sequence, timeout=10.0) is not None
+    finally:
+        video.stop_streaming()
+    assert thread_errors == []
+
+
+@pytest.mark.parametrize('running_for', [0.6, 0.9, 1.2])
+def test_shutdown_during_restart(thread_errors, running_for):
+    # No camera: the process fails at startup and the monitor keeps restarting it
+    video = VideoProcess(port=0, camera='missing', restart_delay=0.0)
+    assert not video.initialize_camera()
+    video.start_streaming()
+    time.sleep(running_for)
+    video.stop_streaming()
+    time.sleep(0.8)  # Long enough for the monitor to run into the stopped process
+    assert video.process is None and video.ring is None
+    assert thread_errors == []